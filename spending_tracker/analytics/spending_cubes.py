@@ -0,0 +1,232 @@
+import pandas as pd
+
+from spending_tracker.indexes.category_tree import CategoryTree
+from spending_tracker.utils.amounts import to_dollars
+
+# cube name -> dimensions the amounts are summed over
+CUBE_DIMENSIONS = {
+    "monthly": ["category", "account", "month"],
+    "merchants": ["merchant", "category"],
+}
+
+
+class SpendingCubes:
+
+    """Spend pre-aggregated by category x account x month and by merchant x
+    category.
+
+    Cubes hold the sum (in int64 cents, so sums are exact) and count of amounts
+    per cell, reports are in dollars. They're kept up to date
+    incrementally: rows are diffed by id against the categories of the rows
+    already aggregated, so only new rows and recategorized rows are aggregated
+    (recategorized rows are subtracted from their old category). Reports are
+    computed from the cubes only and memoized until the next change.
+    """
+
+    # bumped when the cubes' layout changes, so caches of older versions are rebuilt
+    VERSION = 3
+
+    def __init__(self):
+        # id -> category of every aggregated transaction
+        self.aggregated_categories = pd.Series(dtype=object)
+        self.cubes = {
+            name: pd.DataFrame(
+                {
+                    **{dimension: pd.Series(dtype=object) for dimension in dimensions},
+                    "amount_cents": pd.Series(dtype="int64"),
+                    "count": pd.Series(dtype="int64"),
+                }
+            )
+            for name, dimensions in CUBE_DIMENSIONS.items()
+        }
+        self.query_cache = {}
+
+    def get_frames(self) -> dict:
+        """The aggregated categories and the cubes, as frames of text and int64
+        columns, e.g. to be saved"""
+        return {
+            "aggregated_categories": pd.DataFrame(
+                {
+                    "id": self.aggregated_categories.index.to_numpy(dtype=object),
+                    "category": self.aggregated_categories.to_numpy(dtype=object),
+                }
+            ),
+            **self.cubes,
+        }
+
+    @classmethod
+    def from_frames(cls, frames: dict) -> "SpendingCubes":
+        spending_cubes = cls()
+        spending_cubes.aggregated_categories = pd.Series(
+            frames["aggregated_categories"]["category"].to_numpy(dtype=object),
+            index=frames["aggregated_categories"]["id"],
+        )
+        spending_cubes.cubes = {name: frames[name] for name in CUBE_DIMENSIONS}
+        return spending_cubes
+
+    @staticmethod
+    def extract_merchants(notes: pd.Series, accounts: pd.Series) -> pd.Series:
+        """Note without the account prefix and without the tokens holding digits
+        (store numbers, order ids, ...), e.g. `AMZN Mktp US*2K4HB1` -> `AMZN MKTP US`"""
+        prefix_lengths = accounts.astype(str).str.len() + 1
+        notes = pd.Series(
+            [note[length:] for note, length in zip(notes.astype(str), prefix_lengths)],
+            index=notes.index,
+            dtype=object,
+        )
+        return (
+            notes.str.upper()
+            .str.replace(r"[*#,]", " ", regex=True)
+            .str.replace(r"\S*\d\S*", " ", regex=True)
+            .str.split()
+            .str.join(" ")
+        )
+
+    @staticmethod
+    def aggregate(transactions: pd.DataFrame, sign: int) -> dict:
+        """Cube cells of the transactions, amounts and counts multiplied by sign"""
+        cells = pd.DataFrame(
+            {
+                "category": transactions["category"].astype(object),
+                "account": transactions["account"].astype(str),
+                "month": transactions["datetime"].dt.strftime("%Y-%m"),
+                "merchant": SpendingCubes.extract_merchants(
+                    transactions["note"], transactions["account"]
+                ),
+                "amount_cents": transactions["amount_cents"] * sign,
+                "count": sign,
+            }
+        )
+        return {
+            name: cells.groupby(dimensions, dropna=False, as_index=False)[
+                ["amount_cents", "count"]
+            ].sum()
+            for name, dimensions in CUBE_DIMENSIONS.items()
+        }
+
+    def apply(self, cube_deltas: dict) -> None:
+        for name, dimensions in CUBE_DIMENSIONS.items():
+            cube = (
+                pd.concat([self.cubes[name], cube_deltas[name]], ignore_index=True)
+                .groupby(dimensions, dropna=False, as_index=False)[
+                    ["amount_cents", "count"]
+                ]
+                .sum()
+            )
+            self.cubes[name] = cube[cube["count"] != 0].reset_index(drop=True)
+
+    def update(self, categorized_transactions: pd.DataFrame) -> int:
+        """Brings the cubes up to date with the categorized transactions, returns
+        the number of transactions that were (re)aggregated"""
+        categories = pd.Series(
+            categorized_transactions["category"].to_numpy(dtype=object),
+            index=categorized_transactions["id"],
+        )
+        if not self.aggregated_categories.index.isin(categories.index).all():
+            # transactions were removed (e.g. raw file deleted), start over
+            self.__init__()
+        previous_categories = self.aggregated_categories.reindex(categories.index)
+        is_new = ~categories.index.isin(self.aggregated_categories.index)
+        is_category_changed = ~(
+            previous_categories.eq(categories)
+            | (previous_categories.isna() & categories.isna())
+        )
+        is_recategorized = ~is_new & is_category_changed.to_numpy()
+        if not (is_new | is_recategorized).any():
+            return 0
+        if is_recategorized.any():
+            recategorized_transactions = categorized_transactions[
+                is_recategorized
+            ].copy()
+            recategorized_transactions["category"] = previous_categories[
+                is_recategorized
+            ].to_numpy()
+            self.apply(self.aggregate(recategorized_transactions, -1))
+        self.apply(
+            self.aggregate(categorized_transactions[is_new | is_recategorized], 1)
+        )
+        self.aggregated_categories = categories
+        self.query_cache = {}
+        return int((is_new | is_recategorized).sum())
+
+    def get_cached(self, query, *arguments):
+        key = (query.__name__, *arguments)
+        if key not in self.query_cache:
+            self.query_cache[key] = query(*arguments)
+        return self.query_cache[key]
+
+    def get_spend_amount_by_category(self) -> pd.Series:
+        return self.get_cached(self.compute_spend_amount_by_category)
+
+    def compute_spend_amount_by_category(self) -> pd.Series:
+        return to_dollars(
+            self.cubes["monthly"]
+            .groupby("category", dropna=False)["amount_cents"]
+            .sum()
+            .sort_values(ascending=False)
+        ).rename("amount")
+
+    def get_monthly_trend(self, category=None, account=None) -> pd.DataFrame:
+        return self.get_cached(self.compute_monthly_trend, category, account)
+
+    def compute_monthly_trend(self, category=None, account=None) -> pd.DataFrame:
+        """Spend per month and change from the previous month"""
+        cube = self.cubes["monthly"]
+        if category is not None:
+            cube = cube[
+                (cube["category"] == category)
+                | cube["category"].str.startswith(category + "/", na=False)
+            ]
+        if account is not None:
+            cube = cube[cube["account"] == account]
+        monthly_amounts = to_dollars(
+            cube.groupby("month")["amount_cents"].sum().sort_index()
+        )
+        return pd.DataFrame(
+            {
+                "amount": monthly_amounts,
+                "change": monthly_amounts.diff(),
+                "percent_change": monthly_amounts.pct_change() * 100,
+            }
+        )
+
+    def get_top_merchants(self, n: int = 10) -> pd.DataFrame:
+        return self.get_cached(self.compute_top_merchants, n)
+
+    def compute_top_merchants(self, n: int = 10) -> pd.DataFrame:
+        top_merchants = (
+            self.cubes["merchants"]
+            .groupby("merchant")[["amount_cents", "count"]]
+            .sum()
+            .sort_values("amount_cents", ascending=False)
+            .head(n)
+        )
+        return pd.DataFrame(
+            {
+                "amount": to_dollars(top_merchants["amount_cents"]),
+                "count": top_merchants["count"],
+            }
+        )
+
+    def get_account_totals(self) -> pd.Series:
+        return self.get_cached(self.compute_account_totals)
+
+    def compute_account_totals(self) -> pd.Series:
+        return to_dollars(
+            self.cubes["monthly"]
+            .groupby("account")["amount_cents"]
+            .sum()
+            .sort_values(ascending=False)
+        ).rename("amount")
+
+    def get_category_rollup(self) -> pd.Series:
+        return self.get_cached(self.compute_category_rollup)
+
+    def compute_category_rollup(self) -> pd.Series:
+        """Spend of every category including its subcategories, e.g. `food`
+        includes `food/groceries` and `food/delivery`"""
+        category_cents = self.cubes["monthly"].groupby("category")["amount_cents"].sum()
+        # summed in cents, floats hold integers exactly
+        return to_dollars(
+            CategoryTree(category_cents.index).get_subtree_sums(category_cents)
+        )
@@ -0,0 +1,261 @@
+"""Times the main stages of the app on synthetic data at several scales and
+records their peak memory, writing the results to a JSON file. Results of two
+runs (e.g. before and after a commit) can be compared with --compare.
+
+Stages are timed in one run of the pipeline and their peak memory is measured in
+a second, traced run, each in a fresh data folder, since tracing allocations
+slows the code down. Categorizing with the pattern category map is reported with
+a cold pattern match matrix (every note matched) and a warm one (read from disk).
+
+Run with `python3 -m spending_tracker.benchmarks.pipeline_benchmark`
+"""
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+from spending_tracker.benchmarks.synthetic_data import (
+    generate_merchants,
+    generate_pattern_set,
+    write_raw_data_file,
+)
+from spending_tracker.containers.container import Container
+from spending_tracker.storage.pattern_match_matrix import PatternMatchMatrix
+from spending_tracker.utils.config_cache import load_config
+
+CONFIG_FILE_PATH = "./spending_tracker/config.yaml"
+# relative increase in time or memory reported as a regression by --compare
+REGRESSION_THRESHOLD = 0.1
+
+
+@contextlib.contextmanager
+def measure_time(measurements: dict, stage: str):
+    """Records the wall time of the code run in the context"""
+    start_time = time.perf_counter()
+    try:
+        yield
+    finally:
+        measurements[stage] = time.perf_counter() - start_time
+
+
+@contextlib.contextmanager
+def measure_peak_memory(measurements: dict, stage: str):
+    """Records the peak memory (traced python/numpy allocations) of the code run
+    in the context"""
+    tracemalloc.start()
+    try:
+        yield
+    finally:
+        measurements[stage] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+
+def create_container(root_data_folder_path: str, storage_format: str) -> Container:
+    container = Container()
+    container.config.from_dict(load_config(CONFIG_FILE_PATH))
+    container.config.root_data_folder_path.from_value(root_data_folder_path)
+    container.config.storage_format.from_value(storage_format)
+    return container
+
+
+def write_raw_data_files(
+    raw_data_folder_path: str, accounts: list, num_rows: int, merchants: list
+) -> None:
+    """One raw file per account format, num_rows in total"""
+    for i, account in enumerate(accounts):
+        write_raw_data_file(
+            raw_data_folder_path,
+            account,
+            num_rows // len(accounts) + (i < num_rows % len(accounts)),
+            from_date="2018-01-01",
+            to_date="2022-12-31",
+            seed=i,
+            merchants=merchants,
+            unique_amounts=True,
+        )
+
+
+def write_historical_categorized_transactions(
+    container: Container, pattern_category_map_list: list
+) -> None:
+    """Categorizes the first transaction of each merchant with its pattern, as if
+    the user created all the patterns in a previous run"""
+    processed_data = container.processed_transaction_store().load()
+    merchant_numbers = processed_data["note"].str.extract(r"VENDOR(\d{5})")[0]
+    historical_categorized_transactions = processed_data[
+        ~merchant_numbers.duplicated()
+    ].copy()
+    pattern_category_map = pd.DataFrame(
+        pattern_category_map_list, columns=["pattern", "category"]
+    )
+    pattern_category_map = pattern_category_map.iloc[
+        merchant_numbers[~merchant_numbers.duplicated()].astype(int)
+    ]
+    historical_categorized_transactions["pattern"] = pattern_category_map[
+        "pattern"
+    ].to_numpy()
+    historical_categorized_transactions["category"] = pattern_category_map[
+        "category"
+    ].to_numpy()
+    container.categorization_engine().save_categorized_transactions(
+        historical_categorized_transactions
+    )
+
+
+def run_stages(num_rows: int, num_patterns: int, storage_format: str, measure) -> dict:
+    """Runs the stages in a fresh data folder, returns stage -> measurement"""
+    measurements = {}
+    pattern_category_map_list = generate_pattern_set(num_patterns)
+    with tempfile.TemporaryDirectory() as root_data_folder_path:
+        container = create_container(root_data_folder_path, storage_format)
+        accounts = list(container.config.supported_accounts())
+        os.makedirs(root_data_folder_path + "/raw")
+        write_raw_data_files(
+            root_data_folder_path + "/raw",
+            accounts,
+            num_rows,
+            generate_merchants(num_patterns),
+        )
+        raw_data_processing_engine = container.raw_data_processing_engine()
+        with measure(measurements, "process_raw_data_files"):
+            raw_data_processing_engine.process_raw_data_files()
+        write_historical_categorized_transactions(container, pattern_category_map_list)
+
+        categorization_engine = container.categorization_engine()
+        with measure(measurements, "load_data_to_categorize"):
+            categorization_engine.load_data_to_categorize()
+        transactions_to_categorize = categorization_engine.transactions_to_categorize
+        pattern_index = categorization_engine.pattern_registry.pattern_index
+        # the matrix load_data_to_categorize built is dropped, then saved and read
+        # back from disk
+        os.remove(categorization_engine.pattern_match_matrix.matrix_file_path)
+        for matrix_state in ["cold", "warm"]:
+            categorization_engine.pattern_match_matrix = PatternMatchMatrix(
+                root_data_folder_path
+            )
+            with measure(
+                measurements,
+                f"categorize_data_using_pattern_category_map_{matrix_state}",
+            ):
+                categorization_engine.categorize_data_using_pattern_category_map(
+                    transactions_to_categorize
+                )
+            categorization_engine.pattern_match_matrix.save(
+                transactions_to_categorize["note"], pattern_index
+            )
+        with measure(measurements, "save_categorized_transactions"):
+            categorization_engine.save_categorized_transactions(
+                transactions_to_categorize
+            )
+
+        analytics_engine = container.analytics_engine()
+        with measure(measurements, "analyze_categorized_transactions"):
+            with contextlib.redirect_stdout(io.StringIO()):
+                analytics_engine.load_categorized_transactions()
+                analytics_engine.analyze_categorized_transactions()
+    return measurements
+
+
+def run_benchmark(num_rows: int, num_patterns: int, storage_format: str) -> list:
+    """Times the stages in an untraced run and measures their peak memory in a
+    separate traced run"""
+    parameters = {
+        "rows": num_rows,
+        "patterns": num_patterns,
+        "storage_format": storage_format,
+    }
+    stage_seconds = run_stages(num_rows, num_patterns, storage_format, measure_time)
+    stage_peak_memory_bytes = run_stages(
+        num_rows, num_patterns, storage_format, measure_peak_memory
+    )
+    results = []
+    for stage, seconds in stage_seconds.items():
+        peak_memory_bytes = stage_peak_memory_bytes[stage]
+        results.append(
+            {
+                "stage": stage,
+                **parameters,
+                "seconds": seconds,
+                "peak_memory_bytes": peak_memory_bytes,
+            }
+        )
+        print(
+            f"{stage} {parameters}: {seconds:.3f}s, "
+            f"peak memory {peak_memory_bytes / 2**20:.1f}MiB"
+        )
+    return results
+
+
+def get_git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare_results(previous_results_file_path: str, results: list) -> None:
+    """Prints the stages that got slower or use more memory than in the previous
+    results file"""
+    with open(previous_results_file_path) as f:
+        previous_results = json.load(f)["results"]
+
+    def get_key(result):
+        return tuple(
+            v for k, v in result.items() if k not in ["seconds", "peak_memory_bytes"]
+        )
+
+    previous_results = {get_key(result): result for result in previous_results}
+    for result in results:
+        previous_result = previous_results.get(get_key(result))
+        if previous_result is None:
+            continue
+        for metric in ["seconds", "peak_memory_bytes"]:
+            change = result[metric] / max(previous_result[metric], 1e-9) - 1
+            if change > REGRESSION_THRESHOLD:
+                print(f"REGRESSION {get_key(result)} {metric}: {change:+.0%}")
+
+
+if __name__ == "__main__":
+    argument_parser = argparse.ArgumentParser()
+    argument_parser.add_argument(
+        "--rows", type=int, nargs="+", default=[1000, 100000], help="e.g. 1000000"
+    )
+    argument_parser.add_argument("--patterns", type=int, nargs="+", default=[10, 10000])
+    argument_parser.add_argument(
+        "--storage-formats", nargs="+", default=["csv"], help="csv, parquet, feather"
+    )
+    argument_parser.add_argument("--output", default="benchmark_results.json")
+    argument_parser.add_argument("--compare", help="previous results file")
+    arguments = argument_parser.parse_args()
+
+    results = []
+    for num_rows in arguments.rows:
+        for num_patterns in arguments.patterns:
+            for storage_format in arguments.storage_formats:
+                results += run_benchmark(num_rows, num_patterns, storage_format)
+    with open(arguments.output, "w") as f:
+        json.dump(
+            {
+                "commit": get_git_commit(),
+                "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "pandas": pd.__version__,
+                "results": results,
+            },
+            f,
+            indent=2,
+        )
+    print(f"Results written to {arguments.output}")
+    if arguments.compare is not None:
+        compare_results(arguments.compare, results)
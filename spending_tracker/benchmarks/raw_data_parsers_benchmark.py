@@ -0,0 +1,174 @@
+"""Times the vectorized account parsers of RawDataProcessingEngine against the
+previous row by row implementation and checks that both produce the same output.
+
+Run with `python3 -m spending_tracker.benchmarks.raw_data_parsers_benchmark`
+"""
+import argparse
+import hashlib
+import tempfile
+import time
+
+import dateutil
+import numpy as np
+import pandas as pd
+import yaml
+
+from spending_tracker.benchmarks.synthetic_data import generate_raw_data
+from spending_tracker.engines.data_validation_engine import DataValidationEngine
+from spending_tracker.engines.raw_data_processing_engine import RawDataProcessingEngine
+from spending_tracker.storage.processed_transaction_store import (
+    ProcessedTransactionStore,
+)
+from spending_tracker.storage.transaction_storage import CsvTransactionStorage
+from spending_tracker.utils.transaction_ids import LEGACY_TRANSACTION_ID_SCHEME
+
+
+class RowByRowRawDataProcessingEngine(RawDataProcessingEngine):
+
+    """Reference implementation of the account methods as they were before
+    vectorization: dateutil parsing, apply(lambda) and row-wise merges"""
+
+    @staticmethod
+    def add_note_and_id_columns_row_by_row(raw_data):
+        raw_data["datetime"] = raw_data["datetime"].apply(
+            lambda datetime_string: dateutil.parser.parse(datetime_string)
+        )
+        raw_data["note"] = raw_data["account"] + "_" + raw_data["note"]
+        raw_data["note"] = raw_data["note"].apply(lambda s: s.replace(",", "."))
+        raw_data["id"] = raw_data.apply(
+            lambda row: hashlib.sha256(str(row.values).encode("utf-8")).hexdigest()[
+                0:30
+            ],
+            axis=1,
+        )
+        return raw_data
+
+    def amex_blue_cash_preferred_2022_1(
+        self, raw_data, raw_data_file_path, raw_data_file_name
+    ):
+        raw_data = raw_data.loc[:, ("Date", "Amount", "Description", "account")]
+        raw_data.columns = ["datetime", "amount", "note", "account"]
+        raw_data["third_party_category"] = None
+        raw_data = raw_data[
+            ["datetime", "amount", "account", "third_party_category", "note"]
+        ]
+        return self.add_note_and_id_columns_row_by_row(raw_data)
+
+    def citi_double_cash_2022_1(self, raw_data, raw_data_file_path, raw_data_file_name):
+        def merge_debit_credit_columns(row):
+            if np.isnan(row["Debit"]):
+                return row["Credit"]
+            else:
+                return row["Debit"]
+
+        raw_data["amount"] = raw_data.apply(
+            lambda row: merge_debit_credit_columns(row), axis=1
+        )
+        raw_data = raw_data.loc[:, ("Date", "amount", "Description", "account")]
+        raw_data.columns = ["datetime", "amount", "note", "account"]
+        raw_data.loc[:, "third_party_category"] = None
+        raw_data = raw_data[
+            ["datetime", "amount", "account", "third_party_category", "note"]
+        ]
+        return self.add_note_and_id_columns_row_by_row(raw_data)
+
+    def chase_freedom_unlimited_2022_1(
+        self, raw_data, raw_data_file_path, raw_data_file_name
+    ):
+        raw_data = raw_data.loc[
+            :, ("Post Date", "Description", "Category", "Amount", "account")
+        ]
+        raw_data.columns = [
+            "datetime",
+            "note",
+            "third_party_category",
+            "amount",
+            "account",
+        ]
+        raw_data["amount"] = raw_data["amount"].apply(lambda x: -x)
+        raw_data = raw_data[
+            ["datetime", "amount", "account", "third_party_category", "note"]
+        ]
+        return self.add_note_and_id_columns_row_by_row(raw_data)
+
+    def chase_debit_2022_1(self, raw_data, raw_data_file_path, raw_data_file_name):
+        raw_data = raw_data.loc[:, ("Posting Date", "Amount", "Description", "account")]
+        raw_data.columns = ["datetime", "amount", "note", "account"]
+        raw_data["amount"] = raw_data["amount"].apply(lambda x: -x)
+        raw_data["third_party_category"] = None
+        raw_data = raw_data[
+            ["datetime", "amount", "account", "third_party_category", "note"]
+        ]
+        return self.add_note_and_id_columns_row_by_row(raw_data)
+
+    def amazon_2023_1(self, raw_data, raw_data_file_path, raw_data_file_name):
+        if raw_data.iloc[-1][0] == "order id":  # fix error in this format
+            raw_data = raw_data.drop(raw_data.index[-1])
+        raw_data["amount"] = (
+            raw_data["total"].astype(float)
+            + raw_data["gift"].astype(float)
+            - raw_data["refund"].astype(float)
+        )
+        raw_data = raw_data.loc[:, ("date", "amount", "items", "account")]
+        raw_data.columns = ["datetime", "amount", "note", "account"]
+        raw_data["third_party_category"] = None
+        raw_data = raw_data[
+            ["datetime", "amount", "account", "third_party_category", "note"]
+        ]
+        return self.add_note_and_id_columns_row_by_row(raw_data)
+
+
+BENCHMARKED_ACCOUNTS = [
+    "amex_blue_cash_preferred_2022_1",
+    "citi_double_cash_2022_1",
+    "chase_freedom_unlimited_2022_1",
+    "chase_debit_2022_1",
+    "amazon_2023_1",
+]
+
+
+def time_account_method(engine, account, raw_data) -> tuple[pd.DataFrame, float]:
+    start = time.perf_counter()
+    processed_data = getattr(engine, account)(raw_data.copy(), None, None)
+    return processed_data, time.perf_counter() - start
+
+
+def run_benchmark(num_rows: int) -> None:
+    with open("./spending_tracker/config.yaml") as config_file:
+        supported_accounts = yaml.safe_load(config_file)["supported_accounts"]
+    data_validation_engine = DataValidationEngine(supported_accounts)
+    with tempfile.TemporaryDirectory() as root_data_folder_path:
+        engine = RawDataProcessingEngine(
+            data_validation_engine,
+            root_data_folder_path,
+            supported_accounts,
+            LEGACY_TRANSACTION_ID_SCHEME,
+            1,
+            ProcessedTransactionStore(root_data_folder_path, CsvTransactionStorage()),
+        )
+        row_by_row_engine = RowByRowRawDataProcessingEngine(
+            data_validation_engine,
+            root_data_folder_path,
+            supported_accounts,
+            LEGACY_TRANSACTION_ID_SCHEME,
+            1,
+            ProcessedTransactionStore(root_data_folder_path, CsvTransactionStorage()),
+        )
+        for account in BENCHMARKED_ACCOUNTS:
+            raw_data = generate_raw_data(account, num_rows, "2018-01-01", "2022-12-31")
+            raw_data["account"] = account
+            processed_data, seconds = time_account_method(engine, account, raw_data)
+            row_by_row_processed_data, row_by_row_seconds = time_account_method(
+                row_by_row_engine, account, raw_data
+            )
+            pd.testing.assert_frame_equal(processed_data, row_by_row_processed_data)
+            print(
+                f"{account}: {num_rows} rows, vectorized {seconds:.3f}s, "
+                f"row by row {row_by_row_seconds:.3f}s, identical output"
+            )
+
+
+if __name__ == "__main__":
+    argument_parser = argparse.ArgumentParser()
+    argument_parser.add_argument("--rows", type=int, default=100000)
+    run_benchmark(argument_parser.parse_args().rows)
@@ -0,0 +1,156 @@
+import numpy as np
+import pandas as pd
+
+MERCHANTS = [
+    "NETFLIX.COM",
+    "AMZN Mktp US*2K4HB1",
+    "UBER   *TRIP",
+    "UBER   *EATS",
+    "COSTCO WHSE #0001",
+    "SHELL OIL 57444",
+    "TRADER JOE'S #552",
+    "SPOTIFY USA",
+    "WHOLEFDS MKT 10234",
+    "STARBUCKS STORE 0421, SEATTLE",
+    "DELTA AIR LINES",
+    "CITY OF SEATTLE PARKING",
+]
+
+
+def generate_dates(num_rows: int, from_date: str, to_date: str, rng) -> pd.Series:
+    days = pd.date_range(from_date, to_date, freq="D")
+    return pd.Series(days[rng.integers(0, len(days), num_rows)]).sort_values(
+        ignore_index=True
+    )
+
+
+def generate_notes(num_rows: int, rng, merchants=MERCHANTS) -> np.ndarray:
+    merchants = np.array(merchants, dtype=object)
+    return merchants[rng.integers(0, len(merchants), num_rows)]
+
+
+def generate_amounts(num_rows: int, rng, unique_amounts: bool = False) -> np.ndarray:
+    if unique_amounts:
+        # distinct amounts make every row, hence every transaction id, unique
+        cents = rng.choice(max(10**7, num_rows), num_rows, replace=False) + 100
+        return cents / 100
+    return rng.integers(100, 50000, num_rows) / 100
+
+
+def generate_merchants(num_merchants: int) -> list[str]:
+    """Merchant names `VENDOR00042 STORE #42`, matched by generate_pattern_set's
+    patterns"""
+    return [f"VENDOR{i:05d} STORE #{i % 1000}" for i in range(num_merchants)]
+
+
+def generate_pattern_set(num_patterns: int) -> list[tuple[str, str]]:
+    """(pattern, category) pairs, pattern i matches merchant i of
+    generate_merchants. Mixes plain literals with regexes that have a literal
+    prefix or none at all, and nested categories"""
+    pattern_category_map_list = []
+    for i in range(num_patterns):
+        if i % 10 == 8:
+            pattern = f"vendor{i:05d} (store|shop)"
+        elif i % 10 == 9:
+            pattern = f"vend[o0]r{i:05d}"
+        else:
+            pattern = f"vendor{i:05d}"
+        category = f"category_{i % 20}/subcategory_{i % 7}"
+        pattern_category_map_list.append((pattern, category))
+    return pattern_category_map_list
+
+
+def generate_raw_data(
+    account: str,
+    num_rows: int,
+    from_date: str,
+    to_date: str,
+    seed: int = 0,
+    merchants=MERCHANTS,
+    unique_amounts: bool = False,
+) -> pd.DataFrame:
+    """Generates a raw export for account with the columns listed in config.yaml"""
+    rng = np.random.default_rng(seed)
+    dates = generate_dates(num_rows, from_date, to_date, rng)
+    notes = generate_notes(num_rows, rng, merchants)
+    amounts = generate_amounts(num_rows, rng, unique_amounts)
+    if account in ("citi_double_cash_2022_1", "citi_custom_cash_2022_1"):
+        is_credit = rng.random(num_rows) < 0.1
+        return pd.DataFrame(
+            {
+                "Status": "Cleared",
+                "Date": dates.dt.strftime("%m/%d/%Y"),
+                "Description": notes,
+                "Debit": np.where(is_credit, np.nan, amounts),
+                "Credit": np.where(is_credit, -amounts, np.nan),
+            }
+        )
+    if account == "amex_blue_cash_preferred_2022_1":
+        return pd.DataFrame(
+            {
+                "Date": dates.dt.strftime("%m/%d/%Y"),
+                "Description": notes,
+                "Card Member": "JANE DOE",
+                "Account #": -41004,
+                "Amount": amounts,
+            }
+        )
+    if account in ("chase_freedom_unlimited_2022_1", "chase_amazon_visa_2022_1"):
+        return pd.DataFrame(
+            {
+                "Transaction Date": dates.dt.strftime("%m/%d/%Y"),
+                "Post Date": dates.dt.strftime("%m/%d/%Y"),
+                "Description": notes,
+                "Category": "Shopping",
+                "Type": "Sale",
+                "Amount": -amounts,
+                "Memo": np.nan,
+            }
+        )
+    if account == "chase_debit_2022_1":
+        return pd.DataFrame(
+            {
+                "Details": "DEBIT",
+                "Posting Date": dates.dt.strftime("%m/%d/%Y"),
+                "Description": notes,
+                "Amount": -amounts,
+                "Type": "DEBIT_CARD",
+                "Balance": 1000.0,
+                "Check or Slip #": np.nan,
+            }
+        )
+    if account == "amazon_2023_1":
+        return pd.DataFrame(
+            {
+                "order id": [f"113-{i:07d}-0000000" for i in range(num_rows)],
+                "items": notes,
+                "to": "Jane Doe",
+                "date": dates.dt.strftime("%Y-%m-%d"),
+                "total": amounts,
+                "shipping": 0.0,
+                "shipping_refund": 0.0,
+                "gift": 0.0,
+                "tax": 0.0,
+                "refund": 0.0,
+                "payments": "Visa ending in 0000",
+            }
+        )
+    raise ValueError(f"No synthetic data generator for account {account}")
+
+
+def write_raw_data_file(
+    raw_data_folder_path: str,
+    account: str,
+    num_rows: int,
+    from_date: str = "2020-01-01",
+    to_date: str = "2022-12-31",
+    seed: int = 0,
+    merchants=MERCHANTS,
+    unique_amounts: bool = False,
+) -> str:
+    """Writes a synthetic raw file named like a real download, returns its name"""
+    raw_data_file_name = f"{from_date}_to_{to_date}_{account}.csv"
+    generate_raw_data(
+        account, num_rows, from_date, to_date, seed, merchants, unique_amounts
+    ).to_csv(raw_data_folder_path.rstrip("/") + "/" + raw_data_file_name, index=False)
+    return raw_data_file_name
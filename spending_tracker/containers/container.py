@@ -4,6 +4,13 @@ from spending_tracker.engines.analytics_engine import AnalyticsEngine
 from spending_tracker.engines.categorization_engine import CategorizationEngine
 from spending_tracker.engines.data_validation_engine import DataValidationEngine
 from spending_tracker.engines.raw_data_processing_engine import RawDataProcessingEngine
+from spending_tracker.storage.categorization_journal import CategorizationJournal
+from spending_tracker.storage.pattern_match_matrix import PatternMatchMatrix
+from spending_tracker.storage.processed_transaction_store import (
+    ProcessedTransactionStore,
+)
+from spending_tracker.storage.transaction_storage import create_transaction_storage
+from spending_tracker.utils.stage_profiler import StageProfiler
 
 
 class Container(containers.DeclarativeContainer):
@@ -11,23 +18,68 @@ class Container(containers.DeclarativeContainer):
 
     config = providers.Configuration()
 
+    stage_profiler = providers.Singleton(StageProfiler, enabled=config.profile)
+
+    transaction_storage = providers.Singleton(
+        create_transaction_storage,
+        storage_format=config.storage_format,
+    )
+    processed_transaction_store = providers.Singleton(
+        ProcessedTransactionStore,
+        root_data_folder_path=config.root_data_folder_path,
+        transaction_storage=transaction_storage,
+    )
+    categorization_journal = providers.Singleton(
+        CategorizationJournal,
+        root_data_folder_path=config.root_data_folder_path,
+    )
+    pattern_match_matrix = providers.Singleton(
+        PatternMatchMatrix,
+        root_data_folder_path=config.root_data_folder_path,
+    )
     data_validation_engine = providers.Singleton(
-        DataValidationEngine,
-        supported_accounts=config.supported_accounts,
+        stage_profiler.provided.instrument.call(
+            providers.Factory(
+                DataValidationEngine,
+                supported_accounts=config.supported_accounts,
+            )
+        )
     )
     raw_data_processing_engine = providers.Singleton(
-        RawDataProcessingEngine,
-        root_data_folder_path=config.root_data_folder_path,
-        supported_accounts=config.supported_accounts,
-        data_validation_engine=data_validation_engine,
+        stage_profiler.provided.instrument.call(
+            providers.Factory(
+                RawDataProcessingEngine,
+                root_data_folder_path=config.root_data_folder_path,
+                supported_accounts=config.supported_accounts,
+                transaction_id_scheme=config.transaction_id_scheme,
+                raw_data_processing_workers=config.raw_data_processing_workers,
+                processed_transaction_store=processed_transaction_store,
+                data_validation_engine=data_validation_engine,
+                raw_data_chunk_size=config.raw_data_chunk_size,
+            )
+        )
     )
     categorization_engine = providers.Singleton(
-        CategorizationEngine,
-        root_data_folder_path=config.root_data_folder_path,
-        data_validation_engine=data_validation_engine,
+        stage_profiler.provided.instrument.call(
+            providers.Factory(
+                CategorizationEngine,
+                root_data_folder_path=config.root_data_folder_path,
+                transaction_storage=transaction_storage,
+                processed_transaction_store=processed_transaction_store,
+                data_validation_engine=data_validation_engine,
+                categorization_journal=categorization_journal,
+                pattern_match_matrix=pattern_match_matrix,
+                tui_page_size=config.tui_page_size,
+            )
+        )
     )
     analytics_engine = providers.Singleton(
-        AnalyticsEngine,
-        root_data_folder_path=config.root_data_folder_path,
-        data_validation_engine=data_validation_engine,
+        stage_profiler.provided.instrument.call(
+            providers.Factory(
+                AnalyticsEngine,
+                root_data_folder_path=config.root_data_folder_path,
+                transaction_storage=transaction_storage,
+                data_validation_engine=data_validation_engine,
+            )
+        )
     )
@@ -1,35 +1,121 @@
+import json
+import os
+
+import numpy as np
 import pandas as pd
 
+from spending_tracker.analytics.spending_cubes import SpendingCubes
 from spending_tracker.engines.data_validation_engine import DataValidationEngine
+from spending_tracker.utils.amounts import convert_amounts_to_cents
+from spending_tracker.utils.compact_dtypes import compact_transactions
 
 
 class AnalyticsEngine:
     def __init__(
-        self, root_data_folder_path: str, data_validation_engine: DataValidationEngine
+        self,
+        root_data_folder_path: str,
+        transaction_storage,
+        data_validation_engine: DataValidationEngine,
     ):
         self.root_data_folder_path = root_data_folder_path.rstrip("/") + "/"
+        self.transaction_storage = transaction_storage
         self.categorized_transactions_file_path = (
-            self.root_data_folder_path + "categorized_transactions.csv"
+            self.root_data_folder_path
+            + "categorized_transactions"
+            + self.transaction_storage.file_extension
         )
         self.data_validation_engine = data_validation_engine
+        self.spending_cubes_file_path = (
+            self.root_data_folder_path + "spending_cubes.npz"
+        )
 
     def load_categorized_transactions(self) -> None:
-        """Loads categorized transactions and sets as a class attribute"""
-        self.categorized_transactions = pd.read_csv(
-            self.categorized_transactions_file_path, parse_dates=["datetime"]
+        """Loads the spending cubes cached by the previous run and, only if the
+        categorized transactions changed since, reads them to update the cubes"""
+        file_stat = os.stat(self.categorized_transactions_file_path)
+        file_signature = [file_stat.st_size, file_stat.st_mtime_ns]
+        cached_file_signature, self.spending_cubes = self.load_spending_cubes()
+        self.categorized_transactions = None
+        if cached_file_signature == file_signature:
+            return
+        self.categorized_transactions = compact_transactions(
+            convert_amounts_to_cents(
+                self.transaction_storage.read(self.categorized_transactions_file_path)
+            )
         )
+        self.spending_cubes.update(self.categorized_transactions)
+        self.save_spending_cubes(file_signature)
+
+    def load_spending_cubes(self) -> tuple:
+        """Cached file signature and spending cubes, None and empty cubes if the
+        cache is missing, of another version or corrupt"""
+        try:
+            with np.load(self.spending_cubes_file_path, allow_pickle=False) as f:
+                header = json.loads(f["header"].tobytes())
+                if header["version"] != SpendingCubes.VERSION:
+                    raise ValueError("Spending cubes of another version")
+                frames = {
+                    frame_name: pd.DataFrame(
+                        {
+                            column: (
+                                pd.Series(
+                                    frame_header["text_columns"][column], dtype=object
+                                )
+                                if column in frame_header["text_columns"]
+                                else f[f"{frame_name}.{column}"]
+                            )
+                            for column in frame_header["columns"]
+                        }
+                    )
+                    for frame_name, frame_header in header["frames"].items()
+                }
+            return header["file_signature"], SpendingCubes.from_frames(frames)
+        except Exception:  # missing, incompatible or corrupt cache
+            return None, SpendingCubes()
+
+    def save_spending_cubes(self, file_signature: list) -> None:
+        """Saved as npz arrays rather than pickled: int64 columns as arrays, text
+        columns (which hold missing values) in a JSON header"""
+        header = {
+            "version": SpendingCubes.VERSION,
+            "file_signature": file_signature,
+            "frames": {},
+        }
+        arrays = {}
+        for frame_name, frame in self.spending_cubes.get_frames().items():
+            frame_header = {"columns": list(frame.columns), "text_columns": {}}
+            for column in frame.columns:
+                if frame[column].dtype == "int64":
+                    arrays[f"{frame_name}.{column}"] = frame[column].to_numpy()
+                else:
+                    frame_header["text_columns"][column] = [
+                        None if pd.isna(value) else value
+                        for value in frame[column].astype(object)
+                    ]
+            header["frames"][frame_name] = frame_header
+        temporary_file_path = self.spending_cubes_file_path + ".tmp"
+        with open(temporary_file_path, "wb") as f:
+            np.savez(
+                f,
+                header=np.frombuffer(json.dumps(header).encode(), "uint8"),
+                **arrays,
+            )
+        os.replace(temporary_file_path, self.spending_cubes_file_path)
 
     def analyze_categorized_transactions(self) -> tuple:
         """Run analyses on finalized user categorized expenses"""
+        spend_amount_by_category = self.spending_cubes.get_spend_amount_by_category()
         self.data_validation_engine.verify_spend_amount_for_mapped_categories(
-            self.categorized_transactions
-        )
-        spend_amount_by_category = (
-            self.categorized_transactions.groupby(by=["category"], dropna=False)[
-                "amount"
-            ]
-            .sum()
-            .sort_values(ascending=False)
+            spend_amount_by_category
         )
-        print(spend_amount_by_category)
-        return {"spend_amount_by_category": spend_amount_by_category}
+        analyses = {
+            "spend_amount_by_category": spend_amount_by_category,
+            "category_rollup": self.spending_cubes.get_category_rollup(),
+            "account_totals": self.spending_cubes.get_account_totals(),
+            "monthly_trend": self.spending_cubes.get_monthly_trend(),
+            "top_merchants": self.spending_cubes.get_top_merchants(),
+        }
+        for name, analysis in analyses.items():
+            print(f"\n      ***** {name.replace('_', ' ').capitalize()} ******\n")
+            print(analysis)
+        return analyses
@@ -1,13 +1,42 @@
-import glob
 import pprint
 import cmd
 import os
 import re
-from copy import deepcopy
+import shutil
+import time
 
+try:
+    import readline
+except ImportError:  # not available on Windows, no tab completion then
+    readline = None
+
+import numpy as np
 import pandas as pd
 
 from spending_tracker.engines.data_validation_engine import DataValidationEngine
+from spending_tracker.indexes.category_tree import CategoryTree
+from spending_tracker.indexes.pattern_registry import PatternRegistry
+from spending_tracker.indexes.token_index import TokenIndex
+from spending_tracker.indexes.trigram_index import TrigramIndex
+from spending_tracker.storage.categorization_journal import CategorizationJournal
+from spending_tracker.storage.pattern_match_matrix import PatternMatchMatrix
+from spending_tracker.storage.processed_transaction_store import (
+    ProcessedTransactionStore,
+)
+from spending_tracker.tui.transactions_window import TransactionsWindow
+from spending_tracker.utils.amounts import convert_amounts_to_cents, format_cents
+from spending_tracker.utils.compact_dtypes import (
+    compact_transactions,
+    get_memory_report,
+    set_column_values,
+)
+from spending_tracker.utils.transaction_ids import (
+    LEGACY_TRANSACTION_ID_SCHEME,
+    generate_transaction_ids,
+)
+
+# columns searched with `/<text>` in the TUI
+SEARCHED_COLUMNS = ["note", "account", "third_party_category", "category"]
 
 
 class CategorizationEngine:
@@ -19,25 +48,54 @@ class CategorizationEngine:
     """
 
     def __init__(
-        self, root_data_folder_path: str, data_validation_engine: DataValidationEngine
+        self,
+        root_data_folder_path: str,
+        transaction_storage,
+        processed_transaction_store: ProcessedTransactionStore,
+        data_validation_engine: DataValidationEngine,
+        categorization_journal: CategorizationJournal,
+        pattern_match_matrix: PatternMatchMatrix,
+        tui_page_size: int = 50,
     ):
         self.root_data_folder_path = root_data_folder_path.rstrip("/") + "/"
         self.processed_data_folder_path = self.root_data_folder_path + "processed/"
+        self.transaction_storage = transaction_storage
+        self.processed_transaction_store = processed_transaction_store
         self.data_validation_engine = data_validation_engine
+        self.categorization_journal = categorization_journal
+        self.pattern_match_matrix = pattern_match_matrix
         self.historical_categorized_transactions_file_path = (
+            self.root_data_folder_path
+            + "categorized_transactions"
+            + self.transaction_storage.file_extension
+        )
+        # csv bridge for users editing categorized transactions by hand
+        self.historical_categorized_transactions_csv_file_path = (
             self.root_data_folder_path + "categorized_transactions.csv"
         )
         # print options
-        self.terminal_size = os.get_terminal_size()
+        self.tui_page_size = tui_page_size
+
+    @property
+    def terminal_size(self) -> os.terminal_size:
+        """Looked up when printing, falls back to 80x24 when not run in a terminal"""
+        return shutil.get_terminal_size()
 
     def load_historical_categorized_transactions(self) -> pd.DataFrame:
         """Load user-categorized transactions from previous runs"""
+        if os.path.isfile(
+            self.historical_categorized_transactions_file_path
+        ) is False and os.path.isfile(
+            self.historical_categorized_transactions_csv_file_path
+        ):
+            # first run after switching to a binary storage format
+            self.import_categorized_transactions_from_csv()
         if os.path.isfile(self.historical_categorized_transactions_file_path) is False:
             historical_categorized_transactions = pd.DataFrame(
                 columns=[
                     "id",
                     "datetime",
-                    "amount",
+                    "amount_cents",
                     "account",
                     "third_party_category",
                     "note",
@@ -46,47 +104,35 @@ class CategorizationEngine:
                 ]
             )
         else:
-            historical_categorized_transactions = pd.read_csv(
-                self.historical_categorized_transactions_file_path,
-                parse_dates=["datetime"],
+            historical_categorized_transactions = convert_amounts_to_cents(
+                self.transaction_storage.read(
+                    self.historical_categorized_transactions_file_path
+                )
             )
         # validate columns
         self.data_validation_engine.verify_categorized_transactions_columns(
             historical_categorized_transactions
         )
-        # make sure all categories are valid strings in historical file
-        historical_categorized_transactions["category"].apply(
-            lambda category: self.data_validation_engine.verify_category_format(
-                category
-            )
-        )
         # make sure no duplicate ids (transactions) in historical data
         self.data_validation_engine.verify_no_duplicate_ids(
             historical_categorized_transactions
         )
-        # make sure pattern matches note in historical data
-        historical_categorized_transactions.apply(
-            lambda row: self.data_validation_engine.verify_pattern_matches_text(
-                row["pattern"], row["note"]
-            ),
-            axis=1,
+        # make sure all categories are valid strings and patterns match notes
+        self.data_validation_engine.verify_historical_categorized_transactions(
+            historical_categorized_transactions
         )
         return historical_categorized_transactions
 
     def get_all_patterns_categories_from_historical_categorized_transactions(
         self, historical_categorized_transactions: pd.DataFrame
-    ) -> tuple[list, dict, list, list]:
+    ) -> tuple[PatternRegistry, list, list]:
         """Extracts patterns and categories and returns in multiple formats"""
         pattern_category_map_list = list(
-            set(
-                [
-                    (row["pattern"], row["category"])
-                    for index, row in historical_categorized_transactions.iterrows()
-                    if not pd.isna(row["pattern"])
-                ]
-            )
+            historical_categorized_transactions[["pattern", "category"]]
+            .dropna(subset=["pattern"])
+            .drop_duplicates()
+            .itertuples(index=False, name=None)
         )
-        pattern_category_map_dict = dict(pattern_category_map_list)
         all_categories = [
             i
             for i in historical_categorized_transactions["category"].unique()
@@ -102,8 +148,7 @@ class CategorizationEngine:
             pattern_category_map_list
         )
         return (
-            pattern_category_map_list,
-            pattern_category_map_dict,
+            PatternRegistry(pattern_category_map_list),
             all_categories,
             all_patterns,
         )
@@ -115,61 +160,68 @@ class CategorizationEngine:
         self.data_validation_engine.verify_processed_data_folder_path_not_empty(
             self.processed_data_folder_path
         )
-        # get processed data file names
-        processed_data_file_paths = glob.glob(
-            os.path.join(self.processed_data_folder_path, "*.[cC][sS][vV]")
-        )
-        # load all processed data
-        df_list = []
-        for processed_data_file_path in processed_data_file_paths:
-            df = pd.read_csv(
-                processed_data_file_path,
-                index_col=None,
-                header=0,
-                parse_dates=["datetime"],
-            )
-            df_list.append(df)
-        processed_data = pd.concat(df_list, axis=0, ignore_index=True)
-        # make sure no duplicate ids in processed data
-        self.data_validation_engine.verify_no_duplicate_ids(processed_data)
-        return processed_data
+        # ids are checked for duplicates when appended to the store
+        return self.processed_transaction_store.load()
 
     def categorize_data_using_pattern_category_map(
         self, data: pd.DataFrame, indices=None
     ) -> None:
-        """Uses patterns user created from seen data to categorize new transactions"""
+        """Uses patterns user created from seen data to categorize new transactions.
+        Matches are looked up in the pattern match matrix, only notes it doesn't
+        have yet are matched"""
         if indices is None:
             indices = data.index
-        data.loc[indices, "pattern"] = data.loc[indices, "note"].apply(
-            lambda text: self.get_longest_pattern_that_matches_text(
-                text, self.pattern_category_map_list
-            )
+        patterns = self.pattern_match_matrix.find_longest_matching_patterns(
+            data.loc[indices, "note"], self.pattern_registry.pattern_index
         )
-        data.loc[indices, "category"] = data.loc[indices, "pattern"].apply(
-            lambda pattern: self.get_category_from_pattern(
-                pattern, self.pattern_category_map_dict
+        set_column_values(data, indices, "pattern", patterns)
+        set_column_values(
+            data, indices, "category", patterns.apply(self.get_category_from_pattern)
+        )
+
+    def categorize_data_using_new_pattern(
+        self, data: pd.DataFrame, pattern: str, indices=None
+    ) -> pd.Index:
+        """Tests only a newly added pattern against data and takes it over wherever
+        it matches and is longer than the currently matched pattern. Equivalent to
+        re-running all patterns, since the other patterns' results can't change.
+        Returns the indices of the updated rows"""
+        if indices is None:
+            indices = data.index
+        selected_data = data.loc[indices, ["note", "pattern"]]
+        new_pattern_matches = self.pattern_match_matrix.find_matching_notes(
+            pattern, selected_data["note"]
+        )
+        current_pattern_lengths = (
+            selected_data["pattern"]
+            .astype(object)
+            .apply(
+                lambda current_pattern: len(current_pattern)
+                if pd.notna(current_pattern)
+                else -1
             )
         )
+        indices_to_update = selected_data.index[
+            new_pattern_matches & (current_pattern_lengths < len(pattern))
+        ]
+        set_column_values(data, indices_to_update, "pattern", pattern)
+        set_column_values(
+            data,
+            indices_to_update,
+            "category",
+            self.pattern_registry.get_category(pattern),
+        )
+        return indices_to_update
 
-    def get_longest_pattern_that_matches_text(
-        self, text, pattern_category_map_list
-    ) -> str:
+    def get_longest_pattern_that_matches_text(self, text) -> str:
         """Returns longest pattern that matches text"""
-        matched_patterns = []
-        for pattern, _ in pattern_category_map_list:
-            if re.compile(pattern).search(text.lower()) is not None:
-                matched_patterns.append(pattern)
-        if len(matched_patterns) == 0:
-            return
-        return max(matched_patterns, key=len)
+        return self.pattern_registry.pattern_index.find_longest_matching_pattern(text)
 
-    def get_category_from_pattern(
-        self, pattern: str, pattern_category_map_dict: dict
-    ) -> str:
+    def get_category_from_pattern(self, pattern: str) -> str:
         if pattern is None:
             return None
         else:
-            return pattern_category_map_dict[pattern]
+            return self.pattern_registry.get_category(pattern)
 
     def load_data_to_categorize(self) -> None:
         """Loads and sets as class attributes the transactions to categorize by user,
@@ -180,17 +232,21 @@ class CategorizationEngine:
         )
         # get mapped patterns & categories from historically categorized data
         (
-            self.pattern_category_map_list,
-            self.pattern_category_map_dict,
+            self.pattern_registry,
             self.all_categories,
             self.all_patterns,
         ) = self.get_all_patterns_categories_from_historical_categorized_transactions(
             historical_categorized_transactions
         )
+        # category hierarchy for completion in the category prompt
+        self.category_tree = CategoryTree(self.all_categories)
         # load processed data
         processed_data = self.load_processed_data()
         # categorize processed data using historically created patterns
         self.categorize_data_using_pattern_category_map(processed_data)
+        self.pattern_match_matrix.save(
+            processed_data["note"], self.pattern_registry.pattern_index
+        )
         # make sure no missing rows from processed data
         self.data_validation_engine.verify_all_historical_categorized_transactions_accounted_for_in_processed_data(
             historical_categorized_transactions, processed_data
@@ -203,35 +259,49 @@ class CategorizationEngine:
         # concatenate new uncategorized processed data with historical categorized data
         unseen_processed_data["seen"] = False
         historical_categorized_transactions["seen"] = True
-        self.transactions_to_categorize = pd.concat(
-            [unseen_processed_data, historical_categorized_transactions],
-            axis=0,
-            ignore_index=True,
-        ).sort_values(by=["datetime", "amount", "note", "id"])
+        self.transactions_to_categorize = compact_transactions(
+            pd.concat(
+                [unseen_processed_data, historical_categorized_transactions],
+                axis=0,
+                ignore_index=True,
+            ).sort_values(by=["datetime", "amount_cents", "note", "id"])
+        )
         self.transactions_to_categorize.index = range(
             len(self.transactions_to_categorize) - 1, -1, -1
         )
+        # built on the first pattern preview
+        self.note_trigram_index = None
         # make sure no ids are duplicated
         self.data_validation_engine.verify_no_duplicate_ids(
             self.transactions_to_categorize
         )
+        self.replay_categorization_journal()
 
     def run_categorization_TUI(self):
         """Terminal user interface prompting user to categorize new transactions"""
         # time to ask user to confirm or override
         # sort categories and patterns for visual display
+        self.transactions_window = TransactionsWindow(
+            self.transactions_to_categorize, self.tui_page_size
+        )
+        self.transaction_search_index = TokenIndex(
+            self.transactions_to_categorize, SEARCHED_COLUMNS
+        )
+        self.search_results = self.transactions_to_categorize.index[:0]
         transaction_index = -1
         while True:
             # sort categories and patterns alphabetically
             self.all_categories.sort()
             self.all_patterns.sort()
-            # print transactions to categorize in readable format
+            # print page of transactions around the last one in readable format
+            if transaction_index >= 0:
+                self.transactions_window.follow(transaction_index)
             self.print_transactions_to_categorize()
             transaction_index = self.get_user_input_for_transaction_index(
                 transaction_index
             )
             if transaction_index == -1:  # user selected Save and quit option
-                self.save_categorized_transactions(self.transactions_to_categorize)
+                self.save_transactions_to_categorize()
                 break
             # else user selected a transaction by its (dataframe) index
             self.print_transaction_details(
@@ -241,45 +311,131 @@ class CategorizationEngine:
             # prompt user for category
             inputted_category = self.get_user_input_for_category()
             if inputted_category != "":  # skip to start if user pressed Enter.
-                self.transactions_to_categorize.loc[
-                    transaction_index, "category"
-                ] = inputted_category
-                self.transactions_to_categorize.loc[
-                    transaction_index, "pattern"
-                ] = None  # clear pattern if user overrides category
-                # tag transaction as seen
-                self.transactions_to_categorize.loc[transaction_index, "seen"] = True
+                self.categorize_transaction(transaction_index, inputted_category)
                 if inputted_category != None:  # i.e. user did not clear category
-                    # set new category if doesn't exist
-                    if inputted_category not in self.all_categories:
-                        self.all_categories.append(inputted_category)
                     inputted_pattern = self.get_user_input_for_pattern(
                         self.transactions_to_categorize.loc[transaction_index],
                         inputted_category,
                     )
                     if inputted_pattern != "":  # skip to start if user pressed Enter.
-                        if (
-                            inputted_pattern,
-                            inputted_category,
-                        ) not in self.pattern_category_map_list:
-                            # if new pattern -> cat mapping, add it
-                            if inputted_pattern not in self.all_patterns:
-                                self.all_patterns.append(inputted_pattern)
-                            self.pattern_category_map_list.append(
-                                (inputted_pattern, inputted_category)
-                            )
-                            self.pattern_category_map_dict[
-                                inputted_pattern
-                            ] = inputted_category
-                            # tag the transaction with the pattern
-                            self.transactions_to_categorize.loc[
-                                transaction_index, "pattern"
-                            ] = inputted_pattern
-                            # apply all pattern including new on unseen data
-                            self.categorize_data_using_pattern_category_map(
-                                self.transactions_to_categorize,
-                                self.transactions_to_categorize["seen"] == False,
-                            )
+                        self.categorize_transaction(
+                            transaction_index, inputted_category, inputted_pattern
+                        )
+
+    def categorize_transaction(
+        self, transaction_index: int, category, pattern=None
+    ) -> None:
+        """Journals the user's edit before applying it"""
+        self.categorization_journal.append(
+            self.transactions_to_categorize.loc[transaction_index, "id"],
+            category,
+            pattern,
+        )
+        updated_indices = self.apply_categorization_edit(
+            transaction_index, category, pattern
+        )
+        self.transactions_window.invalidate(updated_indices)
+        self.transaction_search_index.update(updated_indices)
+
+    def categorize_transactions(self, transaction_indices, category) -> None:
+        """Bulk categorize_transaction without pattern, journaled in one write"""
+        self.categorization_journal.append_many(
+            self.transactions_to_categorize.loc[transaction_indices, "id"], category
+        )
+        self.apply_category(transaction_indices, category)
+        self.transactions_window.invalidate(transaction_indices)
+        self.transaction_search_index.update(transaction_indices)
+
+    def apply_category(self, transaction_indices, category) -> None:
+        """Sets the category of one or more transactions and tags them as seen"""
+        set_column_values(
+            self.transactions_to_categorize, transaction_indices, "category", category
+        )
+        set_column_values(
+            self.transactions_to_categorize, transaction_indices, "pattern", None
+        )  # clear pattern if user overrides category
+        # tag transaction as seen
+        self.transactions_to_categorize.loc[transaction_indices, "seen"] = True
+        # set new category if doesn't exist
+        if category is not None and category not in self.all_categories:
+            self.all_categories.append(category)
+            self.category_tree.add(category)
+
+    def apply_categorization_edit(
+        self, transaction_index: int, category, pattern=None
+    ) -> list:
+        """Returns the indices of the transactions whose category/pattern changed"""
+        self.apply_category(transaction_index, category)
+        if category is None:  # i.e. user cleared category
+            return [transaction_index]
+        # if new pattern -> cat mapping, add it
+        if pattern is not None and self.pattern_registry.add(pattern, category):
+            if pattern not in self.all_patterns:
+                self.all_patterns.append(pattern)
+            # tag the transaction with the pattern
+            set_column_values(
+                self.transactions_to_categorize, transaction_index, "pattern", pattern
+            )
+            # apply new pattern on unseen data
+            updated_indices = self.categorize_data_using_new_pattern(
+                self.transactions_to_categorize,
+                pattern,
+                self.transactions_to_categorize["seen"] == False,
+            )
+            return [transaction_index, *updated_indices]
+        return [transaction_index]
+
+    def verify_categorization_edit(
+        self, transaction_index: int, category, pattern=None
+    ) -> None:
+        """Same checks as the category and pattern prompts"""
+        self.data_validation_engine.verify_category_format(category)
+        if category is None or pattern is None:
+            return
+        note = self.transactions_to_categorize.loc[transaction_index, "note"]
+        if pd.isna(note):
+            raise ValueError("Pattern can't match a missing note.")
+        self.data_validation_engine.verify_pattern_matches_text(pattern, note)
+        self.pattern_registry.verify_pattern_can_map_to_category(pattern, category)
+
+    def replay_categorization_journal(self) -> None:
+        """Re-applies the edits of a previous session that weren't saved"""
+        events = self.categorization_journal.read()
+        if len(events) == 0:
+            return
+        transaction_indices = pd.Series(
+            self.transactions_to_categorize.index,
+            index=self.transactions_to_categorize["id"],
+        )
+        num_skipped_events = 0
+        for event in events:
+            if event["id"] not in transaction_indices.index:
+                num_skipped_events += 1
+                continue
+            transaction_index = transaction_indices[event["id"]]
+            try:
+                # validated before anything is applied, so a rejected edit
+                # leaves no trace
+                self.verify_categorization_edit(
+                    transaction_index, event["category"], event["pattern"]
+                )
+            except (ValueError, re.error) as e:
+                print(f"Skipping journaled edit {event}: {e}")
+                num_skipped_events += 1
+                continue
+            self.apply_categorization_edit(
+                transaction_index, event["category"], event["pattern"]
+            )
+        print(
+            f"Restored {len(events) - num_skipped_events} unsaved categorization "
+            f"edit(s) from the previous session"
+            + (
+                f" ({num_skipped_events} skipped, transaction or pattern no "
+                f"longer valid)"
+                if num_skipped_events > 0
+                else ""
+            )
+        )
 
     def get_user_input_for_transaction_index(self, last_transaction_index=-1) -> int:
         while True:
@@ -288,12 +444,28 @@ class CategorizationEngine:
                     "\nSelect row you would like to categorize, enter `s` "
                     f"to save and quit if this looks good, or press "
                     f"Enter to categorize next transaction.\n"
+                    f"(`u`/`d`: page up/down, `g <row>`: go to row, "
+                    f"`f`: toggle showing only unseen transactions, "
+                    f"`/<text>`: search, `c`: categorize all search results)\n"
                 )
+                if transaction_index[:1] in ["u", "d", "f", "g"]:
+                    self.navigate_transactions_window(transaction_index)
+                    self.print_transactions_to_categorize()
+                    continue
+                if transaction_index[:1] == "/":
+                    self.search_transactions(transaction_index[1:])
+                    continue
+                if transaction_index == "c":
+                    self.categorize_search_results()
+                    continue
                 if transaction_index == "":
-                    transaction_index = last_transaction_index + 1
-                    if transaction_index >= len(self.transactions_to_categorize):
+                    transaction_index = self.transactions_window.get_next_index(
+                        last_transaction_index
+                    )
+                    if transaction_index is None:
+                        # prompt again, -1 would save and quit
                         print("\n\n *** Reached end of list *** \n\n")
-                        return last_transaction_index
+                        continue
                 elif transaction_index == "s":
                     transaction_index = -1
                 transaction_index = int(transaction_index)
@@ -303,49 +475,60 @@ class CategorizationEngine:
                     ]  # to catch if out of bounds
                 break
             except KeyboardInterrupt:
-                print("Exiting without saving")
+                print("Exiting without saving. Edits are restored on next launch")
                 exit()
             except Exception as e:
                 print(f"\n❌❌❌❌Invalid input. Please try again. Error: {e}")
         return transaction_index
 
-    def print_transactions_to_categorize(self):
-        # truncate columns for terminal
-        transactions_to_categorize_print = self.transactions_to_categorize.copy().fillna('-')[
-            [
-                "note",
-                "category",
-                "pattern",
-                "amount",
-                "datetime",
-                "account",
-                "third_party_category",
-            ]
-        ]
-        transactions_to_categorize_print["third_party_category"] = (
-            transactions_to_categorize_print["third_party_category"]
-            .apply(lambda str_: self.truncate_string_for_print(str_, 15))
-        )
-        transactions_to_categorize_print["account"] = (
-            transactions_to_categorize_print["account"]
-            .apply(lambda str_: self.truncate_string_for_print(str_, 15))
-        )
-        transactions_to_categorize_print["pattern"] = (
-            transactions_to_categorize_print["pattern"]
-            .apply(lambda str_: self.truncate_string_for_print(str_, 15))
-        )
-        transactions_to_categorize_print["category"] = (
-            transactions_to_categorize_print["category"]
-            .apply(lambda str_: self.truncate_string_for_print(str_, 30))
+    def navigate_transactions_window(self, command: str) -> None:
+        if command == "u":
+            self.transactions_window.page_up()
+        elif command == "d":
+            self.transactions_window.page_down()
+        elif command == "f":
+            self.transactions_window.toggle_only_unseen()
+        else:  # g <row>
+            transaction_index = int(command[1:])
+            self.transactions_to_categorize.loc[
+                transaction_index
+            ]  # to catch if out of bounds
+            self.transactions_window.jump_to(transaction_index)
+
+    def search_transactions(self, query: str) -> None:
+        """Prints the transactions whose note, account, third party category or
+        category contain words starting with each word of the query"""
+        self.search_results = self.transaction_search_index.search(query)
+        num_unseen = (
+            self.transactions_to_categorize.loc[self.search_results, "seen"] == False
+        ).sum()
+        print(
+            f"\nFound {len(self.search_results)} transaction(s) ({num_unseen} "
+            f"unseen) matching **{query}**"
+            + (
+                f", showing the most recent {self.tui_page_size}"
+                if len(self.search_results) > self.tui_page_size
+                else ""
+            )
         )
-        print()
-        print(transactions_to_categorize_print)
+        if len(self.search_results) > 0:
+            shown_indices = np.sort(self.search_results)[: self.tui_page_size]
+            print(self.transactions_window.render_rows(shown_indices[::-1]))
 
-    @staticmethod
-    def truncate_string_for_print(str_, width: int) -> str:
-        if len(str_) > width:
-            str_ = str_[: width - 3] + "..."
-        return str_
+    def categorize_search_results(self) -> None:
+        if len(self.search_results) == 0:
+            print("\nNo search results to categorize, search with `/<text>` first")
+            return
+        print(f"\nCategorizing all {len(self.search_results)} search results")
+        self.print_all_categories()
+        inputted_category = self.get_user_input_for_category()
+        if inputted_category != "":  # i.e. user didn't skip
+            self.categorize_transactions(self.search_results, inputted_category)
+        self.print_transactions_to_categorize()
+
+    def print_transactions_to_categorize(self):
+        print()
+        print(self.transactions_window.render())
 
     @staticmethod
     def print_dict_user_friendly(dict_):
@@ -354,16 +537,15 @@ class CategorizationEngine:
 
     def print_transaction_details(self, transaction):
         print("\n      ***** Transaction Details ******         \n")
-        self.print_dict_user_friendly(transaction[
-                [
-                    "datetime",
-                    "amount",
-                    "account",
-                    "third_party_category",
-                    "pattern",
-                    "category",
-                ]
-            ].to_dict())
+        self.print_dict_user_friendly(
+            {
+                "datetime": transaction["datetime"],
+                "amount": format_cents(transaction["amount_cents"]),
+                **transaction[
+                    ["account", "third_party_category", "pattern", "category"]
+                ].to_dict(),
+            }
+        )
         print()
         print(transaction["note"])
         if pd.notna(transaction["category"]):
@@ -390,10 +572,10 @@ class CategorizationEngine:
     def get_user_input_for_category(self) -> str:
         while True:
             try:
-                inputted_category = input(
+                inputted_category = self.input_with_category_completion(
                     "\nCategorize this transaction by typing in category "
                     "or selecting index of pre-existing category (enter to skip, "
-                    "enter '-' to clear the category):\n"
+                    "enter '-' to clear the category, tab to complete):\n"
                 )
                 if inputted_category == "-":
                     inputted_category = None
@@ -404,49 +586,171 @@ class CategorizationEngine:
                 self.data_validation_engine.verify_category_format(inputted_category)
                 break
             except KeyboardInterrupt:
-                print("Exiting without saving")
+                print("Exiting without saving. Edits are restored on next launch")
                 exit()
             except Exception as e:
                 print(f"\n❌❌❌❌Invalid input. Please try again. {e}")
         return inputted_category
 
+    def complete_category(self, text: str, state: int):
+        """readline completer over the category tree"""
+        if state == 0:
+            self.category_completions = self.category_tree.complete(text.lower())
+        if state < len(self.category_completions):
+            return self.category_completions[state]
+        return None
+
+    def input_with_category_completion(self, prompt: str) -> str:
+        if readline is None:
+            return input(prompt)
+        readline.set_completer(self.complete_category)
+        readline.set_completer_delims("")  # complete the whole `a/b/c` input
+        if "libedit" in (readline.__doc__ or ""):  # macOS
+            readline.parse_and_bind("bind ^I rl_complete")
+        else:
+            readline.parse_and_bind("tab: complete")
+        try:
+            return input(prompt)
+        finally:
+            readline.set_completer(None)
+
+    def get_note_trigram_index(self) -> TrigramIndex:
+        """Notes don't change once loaded, so the index is built once"""
+        if self.note_trigram_index is None:
+            self.note_trigram_index = TrigramIndex(
+                self.transactions_to_categorize["note"]
+            )
+        return self.note_trigram_index
+
+    def get_pattern_impact(self, pattern: str) -> dict:
+        """Transactions the pattern matches and the unseen ones adding it would
+        categorize, i.e. where categorize_data_using_new_pattern would take over.
+        Only the trigram index's candidate notes are run through the regex"""
+        matching_transactions = self.transactions_to_categorize.loc[
+            self.get_note_trigram_index().find_matches(pattern), ["seen", "pattern"]
+        ]
+        unseen_current_patterns = matching_transactions.loc[
+            matching_transactions["seen"] == False, "pattern"
+        ].astype(object)
+        is_taken_over = unseen_current_patterns.apply(
+            lambda current_pattern: len(current_pattern)
+            if pd.notna(current_pattern)
+            else -1
+        ) < len(pattern)
+        return {
+            "num_matching": len(matching_transactions),
+            "num_matching_seen": len(matching_transactions)
+            - len(unseen_current_patterns),
+            "updated_indices": unseen_current_patterns.index[is_taken_over],
+            # shorter patterns the updated transactions are currently matched by
+            "taken_over_pattern_counts": unseen_current_patterns[
+                is_taken_over
+            ].value_counts(),
+            "num_kept_by_longer_patterns": int((~is_taken_over).sum()),
+        }
+
+    def print_pattern_impact(self, pattern: str, num_sample_rows: int = 5) -> None:
+        impact = self.get_pattern_impact(pattern)
+        print(
+            f"\n**{pattern}** matches {impact['num_matching']} transaction(s) "
+            f"({impact['num_matching_seen']} seen). Adding it would categorize "
+            f"{len(impact['updated_indices'])} unseen transaction(s)"
+        )
+        if len(impact["taken_over_pattern_counts"]) > 0:
+            print(
+                f"{impact['taken_over_pattern_counts'].sum()} of them taken over "
+                f"from shorter pattern(s): "
+                + ", ".join(
+                    f"{current_pattern} ({count})"
+                    for current_pattern, count in impact[
+                        "taken_over_pattern_counts"
+                    ].items()
+                )
+            )
+        if impact["num_kept_by_longer_patterns"] > 0:
+            print(
+                f"{impact['num_kept_by_longer_patterns']} other unseen matching "
+                f"transaction(s) keep their longer pattern"
+            )
+        if len(impact["updated_indices"]) > 0:
+            # most recent ones, shown in the order of the transactions window
+            sample_indices = np.sort(impact["updated_indices"])[:num_sample_rows]
+            print(self.transactions_window.render_rows(sample_indices[::-1]))
+
     def get_user_input_for_pattern(self, transaction, inputted_category) -> str:
         while True:
             try:
                 inputted_pattern = input(
                     f"\nAdd a pattern for category **{inputted_category}** based "
                     f"on this transaction. Assume text is lower-cased. "
-                    f"(enter to skip)\n\n{transaction['note']}\n\n"
+                    f"(enter to skip, `?<pattern>` to preview the transactions "
+                    f"it would categorize)\n\n{transaction['note']}\n\n"
                 )
                 if inputted_pattern == "":
                     break
+                if inputted_pattern.startswith("?"):
+                    self.print_pattern_impact(inputted_pattern[1:])
+                    continue
                 if inputted_pattern.isdigit():  # if integer
                     inputted_pattern = self.all_patterns[int(inputted_pattern)]
                 self.data_validation_engine.verify_pattern_matches_text(
                     inputted_pattern, transaction["note"], hide_text=True
                 )
-                if (
-                    inputted_pattern,
-                    inputted_category,
-                ) not in self.pattern_category_map_list:
-                    # if new pattern -> cat mapping, validate
-                    pattern_category_map_list_copy = deepcopy(
-                        self.pattern_category_map_list
-                    )
-                    pattern_category_map_list_copy.append(
-                        (inputted_pattern, inputted_category)
-                    )
-                    self.data_validation_engine.verify_no_pattern_maps_to_more_than_one_category(
-                        pattern_category_map_list_copy
-                    )
+                # if new pattern -> cat mapping, validate
+                self.pattern_registry.verify_pattern_can_map_to_category(
+                    inputted_pattern, inputted_category
+                )
                 break
             except KeyboardInterrupt:
-                print("Exiting without saving")
+                print("Exiting without saving. Edits are restored on next launch")
                 exit()
             except Exception as e:
                 print(f"\n❌❌❌❌Invalid input. Please try again. Error: {e}")
         return inputted_pattern
 
+    def run_batch_categorization(self) -> None:
+        """Headless mode: new transactions are categorized with the existing
+        patterns only and saved, without any terminal UI"""
+        start_time = time.perf_counter()
+        self.load_data_to_categorize()
+        # new transactions no pattern matched aren't saved, so they stay unseen:
+        # the TUI's unseen filter and patterns added later still reach them
+        self.save_transactions_to_categorize(
+            self.transactions_to_categorize["seen"]
+            | self.transactions_to_categorize["category"].notna()
+        )
+        elapsed_seconds = time.perf_counter() - start_time
+        new_transactions = self.transactions_to_categorize[
+            self.transactions_to_categorize["seen"] == False
+        ]
+        print(
+            f"Categorized {len(self.transactions_to_categorize)} transactions "
+            f"({len(new_transactions)} new) in {elapsed_seconds:.2f}s, "
+            f"{len(self.transactions_to_categorize) / elapsed_seconds:.0f} rows/s\n"
+            f"Uncategorized: {new_transactions['category'].isna().sum()} new, "
+            f"{self.transactions_to_categorize['category'].isna().sum()} total"
+        )
+
+    def print_memory_report(self) -> None:
+        """Memory used by the transactions to categorize per column, in the
+        previous all-object schema and in the compact one"""
+        print(get_memory_report(self.transactions_to_categorize))
+
+    def save_transactions_to_categorize(self, is_saved=None) -> None:
+        """Saves all the transactions to categorize, or those where is_saved"""
+        self.save_categorized_transactions(
+            self.transactions_to_categorize
+            if is_saved is None
+            else self.transactions_to_categorize[is_saved]
+        )
+        # edits are now in the categorized transactions file
+        self.categorization_journal.clear()
+        # keep the columns of the patterns created in this session
+        self.pattern_match_matrix.save(
+            self.transactions_to_categorize["note"],
+            self.pattern_registry.pattern_index,
+        )
+
     def save_categorized_transactions(self, categorized_transactions):
         """Write new history"""
         # reorder columns
@@ -454,7 +758,7 @@ class CategorizationEngine:
             [
                 "id",
                 "datetime",
-                "amount",
+                "amount_cents",
                 "account",
                 "third_party_category",
                 "note",
@@ -462,6 +766,64 @@ class CategorizationEngine:
                 "category",
             ]
         ]
-        categorized_transactions.to_csv(
-            self.historical_categorized_transactions_file_path, index=False
+        self.transaction_storage.write(
+            categorized_transactions, self.historical_categorized_transactions_file_path
+        )
+
+    def migrate_historical_transaction_ids(self, transaction_id_scheme: str) -> None:
+        """One-time rewrite of the ids of historically categorized transactions
+        to another id scheme. The previous file is kept as a .bak backup. Legacy
+        ids hash each account's raw column order and how missing values were
+        printed at ingest, so they can't be rebuilt from categorized transactions"""
+        if transaction_id_scheme == LEGACY_TRANSACTION_ID_SCHEME:
+            raise ValueError(
+                "Can't migrate ids to the legacy scheme, it can only be generated "
+                "when raw files are processed"
+            )
+        if os.path.isfile(self.historical_categorized_transactions_file_path) is False:
+            print("No categorized transactions found, nothing to migrate")
+            return
+        if len(self.categorization_journal.read()) > 0:
+            raise ValueError(
+                "Found unsaved categorization edits. Run the app and save them "
+                "before migrating ids"
+            )
+        historical_categorized_transactions = (
+            self.load_historical_categorized_transactions()
+        )
+        historical_categorized_transactions["id"] = generate_transaction_ids(
+            historical_categorized_transactions, transaction_id_scheme
+        )
+        self.data_validation_engine.verify_no_duplicate_ids(
+            historical_categorized_transactions
+        )
+        shutil.copyfile(
+            self.historical_categorized_transactions_file_path,
+            self.historical_categorized_transactions_file_path + ".bak",
+        )
+        self.save_categorized_transactions(historical_categorized_transactions)
+        print(
+            f"Migrated ids of {len(historical_categorized_transactions)} transactions "
+            f"to the {transaction_id_scheme} scheme. Set `transaction_id_scheme: "
+            f"{transaction_id_scheme}` in config.yaml before the next run."
+        )
+
+    def export_categorized_transactions_to_csv(self) -> None:
+        """Writes categorized transactions to categorized_transactions.csv so they
+        can be edited by hand, regardless of the configured storage format"""
+        self.transaction_storage.read(
+            self.historical_categorized_transactions_file_path
+        ).to_csv(self.historical_categorized_transactions_csv_file_path, index=False)
+
+    def import_categorized_transactions_from_csv(self) -> None:
+        """Reads (hand edited) categorized_transactions.csv into the configured
+        storage format"""
+        self.transaction_storage.write(
+            convert_amounts_to_cents(
+                pd.read_csv(
+                    self.historical_categorized_transactions_csv_file_path,
+                    parse_dates=["datetime"],
+                )
+            ),
+            self.historical_categorized_transactions_file_path,
         )
@@ -13,8 +13,8 @@ class DataValidationEngine:
     @staticmethod
     def verify_processed_data_folder_path_not_empty(folder_path: str) -> None:
         """If processed data folder is empty that's because no raw files
-        were processed. Processed data folder cleared with every run for idempotency"""
-        if len(os.listdir(folder_path)) == 0:
+        were processed. Hidden files (e.g. the processed data manifest) don't count"""
+        if len([f for f in os.listdir(folder_path) if f[0] != "."]) == 0:
             raise FileNotFoundError(
                 f"No files found in {folder_path} (no raw files were processed)"
             )
@@ -180,19 +180,18 @@ class DataValidationEngine:
     def verify_no_pattern_maps_to_more_than_one_category(
         pattern_category_map_list: list,
     ) -> None:
-        patterns = [
-            pattern_category[0] for pattern_category in pattern_category_map_list
+        """Single pass grouping categories by pattern, reports all conflicts"""
+        mapped_categories = {}
+        for pattern, category in pattern_category_map_list:
+            mapped_categories.setdefault(pattern, set()).add(category)
+        conflicts = [
+            f"Found the same pattern **{pattern}** "
+            f"mapping to more than one category **{categories}**"
+            for pattern, categories in mapped_categories.items()
+            if len(categories) != 1
         ]
-        for pattern in patterns:
-            mapped_categories = set()
-            for i in range(len(pattern_category_map_list)):
-                if pattern_category_map_list[i][0] == pattern:
-                    mapped_categories.add(pattern_category_map_list[i][1])
-            if len(mapped_categories) != 1:
-                raise ValueError(
-                    f"Found the same pattern **{pattern}** "
-                    f"mapping to more than one category **{mapped_categories}**"
-                )
+        if len(conflicts) > 0:
+            raise ValueError("\n".join(conflicts))
 
     @staticmethod
     def verify_category_format(category) -> None:
@@ -218,6 +217,66 @@ class DataValidationEngine:
                     f"Pattern doesn't match text. Pattern: {pattern} --- Text: {text}"
                 )
 
+    @staticmethod
+    def find_category_format_violations(categories: pd.Series) -> list[str]:
+        """Vectorized verify_category_format over a whole column"""
+        # object, as categoricals map over (and compare) their categories
+        categories = categories.astype(object).dropna()
+        is_string = categories.map(type) == str
+        category_lengths = categories[is_string].map(len)
+        violations = [
+            f"Category must be string, got {category!r} at index {index}"
+            for index, category in categories[~is_string].items()
+        ]
+        violations += [
+            f"Category max length is 50 characters, got {length} at index {index}"
+            for index, length in category_lengths[category_lengths > 50].items()
+        ]
+        return violations
+
+    @staticmethod
+    def find_pattern_text_mismatches(patterns: pd.Series, texts: pd.Series) -> list:
+        """Vectorized verify_pattern_matches_text: each distinct pattern is compiled
+        once and checked against all the (lowercased) texts it was assigned to"""
+        has_pattern = patterns.notna()
+        lowercase_texts = texts[has_pattern].astype(object).str.lower()
+        violations = []
+        for pattern, pattern_texts in lowercase_texts.groupby(
+            patterns[has_pattern].astype(object), sort=False
+        ):
+            try:
+                compiled_pattern = re.compile(pattern)
+            except (re.error, TypeError) as e:
+                violations.append(f"Invalid pattern {pattern}: {e}")
+                continue
+            # not str.contains, which warns about patterns with groups
+            matches = pattern_texts.map(
+                lambda text: isinstance(text, str)
+                and compiled_pattern.search(text) is not None
+            ).astype(bool)
+            violations += [
+                f"Pattern doesn't match text. Pattern: {pattern} --- Text: {text}"
+                for text in pattern_texts[~matches]
+            ]
+        return violations
+
+    def verify_historical_categorized_transactions(
+        self, historical_categorized_transactions: pd.DataFrame
+    ) -> None:
+        """Categories must be valid and each pattern must match the note it was
+        assigned to. Reports all violations at once"""
+        violations = self.find_category_format_violations(
+            historical_categorized_transactions["category"]
+        ) + self.find_pattern_text_mismatches(
+            historical_categorized_transactions["pattern"],
+            historical_categorized_transactions["note"],
+        )
+        if len(violations) > 0:
+            raise ValueError(
+                f"Found {len(violations)} invalid historical categorized "
+                f"transaction(s):\n" + "\n".join(violations)
+            )
+
     @staticmethod
     def verify_all_historical_categorized_transactions_accounted_for_in_processed_data(
         historical_categorized_transactions: pd.DataFrame, processed_data: pd.DataFrame
@@ -230,7 +289,7 @@ class DataValidationEngine:
                 processed_data.id.values
             )
             missing_transactions = historical_categorized_transactions[
-                [historical_categorized_transactions.id.isin(missing_ids)]
+                historical_categorized_transactions.id.isin(missing_ids)
             ]
             raise ValueError(
                 f"Not all categorized transactions accounted for in processed "
@@ -243,7 +302,7 @@ class DataValidationEngine:
         if set(processed_data.columns) != {
             "id",
             "datetime",
-            "amount",
+            "amount_cents",
             "account",
             "third_party_category",
             "note",
@@ -258,7 +317,7 @@ class DataValidationEngine:
         if set(categorized_transactions.columns) != {
             "id",
             "datetime",
-            "amount",
+            "amount_cents",
             "account",
             "third_party_category",
             "note",
@@ -1,12 +1,17 @@
-import hashlib
 import os
-import shutil
+from concurrent.futures import ProcessPoolExecutor
 
 import dateutil
 import numpy as np
 import pandas as pd
 
 from spending_tracker.engines.data_validation_engine import DataValidationEngine
+from spending_tracker.storage.processed_data_manifest import ProcessedDataManifest
+from spending_tracker.storage.processed_transaction_store import (
+    ProcessedTransactionStore,
+)
+from spending_tracker.utils.amounts import convert_amounts_to_cents
+from spending_tracker.utils.transaction_ids import generate_transaction_ids
 
 
 class RawDataProcessingEngine:
@@ -18,20 +23,38 @@ class RawDataProcessingEngine:
 
     If adding new method to support a new account/format, output should contain
     [datetime,amount,third_party_category,note,account,id] columns. Checkout the existing
-    methods for more details.
+    methods for more details. Amounts are float dollars in the methods (ids are hashed
+    from them) and stored as int64 cents (amount_cents). Bump PARSER_VERSION whenever
+    the output of an existing method changes, so that cached processed files get
+    re-created.
     """
 
+    PARSER_VERSION = 3
+
     def __init__(
         self,
         data_validation_engine: DataValidationEngine,
         root_data_folder_path: str,
         supported_accounts: dict,
+        transaction_id_scheme: str,
+        raw_data_processing_workers: int,
+        processed_transaction_store: ProcessedTransactionStore,
+        raw_data_chunk_size: int = None,
     ):
         self.root_data_folder_path = root_data_folder_path.rstrip("/") + "/"
         self.raw_data_folder_path = self.root_data_folder_path + "raw/"
         self.processed_data_folder_path = self.root_data_folder_path + "processed/"
+        self.processed_data_manifest_file_path = (
+            self.processed_data_folder_path + ".manifest.json"
+        )
         self.data_validation_engine = data_validation_engine
         self.supported_accounts = supported_accounts
+        self.transaction_id_scheme = transaction_id_scheme
+        self.raw_data_processing_workers = raw_data_processing_workers
+        self.processed_transaction_store = processed_transaction_store
+        self.raw_data_chunk_size = raw_data_chunk_size
+        # set by StageProfiler.instrument when profiling
+        self.stage_profiler = None
         self.create_folder_structure_if_not_exists()
 
     def read_raw_data_file_names(self) -> list:
@@ -48,18 +71,14 @@ class RawDataProcessingEngine:
         self.data_validation_engine.verify_path_not_file(self.root_data_folder_path)
         os.makedirs(self.root_data_folder_path, exist_ok=True)
         os.makedirs(self.raw_data_folder_path, exist_ok=True)
-        # delete everything in processed_data_folder_path for idempotency
-        # processed files re-created every run based on raw files.
-        try:
-            shutil.rmtree(self.processed_data_folder_path)
-        except FileNotFoundError:
-            pass
         os.makedirs(self.processed_data_folder_path, exist_ok=True)
 
     def process_raw_data_files(self) -> None:
         """Reads each file from the /raw folder, processes it into one shared format
-        regardless of source account, and saves as csv with the same name in the
-        /processed folder"""
+        regardless of source account, and appends it to the processed transaction
+        store in the /processed folder. Processing is cached: only new or modified
+        raw files are processed and transactions of raw files that were removed are
+        deleted, so the store always mirrors the /raw folder (idempotency)"""
         raw_data_file_names = self.read_raw_data_file_names()
         self.data_validation_engine.verify_raw_data_file_names_contain_date_range(
             raw_data_file_names
@@ -70,26 +89,177 @@ class RawDataProcessingEngine:
         self.data_validation_engine.verify_account_raw_data_file_names_date_ranges(
             raw_data_file_names
         )
+        # sorted so that processing (and the first error reported) is deterministic
+        raw_data_file_names = self.remove_outdated_processed_data(
+            sorted(raw_data_file_names)
+        )
+        try:
+            self.process_and_write_raw_data_files(raw_data_file_names)
+        finally:
+            self.processed_data_manifest.save()
+
+    def remove_outdated_processed_data(self, raw_data_file_names: list) -> list:
+        """Deletes processed files that no longer reflect a raw file (raw file
+        removed, modified, or processed by another parser version). Returns the
+        raw data file names that need to be (re)processed"""
+        self.processed_data_manifest = ProcessedDataManifest(
+            self.processed_data_manifest_file_path
+        )
+        raw_data_file_names_to_process = []
+        self.raw_data_file_cache_keys = {}
+        # each folder is listed once, membership is then checked on sets
+        stored_raw_data_file_names = set(
+            self.processed_transaction_store.raw_data_file_names()
+        )
         for raw_data_file_name in raw_data_file_names:
-            account = self.detect_account_in_raw_data_file_name(raw_data_file_name)
-            raw_data_file_path = self.raw_data_folder_path + raw_data_file_name
-            raw_data = pd.read_csv(raw_data_file_path, index_col=False)
-            self.data_validation_engine.verify_raw_data_contains_correct_columns(
-                raw_data, raw_data_file_path, account
-            )
-            raw_data["account"] = account
-            # call function with the name of the account
-            account_processing_method = getattr(self, account)
-            processed_data = account_processing_method(
-                raw_data, raw_data_file_path, raw_data_file_name
+            cache_key = self.processed_data_manifest.get_cache_key(
+                self.raw_data_folder_path + raw_data_file_name,
+                account=self.detect_account_in_raw_data_file_name(raw_data_file_name),
+                parser_version=self.PARSER_VERSION,
+                transaction_id_scheme=self.transaction_id_scheme,
+                storage_format=(
+                    self.processed_transaction_store.transaction_storage.storage_format
+                ),
             )
-            # processed data file name same as raw data file name
-            self.data_validation_engine.verify_processed_data_bound_by_date_range(
-                raw_data_file_name, processed_data
+            self.raw_data_file_cache_keys[raw_data_file_name] = cache_key
+            if (
+                not self.processed_data_manifest.is_up_to_date(
+                    raw_data_file_name, cache_key
+                )
+                or raw_data_file_name not in stored_raw_data_file_names
+            ):
+                self.processed_data_manifest.remove(raw_data_file_name)
+                raw_data_file_names_to_process.append(raw_data_file_name)
+        removed_raw_data_file_names = set(
+            self.processed_data_manifest.raw_data_file_names()
+        ) - set(raw_data_file_names)
+        for raw_data_file_name in removed_raw_data_file_names:
+            self.processed_data_manifest.remove(raw_data_file_name)
+        # anything not backed by an up to date manifest entry is outdated
+        self.processed_transaction_store.remove(
+            sorted(
+                stored_raw_data_file_names
+                - set(self.processed_data_manifest.raw_data_file_names())
             )
-            processed_data.to_csv(
-                self.processed_data_folder_path + raw_data_file_name, index=False
+        )
+        self.processed_transaction_store.remove_uncommitted_partition_files()
+        # per raw file outputs of previous versions
+        for file_name in os.listdir(self.processed_data_folder_path):
+            if file_name[0] != "." and os.path.isfile(
+                self.processed_data_folder_path + file_name
+            ):
+                os.remove(self.processed_data_folder_path + file_name)
+        return raw_data_file_names_to_process
+
+    def process_and_write_raw_data_files(self, raw_data_file_names: list) -> None:
+        if self.raw_data_chunk_size:
+            for raw_data_file_name in raw_data_file_names:
+                self.processed_transaction_store.append_chunks(
+                    raw_data_file_name,
+                    self.iterate_processed_data_chunks(raw_data_file_name),
+                )
+                self.processed_data_manifest.update(
+                    raw_data_file_name,
+                    self.raw_data_file_cache_keys[raw_data_file_name],
+                )
+        elif self.raw_data_processing_workers > 1:
+            with ProcessPoolExecutor(self.raw_data_processing_workers) as executor:
+                # map yields results in submission order, so an error surfaces for
+                # the first failing file in sorted order, same as the serial path
+                results = executor.map(
+                    self.process_raw_data_file_in_worker, raw_data_file_names
+                )
+                for raw_data_file_name, (processed_data, profile_records) in zip(
+                    raw_data_file_names, results
+                ):
+                    if self.stage_profiler is not None:
+                        self.stage_profiler.add_records(profile_records)
+                    self.write_processed_data(raw_data_file_name, processed_data)
+        else:
+            for raw_data_file_name in raw_data_file_names:
+                processed_data = self.process_raw_data_file(raw_data_file_name)
+                self.write_processed_data(raw_data_file_name, processed_data)
+
+    def process_raw_data_file(self, raw_data_file_name: str) -> pd.DataFrame:
+        """Read -> validate -> transform pipeline of a single raw file. Runs in a
+        worker process when raw_data_processing_workers > 1"""
+        try:
+            raw_data = pd.read_csv(
+                self.raw_data_folder_path + raw_data_file_name, index_col=False
             )
+            return self.process_raw_data(raw_data_file_name, raw_data)
+        except Exception as e:
+            raise RuntimeError(
+                f"Failed to process raw data file {raw_data_file_name}: {e}"
+            ) from e
+
+    def process_raw_data_file_in_worker(self, raw_data_file_name: str) -> tuple:
+        """process_raw_data_file and the stages profiled while running it, which
+        the worker's copy of the profiler can't report itself"""
+        processed_data = self.process_raw_data_file(raw_data_file_name)
+        if self.stage_profiler is None:
+            return processed_data, []
+        return processed_data, self.stage_profiler.records
+
+    def iterate_processed_data_chunks(self, raw_data_file_name: str):
+        """Same as process_raw_data_file, but reads, validates and transforms
+        raw_data_chunk_size rows at a time and yields each processed chunk"""
+        try:
+            for raw_data in self.read_raw_data_chunks(
+                self.raw_data_folder_path + raw_data_file_name
+            ):
+                yield self.process_raw_data(raw_data_file_name, raw_data)
+        except Exception as e:
+            raise RuntimeError(
+                f"Failed to process raw data file {raw_data_file_name}: {e}"
+            ) from e
+
+    def read_raw_data_chunks(self, raw_data_file_path: str):
+        """Chunks of raw_data_chunk_size rows. A first pass over the file infers
+        the dtype of each column over all rows, like a single read_csv does, so
+        that e.g. a chunk holding only whole dollar amounts isn't parsed as ints
+        (which would change legacy ids)"""
+        dtypes = {}
+        for raw_data in pd.read_csv(
+            raw_data_file_path, index_col=False, chunksize=self.raw_data_chunk_size
+        ):
+            for column, dtype in raw_data.dtypes.items():
+                dtypes[column] = np.result_type(dtypes.get(column, dtype), dtype)
+        return pd.read_csv(
+            raw_data_file_path,
+            index_col=False,
+            chunksize=self.raw_data_chunk_size,
+            dtype=dtypes,
+        )
+
+    def process_raw_data(
+        self, raw_data_file_name: str, raw_data: pd.DataFrame
+    ) -> pd.DataFrame:
+        """Validate -> transform of the rows of a raw file (all or a chunk)"""
+        account = self.detect_account_in_raw_data_file_name(raw_data_file_name)
+        raw_data_file_path = self.raw_data_folder_path + raw_data_file_name
+        self.data_validation_engine.verify_raw_data_contains_correct_columns(
+            raw_data, raw_data_file_path, account
+        )
+        raw_data["account"] = account
+        # call function with the name of the account
+        account_processing_method = getattr(self, account)
+        processed_data = account_processing_method(
+            raw_data, raw_data_file_path, raw_data_file_name
+        )
+        # processed data file name same as raw data file name
+        self.data_validation_engine.verify_processed_data_bound_by_date_range(
+            raw_data_file_name, processed_data
+        )
+        return convert_amounts_to_cents(processed_data)
+
+    def write_processed_data(
+        self, raw_data_file_name: str, processed_data: pd.DataFrame
+    ) -> None:
+        self.processed_transaction_store.append(raw_data_file_name, processed_data)
+        self.processed_data_manifest.update(
+            raw_data_file_name, self.raw_data_file_cache_keys[raw_data_file_name]
+        )
 
     def detect_account_in_raw_data_file_name(self, raw_data_file_name: str) -> str:
         """Get account from the raw data file name"""
@@ -98,72 +268,79 @@ class RawDataProcessingEngine:
                 return account
 
     @staticmethod
-    def remove_non_numerical_chars(str_: str) -> float:
+    def parse_datetime_column(
+        datetime_strings: pd.Series, datetime_format: str
+    ) -> pd.Series:
+        """Vectorized parsing with the account's explicit date format. Falls back to
+        (slow) per row parsing if the export doesn't follow the expected format"""
+        try:
+            return pd.to_datetime(datetime_strings, format=datetime_format)
+        except ValueError:
+            return datetime_strings.apply(
+                lambda datetime_string: dateutil.parser.parse(datetime_string)
+            )
+
+    @staticmethod
+    def remove_non_numerical_chars(strings: pd.Series) -> pd.Series:
         """This is to convert e.g. '$14.83' to 14.83"""
-        chars = ["-", ".", "0", "1", "2", "3", "4", "5", "6", "7", "8", "9"]
-        list_ = list(str_)
-        list_ = [c for c in list_ if c in chars]
-        return float("".join(list_))
+        if pd.api.types.is_numeric_dtype(strings):
+            return strings.astype(float)
+        return (
+            strings.astype(str).str.replace(r"[^\-\.0-9]", "", regex=True).astype(float)
+        )
+
+    @staticmethod
+    def merge_debit_credit_columns(raw_data: pd.DataFrame) -> pd.Series:
+        """Exactly one of Debit/Credit is set for each transaction"""
+        if (raw_data["Credit"].isna().sum() + raw_data["Debit"].isna().sum()) != len(
+            raw_data
+        ):
+            raise Exception("Failed to parse debit/credit columns")
+        return pd.Series(
+            np.where(raw_data["Debit"].isna(), raw_data["Credit"], raw_data["Debit"]),
+            index=raw_data.index,
+        )
+
+    def add_note_and_id_columns(self, processed_data: pd.DataFrame) -> pd.DataFrame:
+        """Shared last step of all account methods. Prefixes note with the account,
+        replaces commas and hashes the transaction's information into an id"""
+        processed_data["note"] = (
+            processed_data["account"] + "_" + processed_data["note"]
+        ).str.replace(",", ".", regex=False)
+        processed_data["id"] = generate_transaction_ids(
+            processed_data, self.transaction_id_scheme
+        )
+        return processed_data
 
     def amex_blue_cash_preferred_2022_1(
         self, raw_data, raw_data_file_path, raw_data_file_name
     ) -> pd.DataFrame:
         """Method for parsing American Express Blue Cash Preferred exports with
         the csv export format since 2022"""
-        raw_data = raw_data.loc[:, ("Date", "Amount", "Description", "account")]
-        raw_data.columns = ["datetime", "amount", "note", "account"]
-        raw_data["third_party_category"] = None
-        raw_data = raw_data[
-            ["datetime", "amount", "account", "third_party_category", "note"]
-        ]
-        raw_data["datetime"] = raw_data["datetime"].apply(
-            lambda datetime_string: dateutil.parser.parse(datetime_string)
-        )
-        raw_data["note"] = raw_data["account"] + "_" + raw_data["note"]
-        raw_data["note"] = raw_data["note"].apply(lambda s: s.replace(",", "."))
-        raw_data["id"] = raw_data.apply(
-            lambda row: hashlib.sha256(str(row.values).encode("utf-8")).hexdigest()[
-                0:30
-            ],
-            axis=1,
+        processed_data = pd.DataFrame(
+            {
+                "datetime": self.parse_datetime_column(raw_data["Date"], "%m/%d/%Y"),
+                "amount": raw_data["Amount"],
+                "account": raw_data["account"],
+                "third_party_category": None,
+                "note": raw_data["Description"],
+            }
         )
-        return raw_data
+        return self.add_note_and_id_columns(processed_data)
 
     def citi_double_cash_2022_1(
         self, raw_data, raw_data_file_path, raw_data_file_name
     ) -> pd.DataFrame:
-        if (
-            sum(np.isnan(raw_data.Credit.values)) + sum(np.isnan(raw_data.Debit.values))
-        ) != len(raw_data):
-            raise Exception("Failed to parse debit/credit columns")
-
-        def merge_debit_credit_columns(row):
-            if np.isnan(row["Debit"]):
-                return row["Credit"]
-            else:
-                return row["Debit"]
-
-        raw_data["amount"] = raw_data.apply(
-            lambda row: merge_debit_credit_columns(row), axis=1
-        )
-        raw_data = raw_data.loc[:, ("Date", "amount", "Description", "account")]
-        raw_data.columns = ["datetime", "amount", "note", "account"]
-        raw_data.loc[:, "third_party_category"] = None
-        raw_data = raw_data[
-            ["datetime", "amount", "account", "third_party_category", "note"]
-        ]
-        raw_data["datetime"] = raw_data["datetime"].apply(
-            lambda datetime_string: dateutil.parser.parse(datetime_string)
+        processed_data = pd.DataFrame(
+            {
+                "datetime": self.parse_datetime_column(raw_data["Date"], "%m/%d/%Y"),
+                "amount": self.merge_debit_credit_columns(raw_data),
+                "account": raw_data["account"],
+                "third_party_category": None,
+                "note": raw_data["Description"],
+            }
         )
-        raw_data["note"] = raw_data["account"] + "_" + raw_data["note"]
-        raw_data["note"] = raw_data["note"].apply(lambda s: s.replace(",", "."))
-        raw_data["id"] = raw_data.apply(
-            lambda row: hashlib.sha256(str(row.values).encode("utf-8")).hexdigest()[
-                0:30
-            ],
-            axis=1,
-        )
-        return raw_data
+        return self.add_note_and_id_columns(processed_data)
 
     def citi_custom_cash_2022_1(
         self, raw_data, raw_data_file_path, raw_data_file_name
@@ -175,63 +352,38 @@ class RawDataProcessingEngine:
     def amazon_refunds_2022_1(
         self, raw_data, raw_data_file_path, raw_data_file_name
     ) -> pd.DataFrame:
-        raw_data["amount"] = raw_data["Refund Amount"].apply(
-            lambda x: self.remove_non_numerical_chars(x)
-        ) + raw_data["Refund Tax Amount"].apply(
-            lambda x: self.remove_non_numerical_chars(x)
-        )
-        raw_data["amount"] = raw_data["amount"] * -1
-        raw_data = raw_data.loc[
-            :, ("Order Date", "amount", "Category", "Title", "account")
-        ]
-        raw_data.columns = [
-            "datetime",
-            "amount",
-            "third_party_category",
-            "note",
-            "account",
-        ]
-        raw_data["datetime"] = raw_data["datetime"].apply(
-            lambda datetime_string: dateutil.parser.parse(datetime_string)
-        )
-        raw_data["note"] = raw_data["account"] + "_" + raw_data["note"]
-        raw_data["note"] = raw_data["note"].apply(lambda s: s.replace(",", "."))
-        raw_data["id"] = raw_data.apply(
-            lambda row: hashlib.sha256(str(row.values).encode("utf-8")).hexdigest()[
-                0:30
-            ],
-            axis=1,
+        processed_data = pd.DataFrame(
+            {
+                "datetime": self.parse_datetime_column(
+                    raw_data["Order Date"], "%m/%d/%y"
+                ),
+                "amount": (
+                    self.remove_non_numerical_chars(raw_data["Refund Amount"])
+                    + self.remove_non_numerical_chars(raw_data["Refund Tax Amount"])
+                )
+                * -1,
+                "third_party_category": raw_data["Category"],
+                "note": raw_data["Title"],
+                "account": raw_data["account"],
+            }
         )
-        return raw_data
+        return self.add_note_and_id_columns(processed_data)
 
     def amazon_items_2022_1(
         self, raw_data, raw_data_file_path, raw_data_file_name
     ) -> pd.DataFrame:
-        raw_data = raw_data.loc[
-            :, ("Order Date", "Item Total", "Category", "Title", "account")
-        ]
-        raw_data.columns = [
-            "datetime",
-            "amount",
-            "third_party_category",
-            "note",
-            "account",
-        ]
-        raw_data["datetime"] = raw_data["datetime"].apply(
-            lambda datetime_string: dateutil.parser.parse(datetime_string)
+        processed_data = pd.DataFrame(
+            {
+                "datetime": self.parse_datetime_column(
+                    raw_data["Order Date"], "%m/%d/%y"
+                ),
+                "amount": self.remove_non_numerical_chars(raw_data["Item Total"]),
+                "third_party_category": raw_data["Category"],
+                "note": raw_data["Title"],
+                "account": raw_data["account"],
+            }
         )
-        raw_data["amount"] = raw_data["amount"].apply(
-            lambda x: self.remove_non_numerical_chars(x)
-        )
-        raw_data["note"] = raw_data["account"] + "_" + raw_data["note"]
-        raw_data["note"] = raw_data["note"].apply(lambda s: s.replace(",", "."))
-        raw_data["id"] = raw_data.apply(
-            lambda row: hashlib.sha256(str(row.values).encode("utf-8")).hexdigest()[
-                0:30
-            ],
-            axis=1,
-        )
-        return raw_data
+        return self.add_note_and_id_columns(processed_data)
 
     def chase_amazon_visa_2022_1(self, *kwargs) -> pd.DataFrame:
         return self.chase_freedom_unlimited_2022_1(*kwargs)
@@ -241,84 +393,49 @@ class RawDataProcessingEngine:
     ) -> pd.DataFrame:
         # Make sure to get Post date not transaction date, that's what website
         # search tool uses to filter/search
-        raw_data = raw_data.loc[
-            :, ("Post Date", "Description", "Category", "Amount", "account")
-        ]
-        raw_data.columns = [
-            "datetime",
-            "note",
-            "third_party_category",
-            "amount",
-            "account",
-        ]
-        raw_data["amount"] = raw_data["amount"].apply(lambda x: -x)
-        raw_data = raw_data[
-            ["datetime", "amount", "account", "third_party_category", "note"]
-        ]
-        raw_data["datetime"] = raw_data["datetime"].apply(
-            lambda datetime_string: dateutil.parser.parse(datetime_string)
-        )
-        raw_data["note"] = raw_data["account"] + "_" + raw_data["note"]
-        raw_data["note"] = raw_data["note"].apply(lambda s: s.replace(",", "."))
-        raw_data["id"] = raw_data.apply(
-            lambda row: hashlib.sha256(str(row.values).encode("utf-8")).hexdigest()[
-                0:30
-            ],
-            axis=1,
+        processed_data = pd.DataFrame(
+            {
+                "datetime": self.parse_datetime_column(
+                    raw_data["Post Date"], "%m/%d/%Y"
+                ),
+                "amount": -raw_data["Amount"],
+                "account": raw_data["account"],
+                "third_party_category": raw_data["Category"],
+                "note": raw_data["Description"],
+            }
         )
-        return raw_data
+        return self.add_note_and_id_columns(processed_data)
 
     def chase_debit_2022_1(
         self, raw_data, raw_data_file_path, raw_data_file_name
     ) -> pd.DataFrame:
-        raw_data = raw_data.loc[:, ("Posting Date", "Amount", "Description", "account")]
-        raw_data.columns = ["datetime", "amount", "note", "account"]
-        raw_data["amount"] = raw_data["amount"].apply(lambda x: -x)
-        raw_data["third_party_category"] = None
-        raw_data = raw_data[
-            ["datetime", "amount", "account", "third_party_category", "note"]
-        ]
-        raw_data["datetime"] = raw_data["datetime"].apply(
-            lambda datetime_string: dateutil.parser.parse(datetime_string)
+        processed_data = pd.DataFrame(
+            {
+                "datetime": self.parse_datetime_column(
+                    raw_data["Posting Date"], "%m/%d/%Y"
+                ),
+                "amount": -raw_data["Amount"],
+                "account": raw_data["account"],
+                "third_party_category": None,
+                "note": raw_data["Description"],
+            }
         )
-        raw_data["note"] = raw_data["account"] + "_" + raw_data["note"]
-        raw_data["note"] = raw_data["note"].apply(lambda s: s.replace(",", "."))
-        raw_data["id"] = raw_data.apply(
-            lambda row: hashlib.sha256(str(row.values).encode("utf-8")).hexdigest()[
-                0:30
-            ],
-            axis=1,
-        )
-        return raw_data
+        return self.add_note_and_id_columns(processed_data)
 
     def amazon_2023_1(
         self, raw_data, raw_data_file_path, raw_data_file_name
     ) -> pd.DataFrame:
         if raw_data.iloc[-1][0] == "order id":  # fix error in this format
             raw_data = raw_data.drop(raw_data.index[-1])
-        raw_data["amount"] = (
-            raw_data["total"].astype(float)
-            + raw_data["gift"].astype(float)
-            - raw_data["refund"].astype(float)
-        )
-        import ipdb
-
-        ipdb.set_trace()
-        raw_data = raw_data.loc[:, ("date", "amount", "items", "account")]
-        raw_data.columns = ["datetime", "amount", "note", "account"]
-        raw_data["third_party_category"] = None
-        raw_data = raw_data[
-            ["datetime", "amount", "account", "third_party_category", "note"]
-        ]
-        raw_data["datetime"] = raw_data["datetime"].apply(
-            lambda datetime_string: dateutil.parser.parse(datetime_string)
-        )
-        raw_data["note"] = raw_data["account"] + "_" + raw_data["note"]
-        raw_data["note"] = raw_data["note"].apply(lambda s: s.replace(",", "."))
-        raw_data["id"] = raw_data.apply(
-            lambda row: hashlib.sha256(str(row.values).encode("utf-8")).hexdigest()[
-                0:30
-            ],
-            axis=1,
+        processed_data = pd.DataFrame(
+            {
+                "datetime": self.parse_datetime_column(raw_data["date"], "%Y-%m-%d"),
+                "amount": raw_data["total"].astype(float)
+                + raw_data["gift"].astype(float)
+                - raw_data["refund"].astype(float),
+                "account": raw_data["account"],
+                "third_party_category": None,
+                "note": raw_data["items"],
+            }
         )
-        return raw_data
+        return self.add_note_and_id_columns(processed_data)
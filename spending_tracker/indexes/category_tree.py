@@ -0,0 +1,83 @@
+import bisect
+
+import pandas as pd
+
+CATEGORY_SEPARATOR = "/"
+
+
+class CategoryTree:
+
+    """Tree of the slash separated categories, e.g. `food/groceries` is a child
+    of `food`.
+
+    Every prefix of a category is a node, whether or not it was used as a
+    category itself. Node paths are also kept sorted, so prefix completion is a
+    binary search.
+    """
+
+    def __init__(self, categories=()):
+        # node path -> paths of its children, root is ""
+        self.children = {"": []}
+        self.sorted_paths = []
+        for category in categories:
+            self.add(category)
+
+    def __len__(self) -> int:
+        return len(self.sorted_paths)
+
+    def __contains__(self, path) -> bool:
+        return path in self.children
+
+    @staticmethod
+    def get_parent(path: str) -> str:
+        return path.rpartition(CATEGORY_SEPARATOR)[0]
+
+    def add(self, category: str) -> None:
+        """Adds the category and all its prefixes"""
+        levels = category.split(CATEGORY_SEPARATOR)
+        parent = ""
+        for depth in range(1, len(levels) + 1):
+            path = CATEGORY_SEPARATOR.join(levels[:depth])
+            if path not in self.children:
+                self.children[path] = []
+                bisect.insort(self.sorted_paths, path)
+                bisect.insort(self.children[parent], path)
+            parent = path
+
+    def complete(self, prefix: str) -> list[str]:
+        """Node paths starting with the prefix, in alphabetical order"""
+        start = bisect.bisect_left(self.sorted_paths, prefix)
+        end = start
+        while end < len(self.sorted_paths) and self.sorted_paths[end].startswith(
+            prefix
+        ):
+            end += 1
+        return self.sorted_paths[start:end]
+
+    def iterate_depth_first(self, path: str = ""):
+        """Node paths, children before their parent"""
+        stack = [(path, False)]
+        while stack:
+            path, children_visited = stack.pop()
+            if children_visited:
+                yield path
+            else:
+                stack.append((path, True))
+                stack.extend((child, False) for child in self.children[path])
+
+    def get_subtree_sums(self, amounts_by_category: pd.Series) -> pd.Series:
+        """Sum of each node's own amount and of all its descendants'. Amounts are
+        assigned to their node in a single pass, then summed up the tree once.
+        Missing categories (NaN) are left out"""
+        amounts_by_category = amounts_by_category[amounts_by_category.index.notna()]
+        for category in amounts_by_category.index:
+            self.add(category)
+        subtree_sums = dict.fromkeys(self.sorted_paths, 0.0)
+        for category, amount in amounts_by_category.items():
+            subtree_sums[category] += amount
+        for path in self.iterate_depth_first():
+            if path != "":
+                parent = self.get_parent(path)
+                if parent != "":
+                    subtree_sums[parent] += subtree_sums[path]
+        return pd.Series(subtree_sums, dtype=float)
@@ -0,0 +1,181 @@
+import re
+import re._parser as sre_parse
+from collections import deque
+
+_LITERAL = sre_parse.LITERAL
+_SUBPATTERN = sre_parse.SUBPATTERN
+
+
+class PatternIndex:
+
+    """Compiled index over the user created regex patterns.
+
+    Every pattern is compiled exactly once. Patterns that contain a mandatory
+    literal run (e.g. `amzn mktp` in `amzn mktp.*books`) are registered in an
+    Aho-Corasick automaton keyed on that literal, so a single pass over a note
+    finds every pattern that could possibly match it. Only those candidates (plus
+    the few patterns without any usable literal) are then run through the real
+    regex engine.
+
+    Results are identical to testing every pattern against the lower-cased note:
+    the longest matching pattern wins and ties go to the pattern added first.
+    """
+
+    def __init__(self, patterns=()):
+        # pattern position -> (pattern, compiled regex)
+        self.patterns = []
+        self.pattern_positions = {}
+        # patterns that can't be prefiltered and are always candidates
+        self.unfiltered_pattern_positions = []
+        # aho-corasick automaton over the mandatory literals
+        self.literals = []
+        self.literal_ids = {}
+        self.literal_pattern_positions = []
+        self.literal_nodes = []
+        self.goto = [{}]
+        self.fail = [0]
+        self.outputs = [set()]
+        self.automaton_is_dirty = False
+        for pattern in patterns:
+            self.add_pattern(pattern)
+
+    def __len__(self) -> int:
+        return len(self.patterns)
+
+    def __contains__(self, pattern) -> bool:
+        return pattern in self.pattern_positions
+
+    def add_pattern(self, pattern: str) -> None:
+        """Compile and index a single pattern. Only the new pattern's literal is
+        inserted in the automaton, failure links are rebuilt lazily on next search"""
+        if pattern in self.pattern_positions:
+            return
+        compiled_pattern = re.compile(pattern)
+        position = len(self.patterns)
+        self.patterns.append((pattern, compiled_pattern))
+        self.pattern_positions[pattern] = position
+        literal = self.extract_mandatory_literal(pattern)
+        if literal is None:
+            self.unfiltered_pattern_positions.append(position)
+            return
+        if literal not in self.literal_ids:
+            self.literal_ids[literal] = len(self.literals)
+            self.literals.append(literal)
+            self.literal_pattern_positions.append([])
+            self.insert_literal_in_automaton(literal)
+        self.literal_pattern_positions[self.literal_ids[literal]].append(position)
+
+    @staticmethod
+    def extract_mandatory_literal(pattern: str):
+        """Returns the longest run of literal characters that any match of the
+        pattern must contain, or None if no such run could be determined safely"""
+        literal_runs = PatternIndex.extract_mandatory_literals(pattern)
+        if len(literal_runs) == 0:
+            return None
+        return max(literal_runs, key=len)
+
+    @staticmethod
+    def extract_mandatory_literals(pattern: str) -> list:
+        """Returns the runs of literal characters that any match of the pattern
+        must contain, empty if none could be determined safely"""
+        parsed_pattern = sre_parse.parse(pattern)
+        if parsed_pattern.state.flags & re.IGNORECASE:
+            # case folding makes literal prefiltering unsafe, always run regex
+            return []
+        literal_runs = []
+        PatternIndex.collect_literal_runs(parsed_pattern, literal_runs)
+        return literal_runs
+
+    @staticmethod
+    def collect_literal_runs(parsed_pattern, literal_runs: list) -> None:
+        """Walks a top level (i.e. mandatory) sequence collecting literal runs.
+        Anything that is not a plain literal breaks the current run"""
+        current_run = []
+        for op, av in parsed_pattern:
+            if op is _LITERAL:
+                current_run.append(chr(av))
+                continue
+            if current_run:
+                literal_runs.append("".join(current_run))
+                current_run = []
+            if op is _SUBPATTERN:
+                _, add_flags, _, sub_pattern = av
+                if not add_flags & re.IGNORECASE:
+                    PatternIndex.collect_literal_runs(sub_pattern, literal_runs)
+        if current_run:
+            literal_runs.append("".join(current_run))
+
+    def insert_literal_in_automaton(self, literal: str) -> None:
+        node = 0
+        for char in literal:
+            if char not in self.goto[node]:
+                self.goto.append({})
+                self.fail.append(0)
+                self.outputs.append(set())
+                self.goto[node][char] = len(self.goto) - 1
+            node = self.goto[node][char]
+        self.literal_nodes.append(node)
+        self.automaton_is_dirty = True
+
+    def build_failure_links(self) -> None:
+        """Breadth first construction of the Aho-Corasick failure links. Outputs
+        of the failure node are merged so search only reads one set per node"""
+        self.outputs = [set() for _ in self.goto]
+        for literal_id, node in enumerate(self.literal_nodes):
+            self.outputs[node].add(literal_id)
+        self.fail = [0] * len(self.goto)
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self.goto[node].items():
+                queue.append(child)
+                fallback = self.fail[node]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(char, 0)
+                if self.fail[child] == child:
+                    self.fail[child] = 0
+                self.outputs[child] |= self.outputs[self.fail[child]]
+        self.automaton_is_dirty = False
+
+    def find_candidate_pattern_positions(self, text: str) -> set:
+        """One pass over text returning positions of patterns that may match"""
+        if self.automaton_is_dirty:
+            self.build_failure_links()
+        goto, fail, outputs = self.goto, self.fail, self.outputs
+        found_literal_ids = set()
+        node = 0
+        for char in text:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if outputs[node]:
+                found_literal_ids |= outputs[node]
+        candidate_pattern_positions = set(self.unfiltered_pattern_positions)
+        for literal_id in found_literal_ids:
+            candidate_pattern_positions.update(
+                self.literal_pattern_positions[literal_id]
+            )
+        return candidate_pattern_positions
+
+    def find_matching_patterns(self, text: str) -> list:
+        """Returns every pattern matching the lower-cased text, in insertion order"""
+        text = text.lower()
+        return [
+            self.patterns[position][0]
+            for position in sorted(self.find_candidate_pattern_positions(text))
+            if self.patterns[position][1].search(text) is not None
+        ]
+
+    def find_longest_matching_pattern(self, text: str):
+        """Returns longest pattern that matches the lower-cased text, or None"""
+        text = text.lower()
+        candidate_pattern_positions = sorted(
+            self.find_candidate_pattern_positions(text),
+            key=lambda position: (-len(self.patterns[position][0]), position),
+        )
+        for position in candidate_pattern_positions:
+            pattern, compiled_pattern = self.patterns[position]
+            if compiled_pattern.search(text) is not None:
+                return pattern
+        return None
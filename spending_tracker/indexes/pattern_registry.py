@@ -0,0 +1,48 @@
+from spending_tracker.indexes.pattern_index import PatternIndex
+
+
+class PatternRegistry:
+
+    """All user created patterns and the category each one maps to.
+
+    Keeps the invariant that a pattern maps to exactly one category in a
+    pattern -> category dict, so checking a new pattern for conflicts is a single
+    lookup. Patterns are also added to a PatternIndex used for auto
+    categorization. Validate bulk input with
+    DataValidationEngine.verify_no_pattern_maps_to_more_than_one_category first.
+    """
+
+    def __init__(self, pattern_category_map_list=()):
+        self.pattern_category_map_dict = {}
+        self.pattern_index = PatternIndex()
+        for pattern, category in pattern_category_map_list:
+            self.add(pattern, category)
+
+    def __len__(self) -> int:
+        return len(self.pattern_category_map_dict)
+
+    def __contains__(self, pattern) -> bool:
+        return pattern in self.pattern_category_map_dict
+
+    @property
+    def pattern_category_map_list(self) -> list:
+        return list(self.pattern_category_map_dict.items())
+
+    def get_category(self, pattern: str):
+        return self.pattern_category_map_dict[pattern]
+
+    def verify_pattern_can_map_to_category(self, pattern: str, category: str) -> None:
+        if self.pattern_category_map_dict.get(pattern, category) != category:
+            raise ValueError(
+                f"Found the same pattern **{pattern}** mapping to more than one "
+                f"category **{ {self.pattern_category_map_dict[pattern], category} }**"
+            )
+
+    def add(self, pattern: str, category: str) -> bool:
+        """Adds a pattern -> category mapping. Returns False if it already existed"""
+        self.verify_pattern_can_map_to_category(pattern, category)
+        if pattern in self.pattern_category_map_dict:
+            return False
+        self.pattern_category_map_dict[pattern] = category
+        self.pattern_index.add_pattern(pattern)
+        return True
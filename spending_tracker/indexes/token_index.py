@@ -0,0 +1,80 @@
+import bisect
+import re
+from collections import defaultdict
+
+import pandas as pd
+
+# runs of letters and digits, so `chase_debit_2022_1_UBER EATS` is split on the
+# underscores too
+TOKEN_PATTERN = re.compile(r"[^\W_]+")
+
+
+class TokenIndex:
+
+    """Inverted index from the lower-cased tokens of the transactions' text
+    columns to the distinct column values containing them.
+
+    A search token matches every indexed token it is a prefix of (indexed tokens
+    are kept sorted, so that's a binary search), and a row is found if each
+    search token matches one of its values. Values are indexed once however many
+    rows share them; rows are then found with one vectorized isin per column.
+    Rows whose values changed must be passed to update.
+    """
+
+    def __init__(self, transactions: pd.DataFrame, columns: list):
+        self.transactions = transactions
+        self.columns = columns
+        # token -> (column, value) pairs whose value contains it
+        self.token_values = defaultdict(set)
+        for column in columns:
+            for value in transactions[column].dropna().unique():
+                for token in self.tokenize(value):
+                    self.token_values[token].add((column, value))
+        self.sorted_tokens = sorted(self.token_values)
+
+    def __len__(self) -> int:
+        return len(self.token_values)
+
+    @staticmethod
+    def tokenize(text: str) -> list:
+        return TOKEN_PATTERN.findall(str(text).lower())
+
+    def add_value(self, column: str, value) -> None:
+        for token in self.tokenize(value):
+            if token not in self.token_values:
+                bisect.insort(self.sorted_tokens, token)
+            self.token_values[token].add((column, value))
+
+    def update(self, transaction_indices) -> None:
+        """Indexes the current values of the rows. Values a row no longer has are
+        left in the index, the isin lookup doesn't find the row through them"""
+        for column in self.columns:
+            for value in (
+                self.transactions.loc[transaction_indices, column].dropna().unique()
+            ):
+                self.add_value(column, value)
+
+    def find_values(self, prefix: str) -> dict:
+        """Column -> indexed values containing a token starting with the prefix"""
+        values = defaultdict(set)
+        position = bisect.bisect_left(self.sorted_tokens, prefix)
+        while position < len(self.sorted_tokens) and self.sorted_tokens[
+            position
+        ].startswith(prefix):
+            for column, value in self.token_values[self.sorted_tokens[position]]:
+                values[column].add(value)
+            position += 1
+        return values
+
+    def search(self, query: str) -> pd.Index:
+        """Indices of the rows matching every token of the query, in frame order"""
+        tokens = self.tokenize(query)
+        if len(tokens) == 0:
+            return self.transactions.index[:0]
+        is_match = pd.Series(True, index=self.transactions.index)
+        for token in tokens:
+            token_is_match = pd.Series(False, index=self.transactions.index)
+            for column, values in self.find_values(token).items():
+                token_is_match |= self.transactions[column].isin(values)
+            is_match &= token_is_match
+        return self.transactions.index[is_match]
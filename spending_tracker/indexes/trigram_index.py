@@ -0,0 +1,80 @@
+import re
+from collections import defaultdict
+from functools import reduce
+
+import numpy as np
+import pandas as pd
+
+from spending_tracker.indexes.pattern_index import PatternIndex
+
+
+class TrigramIndex:
+
+    """Inverted index from the trigrams (3 character substrings) of lower-cased
+    texts to the distinct texts containing them.
+
+    Any text a regex matches must contain every trigram of the regex's mandatory
+    literals (see PatternIndex.extract_mandatory_literals), so intersecting
+    their posting lists narrows the texts the regex has to be run on. Regexes
+    without a literal of 3 or more characters are run on every distinct text.
+    """
+
+    def __init__(self, texts: pd.Series):
+        self.index = texts.index
+        # code of each text's distinct lower-cased value, -1 for missing texts
+        self.codes, unique_texts = pd.factorize(texts.astype(object).str.lower())
+        self.unique_texts = list(unique_texts)
+        postings = defaultdict(list)
+        for text_id, text in enumerate(self.unique_texts):
+            for trigram in self.get_trigrams(text):
+                postings[trigram].append(text_id)
+        self.postings = {
+            trigram: np.array(text_ids, dtype="int32")
+            for trigram, text_ids in postings.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.unique_texts)
+
+    @staticmethod
+    def get_trigrams(text: str) -> set:
+        return {text[i : i + 3] for i in range(len(text) - 2)}
+
+    def find_candidate_text_ids(self, pattern: str) -> np.ndarray:
+        """Ids of the distinct texts the pattern may match, ascending"""
+        trigrams = set()
+        for literal in PatternIndex.extract_mandatory_literals(pattern):
+            trigrams |= self.get_trigrams(literal)
+        if len(trigrams) == 0:
+            return np.arange(len(self.unique_texts), dtype="int32")
+        empty_posting = np.array([], dtype="int32")
+        postings = sorted(
+            (self.postings.get(trigram, empty_posting) for trigram in trigrams),
+            key=len,
+        )
+        return reduce(
+            lambda text_ids, posting: np.intersect1d(
+                text_ids, posting, assume_unique=True
+            ),
+            postings[1:],
+            postings[0],
+        )
+
+    def find_matching_text_ids(self, pattern: str) -> np.ndarray:
+        """Ids of the distinct texts the pattern matches"""
+        compiled_pattern = re.compile(pattern)
+        return np.array(
+            [
+                text_id
+                for text_id in self.find_candidate_text_ids(pattern)
+                if compiled_pattern.search(self.unique_texts[text_id]) is not None
+            ],
+            dtype="int32",
+        )
+
+    def find_matches(self, pattern: str) -> pd.Series:
+        """Whether the pattern matches each text, indexed like the texts"""
+        return pd.Series(
+            np.isin(self.codes, self.find_matching_text_ids(pattern)),
+            index=self.index,
+        )
@@ -1,43 +1,184 @@
+import argparse
 import os
 
-import pandas as pd
-from dependency_injector.wiring import Provide, inject
+# only lightweight modules are imported at startup, pandas and the engines are
+# imported when the container is created or a command prints DataFrames
+CONFIG_FILE_PATH = "./spending_tracker/config.yaml"
 
-from spending_tracker.containers.container import Container
-from spending_tracker.engines.analytics_engine import AnalyticsEngine
-from spending_tracker.engines.categorization_engine import CategorizationEngine
-from spending_tracker.engines.raw_data_processing_engine import RawDataProcessingEngine
 
-pd.set_option("display.max_rows", 10000)
+def create_container():
+    """Container with config loaded. Engines are only constructed when first
+    requested from it"""
+    from spending_tracker.containers.container import Container
+    from spending_tracker.utils.config_cache import load_config
 
+    container = Container()
+    container.config.root_data_folder_path.from_env(
+        "SPENDING_TRACKER_DATA_PATH",
+        f"{os.path.expanduser('~') + '/spending_tracker_data'}",
+        required=True,
+    )
+    container.config.from_dict(load_config(CONFIG_FILE_PATH))
+    return container
 
-@inject
-def main(
-    raw_data_processing_engine: RawDataProcessingEngine = Provide[
-        Container.raw_data_processing_engine
-    ],
-    categorization_engine: CategorizationEngine = Provide[
-        Container.categorization_engine
-    ],
-    analytics_engine: AnalyticsEngine = Provide[Container.analytics_engine],
-) -> None:
-    raw_data_processing_engine.process_raw_data_files()
 
-    categorization_engine.load_data_to_categorize()
-    categorization_engine.run_categorization_TUI()
+def set_pandas_display_options() -> None:
+    """For the commands printing DataFrames, imports pandas"""
+    import pandas as pd
+
+    pd.set_option("display.max_rows", 10000)
+
+
+def ingest(container, arguments) -> None:
+    container.raw_data_processing_engine().process_raw_data_files()
+
+
+def categorize(container, arguments) -> None:
+    set_pandas_display_options()
+    categorization_engine = container.categorization_engine()
+    if arguments.non_interactive:
+        categorization_engine.run_batch_categorization()
+    else:
+        categorization_engine.load_data_to_categorize()
+        categorization_engine.run_categorization_TUI()
+
 
+def report(container, arguments) -> None:
+    set_pandas_display_options()
+    analytics_engine = container.analytics_engine()
     analytics_engine.load_categorized_transactions()
     analytics_engine.analyze_categorized_transactions()
 
 
-if __name__ == "__main__":
-    container = Container()
-    container.config.root_data_folder_path.from_env(
-        "SPENDING_TRACKER_DATA_PATH",
-        f"{os.path.expanduser('~') + '/spending_tracker_data'}",
-        required=True,
+def memory_report(container, arguments) -> None:
+    set_pandas_display_options()
+    categorization_engine = container.categorization_engine()
+    categorization_engine.load_data_to_categorize()
+    categorization_engine.print_memory_report()
+
+
+def run_all(container, arguments) -> None:
+    """Default when no subcommand is given: ingest -> TUI -> report"""
+    ingest(container, arguments)
+    categorize(container, arguments)
+    report(container, arguments)
+
+
+def migrate_ids(container, arguments) -> None:
+    container.categorization_engine().migrate_historical_transaction_ids(
+        arguments.scheme
     )
-    container.config.from_yaml("./spending_tracker/config.yaml")
-    container.wire(modules=[__name__])
 
+
+def csv_bridge(container, arguments) -> None:
+    categorization_engine = container.categorization_engine()
+    if arguments.direction == "export":
+        categorization_engine.export_categorized_transactions_to_csv()
+    else:
+        categorization_engine.import_categorized_transactions_from_csv()
+
+
+def run_command_with_profiling(container, arguments) -> None:
+    container.config.profile.from_value(True)
+    stage_profiler = container.stage_profiler()
+    write_chrome_trace = (arguments.profile_output or "").endswith(".json")
+    if arguments.profile_output is not None and not write_chrome_trace:
+        import cProfile
+
+        profile = cProfile.Profile()
+        profile.enable()
+    try:
+        arguments.command(container, arguments)
+    finally:
+        print(stage_profiler.format_summary())
+        if write_chrome_trace:
+            stage_profiler.write_chrome_trace(arguments.profile_output)
+        elif arguments.profile_output is not None:
+            profile.disable()
+            profile.dump_stats(arguments.profile_output)
+        if arguments.profile_output is not None:
+            print(f"Profile written to {arguments.profile_output}")
+
+
+def create_argument_parser() -> argparse.ArgumentParser:
+    argument_parser = argparse.ArgumentParser(
+        prog="python3 -m spending_tracker.main",
+        description="Without a subcommand, processes new raw files, opens the "
+        "categorization TUI and prints the report.",
+    )
+    argument_parser.set_defaults(command=run_all, non_interactive=False)
+    argument_parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="print the time, rows and peak RSS of each stage when done",
+    )
+    argument_parser.add_argument(
+        "--profile-output",
+        metavar="PATH",
+        help="with --profile, also write a Chrome trace-event file if PATH ends "
+        "with .json, else a cProfile stats file (e.g. profile.pstats)",
+    )
+    subparsers = argument_parser.add_subparsers(title="subcommands")
+
+    subparsers.add_parser(
+        "ingest", help="process new or modified raw files"
+    ).set_defaults(command=ingest)
+
+    categorize_parser = subparsers.add_parser(
+        "categorize", help="categorize processed transactions"
+    )
+    categorize_parser.add_argument(
+        "--non-interactive",
+        action="store_true",
+        help="apply existing patterns to new transactions and save, no TUI",
+    )
+    categorize_parser.set_defaults(command=categorize)
+
+    subparsers.add_parser(
+        "tui", help="categorize processed transactions interactively"
+    ).set_defaults(command=categorize, non_interactive=False)
+
+    subparsers.add_parser("report", help="print spending by category").set_defaults(
+        command=report
+    )
+
+    subparsers.add_parser(
+        "memory-report",
+        help="print the memory used by the loaded transactions per column",
+    ).set_defaults(command=memory_report)
+
+    migrate_ids_parser = subparsers.add_parser(
+        "migrate-ids",
+        help="rewrite the ids of categorized transactions to another id scheme",
+    )
+    # legacy ids can only be generated from raw files, on ingest
+    migrate_ids_parser.add_argument(
+        "--scheme", choices=["canonical"], default="canonical"
+    )
+    migrate_ids_parser.set_defaults(command=migrate_ids)
+
+    csv_bridge_parser = subparsers.add_parser(
+        "csv-bridge",
+        help="export categorized transactions to categorized_transactions.csv for "
+        "editing by hand, or import the edited csv back into the configured "
+        "storage format",
+    )
+    csv_bridge_parser.add_argument("direction", choices=["export", "import"])
+    csv_bridge_parser.set_defaults(command=csv_bridge)
+    return argument_parser
+
+
+def main(argv=None) -> None:
+    argument_parser = create_argument_parser()
+    arguments = argument_parser.parse_args(argv)
+    if arguments.profile_output is not None and not arguments.profile:
+        argument_parser.error("--profile-output requires --profile")
+    container = create_container()
+    if arguments.profile:
+        run_command_with_profiling(container, arguments)
+    else:
+        arguments.command(container, arguments)
+
+
+if __name__ == "__main__":
     main()
@@ -0,0 +1,61 @@
+import datetime
+import json
+import os
+
+
+class CategorizationJournal:
+
+    """Write-ahead journal of the categorization edits made in the TUI.
+
+    Each edit is appended as one JSON line (transaction id, category, pattern,
+    timestamp) and flushed to disk before it is applied, so edits survive Ctrl-C
+    or a crash. Unsaved edits are replayed on the next launch and the journal is
+    cleared once they are saved into the categorized transactions file.
+    """
+
+    def __init__(self, root_data_folder_path: str):
+        self.journal_file_path = (
+            root_data_folder_path.rstrip("/") + "/categorization_journal.jsonl"
+        )
+
+    def append(self, transaction_id: str, category, pattern=None) -> None:
+        self.append_many([transaction_id], category, pattern)
+
+    def append_many(self, transaction_ids, category, pattern=None) -> None:
+        """One event per transaction, written and flushed at once"""
+        timestamp = datetime.datetime.now().isoformat(timespec="seconds")
+        with open(self.journal_file_path, "a") as journal_file:
+            journal_file.write(
+                "".join(
+                    json.dumps(
+                        {
+                            "id": transaction_id,
+                            "category": category,
+                            "pattern": pattern,
+                            "timestamp": timestamp,
+                        }
+                    )
+                    + "\n"
+                    for transaction_id in transaction_ids
+                )
+            )
+            journal_file.flush()
+            os.fsync(journal_file.fileno())
+
+    def read(self) -> list[dict]:
+        """Events in the order they were made. A last line cut short by an
+        interrupted write is ignored"""
+        if not os.path.isfile(self.journal_file_path):
+            return []
+        events = []
+        with open(self.journal_file_path) as journal_file:
+            for line in journal_file:
+                try:
+                    events.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+        return events
+
+    def clear(self) -> None:
+        if os.path.isfile(self.journal_file_path):
+            os.remove(self.journal_file_path)
@@ -0,0 +1,227 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from spending_tracker.indexes.pattern_index import PatternIndex
+
+
+class PatternMatchMatrix:
+
+    """Sparse boolean matrix of which patterns match which notes, kept between
+    runs as a cache: validation doesn't rely on it.
+
+    Rows are the distinct lower-cased notes (patterns are matched against the
+    lower-cased note), columns the patterns, both numbered in order of arrival.
+    A new note only has its row computed, with one PatternIndex pass over the
+    known patterns, and a new pattern only its column, with one regex scan over
+    the known notes. Longest matches and the rows a new pattern applies to are
+    then lookups. Saving keeps only the current notes and patterns.
+    """
+
+    # bumped when the matrix file's layout changes
+    VERSION = 1
+
+    def __init__(self, root_data_folder_path: str):
+        self.matrix_file_path = (
+            root_data_folder_path.rstrip("/") + "/pattern_match_matrix.npz"
+        )
+        self.notes = []
+        self.note_ids = {}
+        # a pattern's id is its position in the index
+        self.pattern_index = PatternIndex()
+        # note id -> ids of the patterns matching it, and pattern id -> note ids
+        self.note_pattern_ids = []
+        self.pattern_note_ids = []
+        self.is_loaded = False
+        self.is_dirty = False
+
+    def __len__(self) -> int:
+        return len(self.notes)
+
+    def load(self) -> None:
+        """Rows are stored in compressed sparse row form, columns rebuilt from them.
+        A matrix that is missing, of another version or inconsistent is dropped"""
+        try:
+            with np.load(self.matrix_file_path, allow_pickle=False) as matrix_file:
+                vocabulary = json.loads(matrix_file["vocabulary"].tobytes())
+                indptr = matrix_file["indptr"]
+                indices = matrix_file["indices"]
+            if vocabulary["version"] != self.VERSION:
+                raise ValueError("Pattern match matrix of another version")
+            notes, patterns = vocabulary["notes"], vocabulary["patterns"]
+            if (
+                len(indptr) != len(notes) + 1
+                or indptr[0] != 0
+                or indptr[-1] != len(indices)
+                or (np.diff(indptr) < 0).any()
+                or ((indices < 0) | (indices >= len(patterns))).any()
+            ):
+                raise ValueError("Corrupt pattern match matrix")
+            indices = indices.tolist()
+            note_pattern_ids = [
+                indices[start:end] for start, end in zip(indptr[:-1], indptr[1:])
+            ]
+        except Exception:  # missing, incompatible or corrupt matrix
+            notes, patterns, note_pattern_ids = [], [], []
+        self.set_rows(notes, patterns, note_pattern_ids)
+        self.is_loaded = True
+
+    def set_rows(self, notes: list, patterns: list, note_pattern_ids: list) -> None:
+        self.notes = notes
+        self.note_ids = {note: note_id for note_id, note in enumerate(notes)}
+        self.pattern_index = PatternIndex(patterns)
+        self.note_pattern_ids = note_pattern_ids
+        self.pattern_note_ids = [[] for _ in patterns]
+        for note_id, pattern_ids in enumerate(note_pattern_ids):
+            for pattern_id in pattern_ids:
+                self.pattern_note_ids[pattern_id].append(note_id)
+
+    def compact(self, notes: pd.Series, pattern_index: PatternIndex) -> None:
+        """Drops the rows of notes not among the given ones and the columns of
+        patterns not in the index, so they cost nothing in later runs"""
+        if not self.is_loaded:
+            self.load()
+        kept_note_ids = sorted(
+            self.note_ids[note]
+            for note in notes.astype(object).str.lower().dropna().unique()
+            if note in self.note_ids
+        )
+        kept_pattern_ids = sorted(
+            self.pattern_index.pattern_positions[pattern]
+            for pattern, _ in pattern_index.patterns
+            if pattern in self.pattern_index
+        )
+        if len(kept_note_ids) == len(self.notes) and len(kept_pattern_ids) == len(
+            self.pattern_index
+        ):
+            return
+        new_pattern_ids = {
+            pattern_id: new_pattern_id
+            for new_pattern_id, pattern_id in enumerate(kept_pattern_ids)
+        }
+        self.set_rows(
+            [self.notes[note_id] for note_id in kept_note_ids],
+            [self.pattern_index.patterns[i][0] for i in kept_pattern_ids],
+            [
+                [
+                    new_pattern_ids[pattern_id]
+                    for pattern_id in self.note_pattern_ids[note_id]
+                    if pattern_id in new_pattern_ids
+                ]
+                for note_id in kept_note_ids
+            ],
+        )
+        self.is_dirty = True
+
+    def save(self, notes: pd.Series, pattern_index: PatternIndex) -> None:
+        """Compacts the matrix to the current notes and patterns and writes it as
+        npz arrays, with the notes and patterns as a JSON vocabulary"""
+        self.compact(notes, pattern_index)
+        if not self.is_dirty:
+            return
+        indptr = np.zeros(len(self.notes) + 1, dtype="int64")
+        np.cumsum([len(ids) for ids in self.note_pattern_ids], out=indptr[1:])
+        indices = np.fromiter(
+            (id_ for ids in self.note_pattern_ids for id_ in ids),
+            dtype="int32",
+            count=indptr[-1],
+        )
+        vocabulary = {
+            "version": self.VERSION,
+            "notes": self.notes,
+            "patterns": [pattern for pattern, _ in self.pattern_index.patterns],
+        }
+        temporary_file_path = self.matrix_file_path + ".tmp"
+        with open(temporary_file_path, "wb") as f:
+            np.savez(
+                f,
+                vocabulary=np.frombuffer(json.dumps(vocabulary).encode(), "uint8"),
+                indptr=indptr,
+                indices=indices,
+            )
+        os.replace(temporary_file_path, self.matrix_file_path)
+        self.is_dirty = False
+
+    def add_note(self, note: str) -> int:
+        """Returns the note's id, computing its row if it's new"""
+        if not self.is_loaded:
+            self.load()
+        if note in self.note_ids:
+            return self.note_ids[note]
+        note_id = len(self.notes)
+        self.notes.append(note)
+        self.note_ids[note] = note_id
+        pattern_ids = [
+            self.pattern_index.pattern_positions[pattern]
+            for pattern in self.pattern_index.find_matching_patterns(note)
+        ]
+        self.note_pattern_ids.append(pattern_ids)
+        for pattern_id in pattern_ids:
+            self.pattern_note_ids[pattern_id].append(note_id)
+        self.is_dirty = True
+        return note_id
+
+    def add_pattern(self, pattern: str) -> int:
+        """Returns the pattern's id, computing its column if it's new. Raises
+        re.error for invalid patterns"""
+        if not self.is_loaded:
+            self.load()
+        if pattern in self.pattern_index:
+            return self.pattern_index.pattern_positions[pattern]
+        self.pattern_index.add_pattern(pattern)
+        pattern_id = len(self.pattern_index) - 1
+        compiled_pattern = self.pattern_index.patterns[pattern_id][1]
+        note_ids = [
+            note_id
+            for note_id, note in enumerate(self.notes)
+            if compiled_pattern.search(note) is not None
+        ]
+        self.pattern_note_ids.append(note_ids)
+        for note_id in note_ids:
+            self.note_pattern_ids[note_id].append(pattern_id)
+        self.is_dirty = True
+        return pattern_id
+
+    def factorize_notes(self, notes: pd.Series) -> tuple:
+        """Codes of the notes' distinct lower-cased values (-1 for missing notes)
+        and the id of each distinct value"""
+        codes, unique_notes = pd.factorize(notes.astype(object).str.lower())
+        return codes, [self.add_note(note) for note in unique_notes]
+
+    def find_longest_matching_patterns(
+        self, notes: pd.Series, pattern_index: PatternIndex
+    ) -> pd.Series:
+        """Longest of the index's patterns matching each note (None if none),
+        indexed like notes. Ties go to the pattern added first to the index"""
+        for pattern, _ in pattern_index.patterns:
+            self.add_pattern(pattern)
+        codes, note_ids = self.factorize_notes(notes)
+        pattern_positions = pattern_index.pattern_positions
+        matrix_patterns = self.pattern_index.patterns
+        # missing notes have code -1, i.e. take the trailing None
+        unique_patterns = np.empty(len(note_ids) + 1, dtype=object)
+        for i, note_id in enumerate(note_ids):
+            # the matrix can hold patterns the index doesn't have
+            matching_patterns = [
+                matrix_patterns[pattern_id][0]
+                for pattern_id in self.note_pattern_ids[note_id]
+                if matrix_patterns[pattern_id][0] in pattern_positions
+            ]
+            if len(matching_patterns) > 0:
+                unique_patterns[i] = min(
+                    matching_patterns,
+                    key=lambda pattern: (-len(pattern), pattern_positions[pattern]),
+                )
+        return pd.Series(unique_patterns.take(codes), index=notes.index, dtype=object)
+
+    def find_matching_notes(self, pattern: str, notes: pd.Series) -> pd.Series:
+        """Whether the pattern matches each of the notes, indexed like notes"""
+        pattern_id = self.add_pattern(pattern)
+        codes, note_ids = self.factorize_notes(notes)
+        matching_note_ids = set(self.pattern_note_ids[pattern_id])
+        unique_matches = np.array(
+            [note_id in matching_note_ids for note_id in note_ids] + [False]
+        )
+        return pd.Series(unique_matches.take(codes), index=notes.index, dtype=bool)
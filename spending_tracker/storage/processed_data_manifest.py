@@ -0,0 +1,65 @@
+import hashlib
+import json
+import os
+
+
+class ProcessedDataManifest:
+
+    """Keeps track of which raw file each processed output was built from.
+
+    Each raw file is recorded with a cache key made of its content hash, account
+    format and the parser version/settings used. A raw file whose key didn't
+    change doesn't need to be processed again. The raw file's size and mtime are
+    recorded too, so unchanged files are recognized without re-hashing them.
+    """
+
+    def __init__(self, manifest_file_path: str):
+        self.manifest_file_path = manifest_file_path
+        if os.path.isfile(self.manifest_file_path):
+            with open(self.manifest_file_path) as manifest_file:
+                self.entries = json.load(manifest_file)
+        else:
+            self.entries = {}
+
+    def raw_data_file_names(self) -> list:
+        return list(self.entries)
+
+    @staticmethod
+    def hash_file_content(file_path: str) -> str:
+        file_hash = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                file_hash.update(block)
+        return file_hash.hexdigest()
+
+    def get_cache_key(self, raw_data_file_path: str, **processing_settings) -> dict:
+        """Cache key of a raw file. Content is only hashed if the file's size or
+        mtime differ from the recorded ones"""
+        file_stat = os.stat(raw_data_file_path)
+        file_signature = [file_stat.st_size, file_stat.st_mtime_ns]
+        entry = self.entries.get(os.path.basename(raw_data_file_path))
+        if entry is not None and entry["file_signature"] == file_signature:
+            content_hash = entry["cache_key"]["content_hash"]
+        else:
+            content_hash = self.hash_file_content(raw_data_file_path)
+        return {
+            "file_signature": file_signature,
+            "cache_key": {"content_hash": content_hash, **processing_settings},
+        }
+
+    def is_up_to_date(self, raw_data_file_name: str, cache_key: dict) -> bool:
+        entry = self.entries.get(raw_data_file_name)
+        return entry is not None and entry["cache_key"] == cache_key["cache_key"]
+
+    def update(self, raw_data_file_name: str, cache_key: dict) -> None:
+        self.entries[raw_data_file_name] = cache_key
+
+    def remove(self, raw_data_file_name: str) -> None:
+        self.entries.pop(raw_data_file_name, None)
+
+    def save(self) -> None:
+        """Atomic write so an interrupted run never leaves a corrupt manifest"""
+        temporary_file_path = self.manifest_file_path + ".tmp"
+        with open(temporary_file_path, "w") as manifest_file:
+            json.dump(self.entries, manifest_file, indent=2, sort_keys=True)
+        os.replace(temporary_file_path, self.manifest_file_path)
@@ -0,0 +1,268 @@
+import functools
+import glob
+import operator
+import os
+import re
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+# partition files of raw files appended in chunks are named
+# <raw data file stem>.chunk-<chunk number><extension>
+CHUNK_FILE_SUFFIX = ".chunk-{:06d}"
+CHUNK_FILE_SUFFIX_PATTERN = re.compile(r"\.chunk-\d{6}$")
+# processed transaction columns, partition files are cast to these types when
+# read as one dataset
+PROCESSED_DATA_SCHEMA = pa.schema(
+    [
+        ("datetime", pa.timestamp("ns")),
+        ("amount_cents", pa.int64()),
+        ("account", pa.string()),
+        ("third_party_category", pa.string()),
+        ("note", pa.string()),
+        ("id", pa.string()),
+    ]
+)
+# the account=<account>/month=<YYYY-MM> partition folders
+PARTITIONING = ds.partitioning(
+    pa.schema([("account", pa.string()), ("month", pa.string())]), flavor="hive"
+)
+
+
+class ProcessedTransactionStore:
+
+    """Consolidated, append-only store of all processed transactions.
+
+    Transactions are partitioned by account and month:
+
+        processed/account=<account>/month=<YYYY-MM>/<raw data file stem><extension>
+
+    The ids of each raw file are written to processed/.transaction_ids/<raw data
+    file name> *after* its partitions. That file marks the raw file as committed,
+    so partition files of an interrupted append are ignored and cleaned up, and
+    together these files form the id index used to reject duplicate ids when
+    appending instead of re-scanning the whole history on every load.
+
+    Large raw files can be appended chunk by chunk, each chunk getting its own
+    partition files, and are committed once the last chunk is written.
+    """
+
+    def __init__(self, root_data_folder_path: str, transaction_storage):
+        self.root_data_folder_path = root_data_folder_path.rstrip("/") + "/"
+        self.processed_data_folder_path = self.root_data_folder_path + "processed/"
+        self.transaction_ids_folder_path = (
+            self.processed_data_folder_path + ".transaction_ids/"
+        )
+        self.transaction_storage = transaction_storage
+        self.id_index = None
+
+    def __getstate__(self) -> dict:
+        # don't ship the (large) id index to raw data processing worker processes
+        return {**self.__dict__, "id_index": None}
+
+    def raw_data_file_names(self) -> list:
+        """Raw files whose transactions were committed to the store"""
+        if not os.path.isdir(self.transaction_ids_folder_path):
+            return []
+        return sorted(os.listdir(self.transaction_ids_folder_path))
+
+    def get_partition_file_paths_by_stem(self) -> dict:
+        """Raw data file stem -> its partition files, committed or not, from a
+        single listing of the partition folders"""
+        partition_file_paths_by_stem = {}
+        for partition_file_path in sorted(
+            glob.glob(self.processed_data_folder_path + "account=*/month=*/*")
+        ):
+            stem = CHUNK_FILE_SUFFIX_PATTERN.sub(
+                "", os.path.splitext(os.path.basename(partition_file_path))[0]
+            )
+            partition_file_paths_by_stem.setdefault(stem, []).append(
+                partition_file_path
+            )
+        return partition_file_paths_by_stem
+
+    def get_partition_file_paths(self) -> list:
+        """Partition files of committed raw files (nothing is read)"""
+        committed_stems = {
+            os.path.splitext(raw_data_file_name)[0]
+            for raw_data_file_name in self.raw_data_file_names()
+        }
+        return sorted(
+            partition_file_path
+            for stem, partition_file_paths in (
+                self.get_partition_file_paths_by_stem().items()
+            )
+            if stem in committed_stems
+            for partition_file_path in partition_file_paths
+            if partition_file_path.endswith(self.transaction_storage.file_extension)
+        )
+
+    def load_id_index(self) -> dict:
+        """id -> raw data file name, over every committed raw file"""
+        if self.id_index is None:
+            self.id_index = {}
+            for raw_data_file_name in self.raw_data_file_names():
+                with open(self.transaction_ids_folder_path + raw_data_file_name) as f:
+                    for transaction_id in f.read().split():
+                        self.id_index[transaction_id] = raw_data_file_name
+        return self.id_index
+
+    def append(self, raw_data_file_name: str, processed_data: pd.DataFrame) -> None:
+        """Adds the transactions of a raw file as new partition files"""
+        self.verify_no_duplicate_ids(raw_data_file_name, processed_data)
+        self.write_partitions(processed_data, os.path.splitext(raw_data_file_name)[0])
+        self.commit(raw_data_file_name, processed_data["id"])
+
+    def append_chunks(self, raw_data_file_name: str, processed_data_chunks) -> None:
+        """Adds the transactions of a raw file given as an iterable of chunks.
+        Each chunk is written as soon as it's produced, so only one chunk (and
+        the ids) is held in memory at a time"""
+        stem = os.path.splitext(raw_data_file_name)[0]
+        transaction_ids = []
+        try:
+            for chunk_number, processed_data in enumerate(processed_data_chunks):
+                self.verify_no_duplicate_ids(raw_data_file_name, processed_data)
+                self.write_partitions(
+                    processed_data, stem + CHUNK_FILE_SUFFIX.format(chunk_number)
+                )
+                # so that later chunks are checked against this one
+                for transaction_id in processed_data["id"]:
+                    self.id_index[transaction_id] = raw_data_file_name
+                transaction_ids.extend(processed_data["id"])
+        except BaseException:
+            # drop the ids of the uncommitted chunks
+            self.id_index = None
+            raise
+        self.commit(raw_data_file_name, transaction_ids)
+
+    def verify_no_duplicate_ids(
+        self, raw_data_file_name: str, processed_data: pd.DataFrame
+    ) -> None:
+        id_index = self.load_id_index()
+        duplicate_ids = processed_data["id"][
+            processed_data["id"].duplicated(keep=False)
+            | processed_data["id"].isin(id_index.keys())
+        ]
+        if len(duplicate_ids) > 0:
+            raise ValueError(
+                f"Found duplicate ID(s) in {raw_data_file_name}:\n "
+                f"{processed_data[processed_data['id'].isin(duplicate_ids)]}\n"
+                f"Already stored from: "
+                f"{sorted({id_index[i] for i in duplicate_ids if i in id_index})}"
+            )
+
+    def write_partitions(self, processed_data: pd.DataFrame, file_stem: str) -> None:
+        months = processed_data["datetime"].dt.strftime("%Y-%m")
+        for (account, month), partition in processed_data.groupby(
+            [processed_data["account"], months], sort=True, observed=True, dropna=False
+        ):
+            partition_folder_path = (
+                f"{self.processed_data_folder_path}account={account}/month={month}/"
+            )
+            os.makedirs(partition_folder_path, exist_ok=True)
+            self.transaction_storage.write(
+                partition,
+                partition_folder_path
+                + file_stem
+                + self.transaction_storage.file_extension,
+            )
+
+    def commit(self, raw_data_file_name: str, transaction_ids) -> None:
+        """Writes the ids file of the raw file, after which its partition files
+        are part of the store"""
+        os.makedirs(self.transaction_ids_folder_path, exist_ok=True)
+        with open(self.transaction_ids_folder_path + raw_data_file_name, "w") as f:
+            f.write("\n".join(transaction_ids))
+        id_index = self.load_id_index()
+        for transaction_id in transaction_ids:
+            id_index[transaction_id] = raw_data_file_name
+
+    def remove(self, raw_data_file_names: list) -> None:
+        """Deletes the transactions of raw files: their ids files, then their
+        partition files, found with one listing of the partition folders"""
+        committed_raw_data_file_names = set(self.raw_data_file_names())
+        for raw_data_file_name in raw_data_file_names:
+            if raw_data_file_name in committed_raw_data_file_names:
+                os.remove(self.transaction_ids_folder_path + raw_data_file_name)
+        self.id_index = None
+        removed_stems = {
+            os.path.splitext(raw_data_file_name)[0]
+            for raw_data_file_name in raw_data_file_names
+        }
+        self.remove_partition_files(
+            partition_file_path
+            for stem, partition_file_paths in (
+                self.get_partition_file_paths_by_stem().items()
+            )
+            if stem in removed_stems
+            for partition_file_path in partition_file_paths
+        )
+
+    def remove_uncommitted_partition_files(self) -> None:
+        """Partition files without transaction ids file are leftovers of removed
+        raw files or of interrupted appends"""
+        committed_stems = {
+            os.path.splitext(raw_data_file_name)[0]
+            for raw_data_file_name in self.raw_data_file_names()
+        }
+        self.remove_partition_files(
+            partition_file_path
+            for stem, partition_file_paths in (
+                self.get_partition_file_paths_by_stem().items()
+            )
+            if stem not in committed_stems
+            for partition_file_path in partition_file_paths
+        )
+
+    @staticmethod
+    def remove_partition_files(partition_file_paths) -> None:
+        """Deletes the files, then their month and account folders left empty"""
+        partition_folder_paths = set()
+        for partition_file_path in partition_file_paths:
+            os.remove(partition_file_path)
+            partition_folder_paths.add(os.path.dirname(partition_file_path))
+        for partition_folder_path in sorted(partition_folder_paths):
+            for folder_path in [
+                partition_folder_path,
+                os.path.dirname(partition_folder_path),
+            ]:
+                if os.path.isdir(folder_path) and len(os.listdir(folder_path)) == 0:
+                    os.rmdir(folder_path)
+
+    def load(self, accounts=None, from_date=None, to_date=None) -> pd.DataFrame:
+        """Reads the committed partition files as one pyarrow dataset, converted
+        to pandas once. Account and date predicates are pushed down as a dataset
+        filter: partitions are pruned on their account and month folder names
+        and only then are rows filtered on datetime"""
+        partition_file_paths = self.get_partition_file_paths()
+        if len(partition_file_paths) == 0:
+            return pd.DataFrame(columns=PROCESSED_DATA_SCHEMA.names)
+        predicates = []
+        if accounts is not None:
+            predicates.append(ds.field("account").isin(list(accounts)))
+        if from_date is not None:
+            from_date = pd.Timestamp(from_date)
+            predicates += [
+                ds.field("month") >= from_date.strftime("%Y-%m"),
+                ds.field("datetime") >= pa.scalar(from_date, pa.timestamp("ns")),
+            ]
+        if to_date is not None:
+            to_date = pd.Timestamp(to_date)
+            predicates += [
+                ds.field("month") <= to_date.strftime("%Y-%m"),
+                ds.field("datetime") <= pa.scalar(to_date, pa.timestamp("ns")),
+            ]
+        dataset = ds.dataset(
+            partition_file_paths,
+            schema=PROCESSED_DATA_SCHEMA.append(pa.field("month", pa.string())),
+            format=self.transaction_storage.get_dataset_format(PROCESSED_DATA_SCHEMA),
+            partitioning=PARTITIONING,
+            partition_base_dir=self.processed_data_folder_path,
+        )
+        processed_data = dataset.to_table(
+            columns=PROCESSED_DATA_SCHEMA.names,
+            filter=functools.reduce(operator.and_, predicates) if predicates else None,
+        ).to_pandas()
+        processed_data["account"] = processed_data["account"].astype("category")
+        return processed_data
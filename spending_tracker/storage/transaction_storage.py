@@ -0,0 +1,121 @@
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv
+import pyarrow.dataset as ds
+
+# strings read_csv reads as NaN by default, read as nulls in csv datasets too
+CSV_NULL_VALUES = [
+    "",
+    "#N/A",
+    "#N/A N/A",
+    "#NA",
+    "-1.#IND",
+    "-1.#QNAN",
+    "-NaN",
+    "-nan",
+    "1.#IND",
+    "1.#QNAN",
+    "<NA>",
+    "N/A",
+    "NA",
+    "NULL",
+    "NaN",
+    "None",
+    "n/a",
+    "nan",
+    "null",
+]
+
+
+class CsvTransactionStorage:
+
+    """Plain text storage, easy to inspect and edit by hand. Dates are re-parsed
+    and dtypes re-inferred every time a file is read"""
+
+    storage_format = "csv"
+    file_extension = ".csv"
+
+    @staticmethod
+    def read(file_path: str) -> pd.DataFrame:
+        return pd.read_csv(
+            file_path, index_col=None, header=0, parse_dates=["datetime"]
+        )
+
+    @staticmethod
+    def write(transactions: pd.DataFrame, file_path: str) -> None:
+        transactions.to_csv(file_path, index=False)
+
+    @staticmethod
+    def get_dataset_format(schema: pa.Schema) -> ds.FileFormat:
+        """For reading many files as one pyarrow dataset. Column types are given
+        rather than inferred per file"""
+        return ds.CsvFileFormat(
+            convert_options=pyarrow.csv.ConvertOptions(
+                column_types=schema,
+                null_values=CSV_NULL_VALUES,
+                strings_can_be_null=True,
+            )
+        )
+
+
+class ParquetTransactionStorage:
+
+    """Columnar binary storage keeping dtypes (datetime64, float, categorical
+    account), so nothing is parsed when reading"""
+
+    storage_format = "parquet"
+    file_extension = ".parquet"
+
+    @staticmethod
+    def read(file_path: str) -> pd.DataFrame:
+        return pd.read_parquet(file_path)
+
+    @staticmethod
+    def write(transactions: pd.DataFrame, file_path: str) -> None:
+        transactions.astype({"account": "category"}).to_parquet(file_path, index=False)
+
+    @staticmethod
+    def get_dataset_format(schema: pa.Schema) -> ds.FileFormat:
+        return ds.ParquetFileFormat()
+
+
+class FeatherTransactionStorage(ParquetTransactionStorage):
+
+    """Uncompressed Arrow IPC files, fastest to read at the expense of disk space"""
+
+    storage_format = "feather"
+    file_extension = ".feather"
+
+    @staticmethod
+    def read(file_path: str) -> pd.DataFrame:
+        return pd.read_feather(file_path)
+
+    @staticmethod
+    def write(transactions: pd.DataFrame, file_path: str) -> None:
+        transactions.astype({"account": "category"}).reset_index(drop=True).to_feather(
+            file_path
+        )
+
+    @staticmethod
+    def get_dataset_format(schema: pa.Schema) -> ds.FileFormat:
+        return ds.IpcFileFormat()
+
+
+TRANSACTION_STORAGES = {
+    storage.storage_format: storage
+    for storage in [
+        CsvTransactionStorage,
+        ParquetTransactionStorage,
+        FeatherTransactionStorage,
+    ]
+}
+
+
+def create_transaction_storage(storage_format: str):
+    """Storage used for processed and categorized transaction files"""
+    if storage_format not in TRANSACTION_STORAGES:
+        raise ValueError(
+            f"Unknown storage format {storage_format}. "
+            f"Must be one of {list(TRANSACTION_STORAGES)}"
+        )
+    return TRANSACTION_STORAGES[storage_format]()
@@ -0,0 +1,8 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def user_cache_folder(tmp_path, monkeypatch):
+    """Config caches written by main() go to the test's folder, not ~/.cache"""
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    return tmp_path / "cache"
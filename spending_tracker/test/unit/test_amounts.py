@@ -0,0 +1,43 @@
+import pandas as pd
+import pytest
+
+from spending_tracker.utils.amounts import (
+    convert_amounts_to_cents,
+    convert_amounts_to_dollars,
+    format_cents,
+    to_cents,
+)
+
+
+def test_to_cents_rounds_float_error_away():
+    amounts = pd.Series([0.1 + 0.2, -(12.1 + 0.97), 14.83, 3])
+    assert to_cents(amounts).tolist() == [30, -1307, 1483, 300]
+    assert to_cents(amounts).dtype == "int64"
+    assert to_cents(pd.Series([0.1] * 10)).sum() == 100
+
+
+def test_to_cents_rejects_missing_amounts():
+    with pytest.raises(ValueError, match="without amount"):
+        to_cents(pd.Series([1.0, None]))
+
+
+def test_legacy_transactions_convert_in_place():
+    legacy_transactions = pd.DataFrame(
+        {"id": ["a", "b"], "amount": [10.5, -0.07], "note": ["x", "y"]}
+    )
+    transactions = convert_amounts_to_cents(legacy_transactions)
+    assert list(transactions.columns) == ["id", "amount_cents", "note"]
+    assert transactions["amount_cents"].tolist() == [1050, -7]
+    assert convert_amounts_to_cents(transactions) is transactions
+    pd.testing.assert_frame_equal(
+        convert_amounts_to_dollars(transactions), legacy_transactions
+    )
+
+
+def test_format_cents():
+    assert [format_cents(cents) for cents in [1483, -7, 0, -100000]] == [
+        "14.83",
+        "-0.07",
+        "0.00",
+        "-1000.00",
+    ]
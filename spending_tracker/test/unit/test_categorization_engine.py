@@ -0,0 +1,146 @@
+import pandas as pd
+
+from spending_tracker.engines.categorization_engine import CategorizationEngine
+from spending_tracker.engines.data_validation_engine import DataValidationEngine
+from spending_tracker.indexes.category_tree import CategoryTree
+from spending_tracker.indexes.pattern_registry import PatternRegistry
+from spending_tracker.storage.categorization_journal import CategorizationJournal
+from spending_tracker.storage.pattern_match_matrix import PatternMatchMatrix
+from spending_tracker.storage.processed_transaction_store import (
+    ProcessedTransactionStore,
+)
+from spending_tracker.storage.transaction_storage import create_transaction_storage
+from spending_tracker.tui.transactions_window import TransactionsWindow
+
+
+def create_engine(root_data_folder_path, transactions_to_categorize, patterns=()):
+    """Engine as after load_data_to_categorize, without reading any file"""
+    root_data_folder_path = str(root_data_folder_path)
+    transaction_storage = create_transaction_storage("csv")
+    engine = CategorizationEngine(
+        root_data_folder_path,
+        transaction_storage,
+        ProcessedTransactionStore(root_data_folder_path, transaction_storage),
+        DataValidationEngine({}),
+        CategorizationJournal(root_data_folder_path),
+        PatternMatchMatrix(root_data_folder_path),
+    )
+    engine.pattern_registry = PatternRegistry(patterns)
+    engine.all_patterns = [pattern for pattern, _ in patterns]
+    engine.all_categories = sorted({category for _, category in patterns})
+    engine.category_tree = CategoryTree(engine.all_categories)
+    engine.transactions_to_categorize = transactions_to_categorize
+    return engine
+
+
+def test_rejected_journal_edits_leave_no_trace(tmp_path):
+    transactions_to_categorize = pd.DataFrame(
+        {
+            "id": ["a", "b", "c"],
+            "note": ["UBER EATS", "UBER TRIP", "NETFLIX.COM"],
+            "pattern": [None, None, "netflix"],
+            "category": [None, None, "tv"],
+            "seen": [False, False, True],
+        }
+    )
+    engine = create_engine(
+        tmp_path, transactions_to_categorize, patterns=[("netflix", "tv")]
+    )
+    engine.categorization_journal.append("a", "food/delivery", "uber eats")
+    # pattern doesn't match the note, invalid regex, pattern of another category
+    engine.categorization_journal.append("b", "travel", "lyft")
+    engine.categorization_journal.append("b", "travel", "uber(")
+    engine.categorization_journal.append("c", "movies", "netflix")
+    engine.replay_categorization_journal()
+    assert engine.transactions_to_categorize.to_dict("list") == {
+        "id": ["a", "b", "c"],
+        "note": ["UBER EATS", "UBER TRIP", "NETFLIX.COM"],
+        "pattern": ["uber eats", None, "netflix"],
+        "category": ["food/delivery", None, "tv"],
+        "seen": [True, False, True],
+    }
+    assert engine.pattern_registry.pattern_category_map_list == [
+        ("netflix", "tv"),
+        ("uber eats", "food/delivery"),
+    ]
+    assert engine.all_categories == ["tv", "food/delivery"]
+
+
+def test_new_patterns_one_at_a_time_same_as_all_patterns_at_once(tmp_path):
+    transactions_to_categorize = pd.DataFrame(
+        {
+            "id": list("abcdefg"),
+            "note": [
+                "UBER EATS",
+                "UBER TRIP",
+                "Uber Eats Pass",
+                None,
+                "NETFLIX.COM",
+                "UBER EATS",
+                "SHELL OIL",
+            ],
+            "pattern": [None, None, None, None, None, "eats", None],
+            "category": [None, None, None, None, None, "food", None],
+            "seen": [False, False, False, False, False, True, False],
+        }
+    )
+    patterns = [
+        ("uber", "travel"),
+        # longer, takes over "uber"
+        ("uber eats", "food/delivery"),
+        # same length as "uber eats" on the same notes, added later so loses
+        ("eats.pass", "food/pass"),
+        ("netflix", "tv"),
+        # shorter than "netflix", doesn't take over
+        ("\\.com", "online"),
+        # longer again, takes over on the unseen exact note but not the seen one
+        ("^uber eats$", "food/exact"),
+    ]
+    all_at_once_engine = create_engine(
+        tmp_path / "all_at_once", transactions_to_categorize.copy(), patterns
+    )
+    engine = create_engine(tmp_path / "one_at_a_time", transactions_to_categorize)
+    for pattern, category in patterns:
+        engine.pattern_registry.add(pattern, category)
+        engine.categorize_data_using_new_pattern(
+            engine.transactions_to_categorize,
+            pattern,
+            engine.transactions_to_categorize["seen"] == False,
+        )
+    all_at_once_engine.categorize_data_using_pattern_category_map(
+        all_at_once_engine.transactions_to_categorize,
+        transactions_to_categorize.index[transactions_to_categorize["seen"] == False],
+    )
+    pd.testing.assert_frame_equal(
+        engine.transactions_to_categorize,
+        all_at_once_engine.transactions_to_categorize,
+    )
+    assert engine.transactions_to_categorize["pattern"].tolist() == [
+        "^uber eats$",
+        "uber",
+        "uber eats",
+        None,
+        "netflix",
+        "eats",
+        None,
+    ]
+
+
+def test_enter_at_end_of_list_prompts_again(tmp_path, monkeypatch, capsys):
+    transactions_to_categorize = pd.DataFrame(
+        {
+            "id": ["a", "b"],
+            "note": ["UBER EATS", "NETFLIX.COM"],
+            "pattern": [None, "netflix"],
+            "category": ["food", "tv"],
+            "seen": [True, True],
+        },
+        index=[1, 0],
+    )
+    engine = create_engine(tmp_path, transactions_to_categorize)
+    engine.transactions_window = TransactionsWindow(transactions_to_categorize)
+    engine.transactions_window.toggle_only_unseen()  # no unseen rows left
+    inputs = iter(["", "1"])
+    monkeypatch.setattr("builtins.input", lambda prompt: next(inputs))
+    assert engine.get_user_input_for_transaction_index(-1) == 1
+    assert "Reached end of list" in capsys.readouterr().out
@@ -0,0 +1,27 @@
+from spending_tracker.storage.categorization_journal import CategorizationJournal
+
+
+def test_events_survive_interrupted_write(tmp_path):
+    categorization_journal = CategorizationJournal(str(tmp_path))
+    assert categorization_journal.read() == []
+    categorization_journal.append("id_1", "food", None)
+    categorization_journal.append("id_1", "food", "joe")
+    categorization_journal.append("id_2", None)
+    with open(categorization_journal.journal_file_path, "a") as journal_file:
+        journal_file.write('{"id": "id_3", "categ')  # interrupted write
+    events = CategorizationJournal(str(tmp_path)).read()
+    assert [(e["id"], e["category"], e["pattern"]) for e in events] == [
+        ("id_1", "food", None),
+        ("id_1", "food", "joe"),
+        ("id_2", None, None),
+    ]
+    categorization_journal.clear()
+    assert categorization_journal.read() == []
+
+
+def test_events_appended_at_once(tmp_path):
+    categorization_journal = CategorizationJournal(str(tmp_path))
+    categorization_journal.append_many(["id_1", "id_2"], "food")
+    assert [
+        (e["id"], e["category"], e["pattern"]) for e in categorization_journal.read()
+    ] == [("id_1", "food", None), ("id_2", "food", None)]
@@ -0,0 +1,45 @@
+import pandas as pd
+import pytest
+
+from spending_tracker.indexes.category_tree import CategoryTree
+
+
+def test_complete():
+    category_tree = CategoryTree(["food/groceries", "food/delivery", "fun", "travel"])
+    category_tree.add("travel/flights/intl")
+    assert "travel/flights" in category_tree
+    assert category_tree.complete("f") == [
+        "food",
+        "food/delivery",
+        "food/groceries",
+        "fun",
+    ]
+    assert category_tree.complete("food/g") == ["food/groceries"]
+    assert category_tree.complete("travel/") == [
+        "travel/flights",
+        "travel/flights/intl",
+    ]
+    assert category_tree.complete("x") == []
+
+
+def test_subtree_sums_match_per_level_groupby():
+    amounts_by_category = pd.Series(
+        {
+            "food": 5.0,
+            "food/groceries": 10.0,
+            "food/delivery/uber": 2.5,
+            "travel/flights": 100.0,
+            None: 1000.0,
+        }
+    )
+    subtree_sums = CategoryTree().get_subtree_sums(amounts_by_category)
+    assert subtree_sums.to_dict() == pytest.approx(
+        {
+            "food": 17.5,
+            "food/delivery": 2.5,
+            "food/delivery/uber": 2.5,
+            "food/groceries": 10.0,
+            "travel": 100.0,
+            "travel/flights": 100.0,
+        }
+    )
@@ -0,0 +1,53 @@
+import pandas as pd
+
+from spending_tracker.utils.compact_dtypes import (
+    compact_transactions,
+    get_memory_report,
+    set_column_values,
+)
+
+
+def create_transactions(num_rows=1000):
+    return pd.DataFrame(
+        {
+            "amount": [float(i) for i in range(num_rows)],
+            "account": [f"account_{i % 3}" for i in range(num_rows)],
+            "third_party_category": [None] * num_rows,
+            "note": [f"note {i % 10}" for i in range(num_rows)],
+            "pattern": [f"pattern {i % 5}" if i % 2 else None for i in range(num_rows)],
+            "category": [
+                f"category_{i % 5}" if i % 2 else None for i in range(num_rows)
+            ],
+        }
+    )
+
+
+def test_compact_transactions_keeps_values():
+    transactions = create_transactions()
+    compact = compact_transactions(transactions)
+    assert isinstance(compact["category"].dtype, pd.CategoricalDtype)
+    assert compact["note"][0] is compact["note"][10]
+    pd.testing.assert_frame_equal(
+        compact.astype(object).where(compact.notna(), None),
+        transactions.astype(object).where(transactions.notna(), None),
+    )
+
+
+def test_set_column_values_adds_new_categories():
+    compact = compact_transactions(create_transactions(10))
+    set_column_values(compact, [0, 2], "category", "new/category")
+    set_column_values(compact, 1, "category", None)
+    set_column_values(
+        compact, compact.index[-2:], "pattern", pd.Series(["a", "b"], index=[8, 9])
+    )
+    assert isinstance(compact["category"].dtype, pd.CategoricalDtype)
+    assert compact["category"][[0, 2]].tolist() == ["new/category"] * 2
+    assert pd.isna(compact["category"][1])
+    assert compact["pattern"][[8, 9]].tolist() == ["a", "b"]
+
+
+def test_memory_report_shows_savings():
+    memory_report = get_memory_report(create_transactions(100000))
+    assert memory_report.loc["total", "after"] < memory_report.loc["total", "before"]
+    assert memory_report.loc["category", "saved %"] > 50
+    assert memory_report.loc["note", "saved %"] > 50
@@ -0,0 +1,48 @@
+import warnings
+
+import pandas as pd
+import pytest
+
+from spending_tracker.engines.data_validation_engine import DataValidationEngine
+
+
+def test_historical_validation_reports_all_violations():
+    historical_categorized_transactions = pd.DataFrame(
+        {
+            "note": ["Shell Oil 123", "SHELL 456", "Joe's Pizza", "uber trip", "x"],
+            "pattern": ["shell", "shell", "pizza", "lyft", None],
+            "category": ["gas", "gas", "f" * 51, "transport", 5],
+        }
+    )
+    with pytest.raises(ValueError) as e:
+        DataValidationEngine(
+            supported_accounts={}
+        ).verify_historical_categorized_transactions(
+            historical_categorized_transactions
+        )
+    report = str(e.value)
+    assert "Found 3 invalid" in report
+    assert "Pattern: lyft --- Text: uber trip" in report
+    assert "got 51 at index 2" in report
+    assert "got 5 at index 4" in report
+
+
+def test_vectorized_validation_agrees_with_row_by_row():
+    patterns = pd.Series(
+        ["shell", "^joe", "pizza$", None, "shell", "uber( eats)?", "(lyft)"]
+    )
+    texts = pd.Series(
+        ["Shell Oil", "JOE's", "joe pizza", "anything", "exxon", "Uber Eats", "uber"]
+    )
+    expected = []
+    for pattern, text in zip(patterns, texts):
+        try:
+            DataValidationEngine.verify_pattern_matches_text(pattern, text)
+        except ValueError as e:
+            expected.append(str(e))
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")  # e.g. pandas' match groups warning
+        mismatches = DataValidationEngine.find_pattern_text_mismatches(patterns, texts)
+    assert mismatches == expected
+    categories = pd.Series([None, "gas"], dtype=object)
+    assert DataValidationEngine.find_category_format_violations(categories) == []
@@ -0,0 +1,107 @@
+import os
+
+import pandas as pd
+import pytest
+
+import spending_tracker.main
+from spending_tracker.benchmarks.synthetic_data import write_raw_data_file
+from spending_tracker.main import main
+
+
+def categorize_first_netflix_transaction(root_data_folder_path) -> None:
+    """As if the user categorized it with a pattern in the TUI"""
+    processed_data = (
+        spending_tracker.main.create_container().processed_transaction_store().load()
+    )
+    netflix_transaction = processed_data[
+        processed_data["note"].str.contains("NETFLIX")
+    ].iloc[[0]]
+    netflix_transaction["pattern"] = "netflix"
+    netflix_transaction["category"] = "subscriptions"
+    netflix_transaction[
+        [
+            "id",
+            "datetime",
+            "amount_cents",
+            "account",
+            "third_party_category",
+            "note",
+            "pattern",
+            "category",
+        ]
+    ].to_csv(root_data_folder_path / "categorized_transactions.csv", index=False)
+
+
+def test_headless_categorization_applies_existing_patterns(
+    tmp_path, monkeypatch, capsys
+):
+    monkeypatch.setenv("SPENDING_TRACKER_DATA_PATH", str(tmp_path))
+    os.makedirs(tmp_path / "raw")
+    write_raw_data_file(str(tmp_path / "raw"), "amex_blue_cash_preferred_2022_1", 50)
+    main(["ingest"])
+    main(["categorize", "--non-interactive"])
+    assert "Uncategorized: 50 new, 50 total" in capsys.readouterr().out
+    # uncategorized transactions aren't saved, they stay new
+    categorized_transactions_file_path = tmp_path / "categorized_transactions.csv"
+    assert len(pd.read_csv(categorized_transactions_file_path)) == 0
+    categorize_first_netflix_transaction(tmp_path)
+
+    write_raw_data_file(str(tmp_path / "raw"), "citi_double_cash_2022_1", 40, seed=1)
+    main(["ingest"])
+    main(["categorize", "--non-interactive"])
+    output = capsys.readouterr().out
+    assert "Categorized 90 transactions (89 new)" in output
+    assert "rows/s" in output
+    categorized_transactions = pd.read_csv(categorized_transactions_file_path)
+    assert categorized_transactions["note"].str.contains("NETFLIX").all()
+    assert (categorized_transactions["category"] == "subscriptions").all()
+    assert set(categorized_transactions["account"]) == {
+        "amex_blue_cash_preferred_2022_1",
+        "citi_double_cash_2022_1",
+    }
+    num_uncategorized = 90 - len(categorized_transactions)
+    assert (
+        f"Uncategorized: {num_uncategorized} new, {num_uncategorized} total" in output
+    )
+    main(["categorize", "--non-interactive"])
+    assert (
+        f"Categorized 90 transactions ({num_uncategorized} new)"
+        in capsys.readouterr().out
+    )
+
+
+def test_profile_output_requires_profile(capsys):
+    with pytest.raises(SystemExit):
+        main(["--profile-output", "profile.json", "report"])
+    assert "--profile-output requires --profile" in capsys.readouterr().err
+
+
+def test_migrated_ids_match_ingested_ids(tmp_path, monkeypatch, capsys):
+    monkeypatch.setenv("SPENDING_TRACKER_DATA_PATH", str(tmp_path))
+    os.makedirs(tmp_path / "raw")
+    write_raw_data_file(str(tmp_path / "raw"), "amex_blue_cash_preferred_2022_1", 50)
+    main(["ingest"])
+    categorize_first_netflix_transaction(tmp_path)
+    main(["categorize", "--non-interactive"])
+    num_categorized = len(pd.read_csv(tmp_path / "categorized_transactions.csv"))
+    with pytest.raises(SystemExit):
+        main(["migrate-ids", "--scheme", "legacy"])
+    main(["migrate-ids", "--scheme", "canonical"])
+
+    create_container = spending_tracker.main.create_container
+
+    def create_container_with_canonical_ids():
+        container = create_container()
+        container.config.transaction_id_scheme.from_value("canonical")
+        return container
+
+    monkeypatch.setattr(
+        spending_tracker.main, "create_container", create_container_with_canonical_ids
+    )
+    main(["ingest"])
+    capsys.readouterr()
+    main(["categorize", "--non-interactive"])
+    assert (
+        f"Categorized 50 transactions ({50 - num_categorized} new)"
+        in capsys.readouterr().out
+    )
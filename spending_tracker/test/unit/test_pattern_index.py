@@ -0,0 +1,54 @@
+import re
+
+from spending_tracker.indexes.pattern_index import PatternIndex
+
+
+def get_longest_pattern_by_brute_force(text, patterns):
+    matched_patterns = [p for p in patterns if re.search(p, text.lower())]
+    if len(matched_patterns) == 0:
+        return None
+    return max(matched_patterns, key=len)
+
+
+def test_longest_match_same_as_brute_force():
+    patterns = [
+        "amzn",
+        "amzn mktp",
+        "amzn mktp.*books",
+        "netflix\\.com",
+        "uber( eats)?",
+        "^chase_debit",
+        "(?i)COSTCO",
+        "gas|fuel",
+        "\\d{4}",
+    ]
+    notes = [
+        "chase_freedom_unlimited_2022_1_AMZN Mktp US*1234 BOOKS",
+        "chase_freedom_unlimited_2022_1_AMZN Mktp US",
+        "chase_debit_2022_1_NETFLIX.COM",
+        "citi_double_cash_2022_1_UBER EATS",
+        "citi_double_cash_2022_1_COSTCO WHSE 0001",
+        "amex_blue_cash_preferred_2022_1_SHELL FUEL",
+        "amex_blue_cash_preferred_2022_1_nothing",
+    ]
+    pattern_index = PatternIndex(patterns)
+    for note in notes:
+        assert pattern_index.find_longest_matching_pattern(
+            note
+        ) == get_longest_pattern_by_brute_force(note, patterns)
+
+
+def test_added_pattern_is_matched():
+    pattern_index = PatternIndex(["netflix"])
+    assert pattern_index.find_longest_matching_pattern("NETFLIX.COM") == "netflix"
+    pattern_index.add_pattern("netflix\\.com")
+    assert pattern_index.find_longest_matching_pattern("NETFLIX.COM") == "netflix\\.com"
+    assert pattern_index.find_matching_patterns("NETFLIX.COM") == [
+        "netflix",
+        "netflix\\.com",
+    ]
+
+
+def test_ties_go_to_first_added_pattern():
+    pattern_index = PatternIndex(["ab", "bc"])
+    assert pattern_index.find_longest_matching_pattern("abc") == "ab"
@@ -0,0 +1,104 @@
+import numpy as np
+import pandas as pd
+
+from spending_tracker.indexes.pattern_index import PatternIndex
+from spending_tracker.storage.pattern_match_matrix import PatternMatchMatrix
+
+
+class CountingPatternIndex(PatternIndex):
+    def __init__(self, patterns=()):
+        self.matched_texts = []
+        super().__init__(patterns)
+
+    def find_matching_patterns(self, text: str) -> list:
+        self.matched_texts.append(text)
+        return super().find_matching_patterns(text)
+
+
+def test_rows_and_columns_computed_once_and_kept_between_runs(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        "spending_tracker.storage.pattern_match_matrix.PatternIndex",
+        CountingPatternIndex,
+    )
+    notes = pd.Series(
+        ["NETFLIX.COM", "netflix.com", "Joe's Pizza", "NETFLIX.COM", None],
+        index=[10, 11, 12, 13, 14],
+    )
+    pattern_index = PatternIndex(["netflix", "pizza", "joe's pizza"])
+    pattern_match_matrix = PatternMatchMatrix(str(tmp_path))
+    patterns = pattern_match_matrix.find_longest_matching_patterns(notes, pattern_index)
+    assert patterns.to_dict() == {
+        10: "netflix",
+        11: "netflix",
+        12: "joe's pizza",
+        13: "netflix",
+        14: None,
+    }
+    assert pattern_match_matrix.pattern_index.matched_texts == [
+        "netflix.com",
+        "joe's pizza",
+    ]
+    pattern_match_matrix.save(notes, pattern_index)
+
+    # known notes and patterns are only looked up
+    pattern_match_matrix = PatternMatchMatrix(str(tmp_path))
+    assert pattern_match_matrix.find_matching_notes("pizza", notes).tolist() == [
+        False,
+        False,
+        True,
+        False,
+        False,
+    ]
+    assert pattern_match_matrix.pattern_index.matched_texts == []
+    # a new pattern's column is computed, the other columns are kept
+    assert pattern_match_matrix.find_matching_notes(".com$", notes).tolist() == [
+        True,
+        True,
+        False,
+        True,
+        False,
+    ]
+    pattern_index.add_pattern("netflix.com")
+    patterns = pattern_match_matrix.find_longest_matching_patterns(
+        pd.Series(["NETFLIX.COM", "Amazon.com"]), pattern_index
+    )
+    assert patterns.tolist() == ["netflix.com", None]
+    assert pattern_match_matrix.pattern_index.matched_texts == ["amazon.com"]
+
+
+def test_saved_matrix_compacted_to_current_notes_and_patterns(tmp_path):
+    pattern_match_matrix = PatternMatchMatrix(str(tmp_path))
+    pattern_match_matrix.find_longest_matching_patterns(
+        pd.Series(["netflix.com", "uber eats", "old note"]),
+        PatternIndex(["old", "uber", "netflix"]),
+    )
+    notes = pd.Series(["NETFLIX.COM", "Uber Eats"])
+    pattern_index = PatternIndex(["uber", "netflix"])
+    pattern_match_matrix.save(notes, pattern_index)
+
+    pattern_match_matrix = PatternMatchMatrix(str(tmp_path))
+    pattern_match_matrix.load()
+    assert pattern_match_matrix.notes == ["netflix.com", "uber eats"]
+    assert [pattern for pattern, _ in pattern_match_matrix.pattern_index.patterns] == [
+        "uber",
+        "netflix",
+    ]
+    assert pattern_match_matrix.find_longest_matching_patterns(
+        notes, pattern_index
+    ).tolist() == ["netflix", "uber"]
+
+
+def test_corrupt_matrix_is_dropped(tmp_path):
+    pattern_match_matrix = PatternMatchMatrix(str(tmp_path))
+    notes = pd.Series(["netflix.com"])
+    pattern_index = PatternIndex(["netflix"])
+    pattern_match_matrix.find_longest_matching_patterns(notes, pattern_index)
+    pattern_match_matrix.save(notes, pattern_index)
+    with np.load(pattern_match_matrix.matrix_file_path) as matrix_file:
+        arrays = dict(matrix_file)
+    arrays["indices"] = np.array([5], dtype="int32")  # no such pattern
+    with open(pattern_match_matrix.matrix_file_path, "wb") as f:
+        np.savez(f, **arrays)
+    pattern_match_matrix = PatternMatchMatrix(str(tmp_path))
+    pattern_match_matrix.load()
+    assert len(pattern_match_matrix) == 0
@@ -0,0 +1,32 @@
+import pytest
+
+from spending_tracker.engines.data_validation_engine import DataValidationEngine
+from spending_tracker.indexes.pattern_registry import PatternRegistry
+
+
+def test_add_and_conflict():
+    pattern_registry = PatternRegistry([("shell", "gas"), ("joe", "food")])
+    assert pattern_registry.add("shell", "gas") is False
+    assert pattern_registry.add("uber", "transport") is True
+    assert pattern_registry.get_category("uber") == "transport"
+    assert (
+        pattern_registry.pattern_index.find_longest_matching_pattern("uber trip")
+        == "uber"
+    )
+    with pytest.raises(ValueError, match="shell"):
+        pattern_registry.verify_pattern_can_map_to_category("shell", "food")
+    with pytest.raises(ValueError):
+        pattern_registry.add("joe", "gas")
+    assert pattern_registry.get_category("joe") == "food"
+    assert len(pattern_registry) == 3
+
+
+def test_bulk_validation_reports_all_conflicts():
+    DataValidationEngine.verify_no_pattern_maps_to_more_than_one_category(
+        [("shell", "gas"), ("shell", "gas"), ("joe", "food")]
+    )
+    with pytest.raises(ValueError) as e:
+        DataValidationEngine.verify_no_pattern_maps_to_more_than_one_category(
+            [("shell", "gas"), ("shell", "food"), ("joe", "food"), ("joe", "bar")]
+        )
+    assert "**shell**" in str(e.value) and "**joe**" in str(e.value)
@@ -0,0 +1,26 @@
+import json
+
+from spending_tracker.benchmarks.pipeline_benchmark import (
+    compare_results,
+    run_benchmark,
+)
+
+
+def test_benchmark_times_every_stage(tmp_path, capsys):
+    results = run_benchmark(num_rows=140, num_patterns=20, storage_format="parquet")
+    assert [result["stage"] for result in results] == [
+        "process_raw_data_files",
+        "load_data_to_categorize",
+        "categorize_data_using_pattern_category_map_cold",
+        "categorize_data_using_pattern_category_map_warm",
+        "save_categorized_transactions",
+        "analyze_categorized_transactions",
+    ]
+    assert all(result["peak_memory_bytes"] > 0 for result in results)
+    previous_results_file_path = tmp_path / "previous_results.json"
+    previous_results = [{**result, "seconds": 0.0} for result in results]
+    with open(previous_results_file_path, "w") as f:
+        json.dump({"results": previous_results}, f)
+    capsys.readouterr()
+    compare_results(previous_results_file_path, results)
+    assert capsys.readouterr().out.count("REGRESSION") == len(results)
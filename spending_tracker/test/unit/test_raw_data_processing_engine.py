@@ -1,2 +1,313 @@
+import filecmp
+import os
+import re
+
+import pandas as pd
+import pytest
+import yaml
+
+from spending_tracker.benchmarks.raw_data_parsers_benchmark import (
+    BENCHMARKED_ACCOUNTS,
+    RowByRowRawDataProcessingEngine,
+)
+from spending_tracker.benchmarks.synthetic_data import (
+    generate_raw_data,
+    write_raw_data_file,
+)
+from spending_tracker.engines.data_validation_engine import DataValidationEngine
+from spending_tracker.engines.raw_data_processing_engine import RawDataProcessingEngine
+from spending_tracker.storage.processed_transaction_store import (
+    ProcessedTransactionStore,
+)
+from spending_tracker.storage.transaction_storage import create_transaction_storage
+from spending_tracker.utils.transaction_ids import (
+    CANONICAL_TRANSACTION_ID_SCHEME,
+    LEGACY_TRANSACTION_ID_SCHEME,
+    generate_transaction_ids,
+)
+
+
+@pytest.fixture
+def supported_accounts():
+    with open("./spending_tracker/config.yaml") as config_file:
+        return yaml.safe_load(config_file)["supported_accounts"]
+
+
+def create_engine(
+    root_data_folder_path,
+    supported_accounts,
+    transaction_id_scheme=LEGACY_TRANSACTION_ID_SCHEME,
+    raw_data_processing_workers=1,
+    storage_format="csv",
+    engine_class=RawDataProcessingEngine,
+):
+    return engine_class(
+        DataValidationEngine(supported_accounts),
+        str(root_data_folder_path),
+        supported_accounts,
+        transaction_id_scheme,
+        raw_data_processing_workers,
+        ProcessedTransactionStore(
+            str(root_data_folder_path), create_transaction_storage(storage_format)
+        ),
+    )
+
+
+def write_raw_data_files(raw_data_folder_path):
+    for i, account in enumerate(BENCHMARKED_ACCOUNTS):
+        for year in [2021, 2022]:
+            write_raw_data_file(
+                raw_data_folder_path,
+                account,
+                50,
+                f"{year}-01-01",
+                f"{year}-12-31",
+                seed=year + i,
+            )
+
+
+def list_processed_data_files(processed_data_folder_path):
+    """Paths relative to the processed folder, except the manifest which
+    records raw file mtimes"""
+    return sorted(
+        os.path.relpath(
+            os.path.join(folder_path, file_name), processed_data_folder_path
+        )
+        for folder_path, _, file_names in os.walk(processed_data_folder_path)
+        for file_name in file_names
+        if file_name != ".manifest.json"
+    )
+
+
 def test_empty():
     pass
+
+
+def test_vectorized_account_methods_same_as_row_by_row(tmp_path, supported_accounts):
+    engine = create_engine(tmp_path, supported_accounts)
+    row_by_row_engine = create_engine(
+        tmp_path, supported_accounts, engine_class=RowByRowRawDataProcessingEngine
+    )
+    for account in BENCHMARKED_ACCOUNTS:
+        raw_data = generate_raw_data(account, 100, "2022-01-01", "2022-12-31")
+        raw_data["account"] = account
+        pd.testing.assert_frame_equal(
+            getattr(engine, account)(raw_data.copy(), None, None),
+            getattr(row_by_row_engine, account)(raw_data.copy(), None, None),
+        )
+    # amazon exports can end with a repeated header row, which is dropped
+    raw_data = generate_raw_data("amazon_2023_1", 100, "2022-01-01", "2022-12-31")
+    raw_data.loc[len(raw_data)] = raw_data.columns
+    raw_data["account"] = "amazon_2023_1"
+    processed_data = engine.amazon_2023_1(raw_data.copy(), None, None)
+    assert len(processed_data) == 100
+    pd.testing.assert_frame_equal(
+        processed_data,
+        row_by_row_engine.amazon_2023_1(raw_data.copy(), None, None),
+    )
+
+
+def test_canonical_ids_same_after_csv_round_trip(tmp_path, supported_accounts):
+    engine = create_engine(
+        tmp_path, supported_accounts, CANONICAL_TRANSACTION_ID_SCHEME
+    )
+    raw_data = generate_raw_data(
+        "citi_double_cash_2022_1", 100, "2022-01-01", "2022-12-31"
+    )
+    raw_data["account"] = "citi_double_cash_2022_1"
+    processed_data = engine.citi_double_cash_2022_1(raw_data, None, None)
+    processed_data.to_csv(tmp_path / "processed.csv", index=False)
+    reloaded_data = pd.read_csv(tmp_path / "processed.csv", parse_dates=["datetime"])
+    assert processed_data["id"].str.len().eq(30).all()
+    assert processed_data["id"].is_unique
+    assert (
+        generate_transaction_ids(reloaded_data, CANONICAL_TRANSACTION_ID_SCHEME)
+        == processed_data["id"]
+    ).all()
+
+
+def test_parallel_processing_same_as_serial(tmp_path, supported_accounts):
+    processed_data_folder_paths = []
+    for raw_data_processing_workers in [1, 3]:
+        root_data_folder_path = tmp_path / f"workers_{raw_data_processing_workers}"
+        engine = create_engine(
+            root_data_folder_path,
+            supported_accounts,
+            raw_data_processing_workers=raw_data_processing_workers,
+        )
+        write_raw_data_files(engine.raw_data_folder_path)
+        engine.process_raw_data_files()
+        processed_data_folder_paths.append(engine.processed_data_folder_path)
+    processed_data_file_paths = list_processed_data_files(
+        processed_data_folder_paths[0]
+    )
+    assert processed_data_file_paths == list_processed_data_files(
+        processed_data_folder_paths[1]
+    )
+    _, mismatches, errors = filecmp.cmpfiles(
+        *processed_data_folder_paths, processed_data_file_paths, shallow=False
+    )
+    assert mismatches == errors == []
+
+
+@pytest.mark.parametrize("raw_data_processing_workers", [1, 3])
+def test_processing_error_names_first_failing_file(
+    tmp_path, supported_accounts, raw_data_processing_workers
+):
+    engine = create_engine(
+        tmp_path,
+        supported_accounts,
+        raw_data_processing_workers=raw_data_processing_workers,
+    )
+    write_raw_data_files(engine.raw_data_folder_path)
+    failing_raw_data_file_names = sorted(os.listdir(engine.raw_data_folder_path))[1:3]
+    for raw_data_file_name in failing_raw_data_file_names:
+        with open(engine.raw_data_folder_path + raw_data_file_name, "w") as f:
+            f.write("unexpected,columns\n1,2\n")
+    with pytest.raises(RuntimeError, match=re.escape(failing_raw_data_file_names[0])):
+        engine.process_raw_data_files()
+
+
+def test_only_new_or_modified_raw_files_are_processed(tmp_path, supported_accounts):
+    engine = create_engine(tmp_path, supported_accounts)
+    write_raw_data_files(engine.raw_data_folder_path)
+    engine.process_raw_data_files()
+    raw_data_file_names = sorted(os.listdir(engine.raw_data_folder_path))
+    processed_data_files_mtimes = {
+        f: os.stat(engine.processed_data_folder_path + f).st_mtime_ns
+        for f in list_processed_data_files(engine.processed_data_folder_path)
+    }
+    # unchanged data folder -> nothing processed
+    engine = create_engine(tmp_path, supported_accounts)
+    assert engine.remove_outdated_processed_data(raw_data_file_names) == []
+    # modified and removed raw files
+    modified_raw_data_file_name = write_raw_data_file(
+        engine.raw_data_folder_path,
+        BENCHMARKED_ACCOUNTS[0],
+        10,
+        "2022-01-01",
+        "2022-12-31",
+    )
+    removed_raw_data_file_name = (
+        f"2021-01-01_to_2021-12-31_{BENCHMARKED_ACCOUNTS[0]}.csv"
+    )
+    os.remove(engine.raw_data_folder_path + removed_raw_data_file_name)
+    engine.process_raw_data_files()
+    store = engine.processed_transaction_store
+    assert store.raw_data_file_names() == [
+        raw_data_file_name
+        for raw_data_file_name in raw_data_file_names
+        if raw_data_file_name != removed_raw_data_file_name
+    ]
+    assert len(store.load(accounts=[BENCHMARKED_ACCOUNTS[0]])) == 10
+    assert len(store.load()) == 10 + 50 * (len(raw_data_file_names) - 2)
+    for processed_data_file in list_processed_data_files(
+        engine.processed_data_folder_path
+    ):
+        assert removed_raw_data_file_name[:-4] not in processed_data_file
+        if modified_raw_data_file_name[:-4] not in processed_data_file:
+            assert (
+                os.stat(
+                    engine.processed_data_folder_path + processed_data_file
+                ).st_mtime_ns
+                == processed_data_files_mtimes[processed_data_file]
+            )
+
+
+@pytest.mark.parametrize("storage_format", ["csv", "parquet", "feather"])
+def test_processed_transaction_store_load_filters(
+    tmp_path, supported_accounts, storage_format
+):
+    engine = create_engine(tmp_path, supported_accounts, storage_format=storage_format)
+    write_raw_data_files(engine.raw_data_folder_path)
+    engine.process_raw_data_files()
+    processed_data = engine.processed_transaction_store.load()
+    assert processed_data["id"].is_unique
+    filtered_processed_data = engine.processed_transaction_store.load(
+        accounts=BENCHMARKED_ACCOUNTS[:2], from_date="2021-03-15", to_date="2022-02-01"
+    )
+    expected_processed_data = processed_data[
+        processed_data["account"].isin(BENCHMARKED_ACCOUNTS[:2])
+        & (processed_data["datetime"] >= "2021-03-15")
+        & (processed_data["datetime"] <= "2022-02-01")
+    ]
+    assert sorted(filtered_processed_data["id"]) == sorted(
+        expected_processed_data["id"]
+    )
+
+
+def test_duplicate_ids_rejected_on_append(tmp_path, supported_accounts):
+    engine = create_engine(tmp_path, supported_accounts)
+    write_raw_data_files(engine.raw_data_folder_path)
+    engine.process_raw_data_files()
+    store = engine.processed_transaction_store
+    processed_data = store.load(accounts=[BENCHMARKED_ACCOUNTS[0]])
+    with pytest.raises(ValueError, match="duplicate ID"):
+        store.append("2023-01-01_to_2023-12-31_copy.csv", processed_data)
+    assert "2023-01-01_to_2023-12-31_copy.csv" not in store.raw_data_file_names()
+
+
+@pytest.mark.parametrize("storage_format", ["parquet", "feather"])
+def test_binary_storage_keeps_processed_data(
+    tmp_path, supported_accounts, storage_format
+):
+    csv_engine = create_engine(tmp_path / "csv", supported_accounts)
+    engine = create_engine(
+        tmp_path / storage_format, supported_accounts, storage_format=storage_format
+    )
+    for engine_ in [csv_engine, engine]:
+        write_raw_data_files(engine_.raw_data_folder_path)
+        engine_.process_raw_data_files()
+    processed_data = engine.processed_transaction_store.load()
+    assert processed_data["account"].dtype == "category"
+    pd.testing.assert_frame_equal(
+        processed_data.astype({"account": object}).sort_values("id", ignore_index=True),
+        csv_engine.processed_transaction_store.load()
+        .astype({"account": object})
+        .sort_values("id", ignore_index=True),
+        check_dtype=False,  # csv can't tell empty third_party_category from NaN
+    )
+
+
+@pytest.mark.parametrize(
+    "transaction_id_scheme",
+    [LEGACY_TRANSACTION_ID_SCHEME, CANONICAL_TRANSACTION_ID_SCHEME],
+)
+def test_chunked_processing_matches_processing_whole_files(
+    tmp_path, supported_accounts, transaction_id_scheme
+):
+    processed_data = {}
+    for raw_data_chunk_size in [None, 7]:
+        root_data_folder_path = tmp_path / str(raw_data_chunk_size)
+        engine = create_engine(
+            root_data_folder_path, supported_accounts, transaction_id_scheme
+        )
+        write_raw_data_files(str(root_data_folder_path / "raw"))
+        engine.raw_data_chunk_size = raw_data_chunk_size
+        engine.process_raw_data_files()
+        processed_data[raw_data_chunk_size] = engine.processed_transaction_store.load()
+    pd.testing.assert_frame_equal(processed_data[None], processed_data[7])
+    assert any(
+        ".chunk-000003" in file_name
+        for _, _, file_names in os.walk(tmp_path / "7" / "processed")
+        for file_name in file_names
+    )
+
+
+def test_chunked_processing_validates_each_chunk(tmp_path, supported_accounts):
+    raw_data = generate_raw_data(
+        "citi_double_cash_2022_1", 30, "2018-01-01", "2022-12-31"
+    )
+    raw_data.loc[25, "Date"] = "01/01/2030"
+    os.makedirs(tmp_path / "raw")
+    raw_data.to_csv(
+        tmp_path / "raw" / "2018-01-01_to_2022-12-31_citi_double_cash_2022_1.csv",
+        index=False,
+    )
+    engine = create_engine(tmp_path, supported_accounts)
+    engine.raw_data_chunk_size = 10
+    with pytest.raises(RuntimeError, match="Out of bound transaction"):
+        engine.process_raw_data_files()
+    # the chunks written before the failing one aren't committed
+    assert engine.processed_transaction_store.raw_data_file_names() == []
+    assert len(engine.processed_transaction_store.load()) == 0
@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from spending_tracker.analytics.spending_cubes import SpendingCubes
+from spending_tracker.benchmarks.synthetic_data import generate_raw_data
+from spending_tracker.engines.analytics_engine import AnalyticsEngine
+from spending_tracker.storage.transaction_storage import create_transaction_storage
+
+
+def create_categorized_transactions(num_rows: int, seed: int) -> pd.DataFrame:
+    raw_data = generate_raw_data(
+        "chase_debit_2022_1", num_rows, "2022-01-01", "2022-06-30", seed
+    )
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(
+        {
+            "id": [f"{seed}_{i}" for i in range(num_rows)],
+            "datetime": pd.to_datetime(raw_data["Posting Date"]),
+            "amount_cents": raw_data["Amount"].mul(100).round().astype("int64"),
+            "account": "chase_debit_2022_1",
+            "note": "chase_debit_2022_1_" + raw_data["Description"],
+            "category": rng.choice(
+                ["food/groceries", "food/delivery", "travel", None], num_rows
+            ),
+        }
+    )
+
+
+def test_incremental_update_matches_full_rebuild():
+    first = create_categorized_transactions(200, seed=0)
+    spending_cubes = SpendingCubes()
+    assert spending_cubes.update(first) == 200
+    spending_cubes.get_spend_amount_by_category()  # fill query cache
+    # new transactions arrive and some old ones get recategorized
+    second = pd.concat(
+        [first, create_categorized_transactions(100, seed=1)], ignore_index=True
+    )
+    second.loc[:19, "category"] = "shopping"
+    assert (
+        spending_cubes.update(second)
+        == 100 + (first["category"][:20] != "shopping").sum()
+    )
+    rebuilt_spending_cubes = SpendingCubes()
+    rebuilt_spending_cubes.update(second)
+    for name in spending_cubes.cubes:
+        dimensions = list(spending_cubes.cubes[name].columns[:-2])
+        pd.testing.assert_frame_equal(
+            spending_cubes.cubes[name].sort_values(dimensions, ignore_index=True),
+            rebuilt_spending_cubes.cubes[name].sort_values(
+                dimensions, ignore_index=True
+            ),
+            check_exact=True,
+        )
+    expected = second.groupby("category", dropna=False)["amount_cents"].sum() / 100
+    pd.testing.assert_series_equal(
+        spending_cubes.get_spend_amount_by_category().sort_index(),
+        expected.rename("amount").sort_index(),
+        check_exact=True,
+    )
+    assert spending_cubes.update(second) == 0
+
+
+def test_reports():
+    categorized_transactions = create_categorized_transactions(500, seed=2)
+    spending_cubes = SpendingCubes()
+    spending_cubes.update(categorized_transactions)
+    category_rollup = spending_cubes.get_category_rollup()
+    assert category_rollup["food"] == pytest.approx(
+        category_rollup["food/groceries"] + category_rollup["food/delivery"]
+    )
+    monthly_trend = spending_cubes.get_monthly_trend(category="food")
+    assert monthly_trend["amount"].sum() == pytest.approx(category_rollup["food"])
+    assert len(monthly_trend) == 6
+    top_merchants = spending_cubes.get_top_merchants(n=3)
+    assert len(top_merchants) == 3
+    assert {"SHELL OIL", "AMZN MKTP US", "UBER TRIP"}.issubset(
+        spending_cubes.cubes["merchants"]["merchant"]
+    )
+    # memoized until the next update
+    assert spending_cubes.get_top_merchants(n=3) is top_merchants
+    assert spending_cubes.get_monthly_trend(category="food") is monthly_trend
+    assert spending_cubes.get_top_merchants(n=2) is not top_merchants
+    spending_cubes.update(create_categorized_transactions(10, seed=3))
+    assert spending_cubes.get_top_merchants(n=3) is not top_merchants
+
+
+def test_cubes_saved_without_pickle(tmp_path):
+    analytics_engine = AnalyticsEngine(
+        str(tmp_path), create_transaction_storage("csv"), None
+    )
+    assert analytics_engine.load_spending_cubes()[0] is None  # no cache yet
+    categorized_transactions = create_categorized_transactions(100, seed=4)
+    analytics_engine.spending_cubes = SpendingCubes()
+    analytics_engine.spending_cubes.update(categorized_transactions)
+    analytics_engine.save_spending_cubes([123, 456])
+
+    file_signature, spending_cubes = analytics_engine.load_spending_cubes()
+    assert file_signature == [123, 456]
+    for name, frame in analytics_engine.spending_cubes.get_frames().items():
+        pd.testing.assert_frame_equal(spending_cubes.get_frames()[name], frame)
+    assert spending_cubes.update(categorized_transactions) == 0
+    pd.testing.assert_series_equal(
+        spending_cubes.get_category_rollup(),
+        analytics_engine.spending_cubes.get_category_rollup(),
+    )
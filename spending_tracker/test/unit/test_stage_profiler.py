@@ -0,0 +1,91 @@
+import json
+import pickle
+
+import pandas as pd
+
+import spending_tracker.main
+from spending_tracker.benchmarks.synthetic_data import write_raw_data_file
+from spending_tracker.main import main
+from spending_tracker.utils.stage_profiler import StageProfiler
+
+
+class Engine:
+    def __init__(self):
+        self.supported_accounts = {"bank_2022_1": {}}
+
+    def process(self, data):
+        return self.bank_2022_1(data)
+
+    def bank_2022_1(self, data):
+        return data.head(2)
+
+
+def test_stages_record_sub_steps_and_rows():
+    stage_profiler = StageProfiler(enabled=True)
+    engine = stage_profiler.instrument(Engine())
+    assert len(engine.process(pd.DataFrame({"a": range(5)}))) == 2
+    (bank_record,) = [
+        record for record in stage_profiler.records if record["name"].endswith("1")
+    ]
+    assert bank_record["path"] == ("Engine.bank_2022_1",)  # process isn't profiled
+    assert bank_record["rows"] == 2
+    assert bank_record["seconds"] >= 0
+
+
+def test_disabled_profiler_leaves_engines_untouched():
+    engine = Engine()
+    StageProfiler(enabled=False).instrument(engine)
+    assert "bank_2022_1" not in vars(engine)
+
+
+def test_instrumented_engine_is_picklable():
+    stage_profiler = StageProfiler(enabled=True)
+    engine = pickle.loads(pickle.dumps(stage_profiler.instrument(Engine())))
+    assert len(engine.process(pd.DataFrame({"a": range(5)}))) == 2
+    assert engine.bank_2022_1.profiler is not stage_profiler
+
+
+def test_profile_flag_prints_summary_and_writes_trace(tmp_path, monkeypatch, capsys):
+    monkeypatch.setenv("SPENDING_TRACKER_DATA_PATH", str(tmp_path))
+    (tmp_path / "raw").mkdir()
+    write_raw_data_file(str(tmp_path / "raw"), "citi_double_cash_2022_1", 20)
+    trace_file_path = tmp_path / "trace.json"
+    main(["--profile", "--profile-output", str(trace_file_path), "ingest"])
+    output = capsys.readouterr().out
+    assert "RawDataProcessingEngine.citi_double_cash_2022_1" in output
+    assert "DataValidationEngine.verify_raw_data_contains_correct_columns" in output
+    with open(trace_file_path) as trace_file:
+        trace_events = json.load(trace_file)["traceEvents"]
+    (trace_event,) = [
+        event for event in trace_events if event["name"].endswith("double_cash_2022_1")
+    ]
+    assert trace_event["ph"] == "X"
+    assert trace_event["args"]["rows"] == 20
+
+
+def test_stages_profiled_in_worker_processes_are_reported(
+    tmp_path, monkeypatch, capsys
+):
+    monkeypatch.setenv("SPENDING_TRACKER_DATA_PATH", str(tmp_path))
+    create_container = spending_tracker.main.create_container
+
+    def create_container_with_workers():
+        container = create_container()
+        container.config.raw_data_processing_workers.from_value(2)
+        return container
+
+    monkeypatch.setattr(
+        spending_tracker.main, "create_container", create_container_with_workers
+    )
+    (tmp_path / "raw").mkdir()
+    write_raw_data_file(str(tmp_path / "raw"), "citi_double_cash_2022_1", 20)
+    write_raw_data_file(str(tmp_path / "raw"), "chase_debit_2022_1", 30, seed=1)
+    main(["--profile", "ingest"])
+    output = capsys.readouterr().out
+    for stage in [
+        "RawDataProcessingEngine.process_raw_data_file ",
+        "RawDataProcessingEngine.citi_double_cash_2022_1",
+        "RawDataProcessingEngine.chase_debit_2022_1",
+        "DataValidationEngine.verify_raw_data_contains_correct_columns",
+    ]:
+        assert stage in output
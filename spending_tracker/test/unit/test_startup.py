@@ -0,0 +1,61 @@
+import os
+import subprocess
+import sys
+
+import yaml
+
+from spending_tracker.utils.config_cache import load_config
+
+REPO_FOLDER_PATH = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "..", "..")
+)
+# measured ~2ms for `import spending_tracker.main`, against ~400ms when it
+# imported pandas and dependency_injector at startup
+IMPORT_TIME_BUDGET_US = 50_000
+HEAVY_MODULES = ["pandas", "numpy", "dateutil", "dependency_injector", "yaml"]
+
+
+def measure_import_times(module: str) -> dict:
+    """Cumulative import time in microseconds of each module imported"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_FOLDER_PATH,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    import_times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, imported_module = line.split("|")
+        import_times[imported_module.strip()] = int(cumulative_us)
+    return import_times
+
+
+def test_main_import_is_lightweight():
+    import_times = measure_import_times("spending_tracker.main")
+    heavy_modules_imported = [
+        m for m in import_times if m.split(".")[0] in HEAVY_MODULES
+    ]
+    assert heavy_modules_imported == []
+    assert import_times["spending_tracker.main"] < IMPORT_TIME_BUDGET_US
+
+
+def test_config_is_cached(tmp_path, user_cache_folder):
+    config_file_path = str(tmp_path / "config" / "config.yaml")
+    os.makedirs(tmp_path / "config")
+    with open(config_file_path, "w") as config_file:
+        config_file.write("supported_accounts:\n  amex:\n    - Date\n")
+    assert load_config(config_file_path) == {"supported_accounts": {"amex": ["Date"]}}
+    # nothing is written next to the config file
+    assert os.listdir(tmp_path / "config") == ["config.yaml"]
+    assert len(os.listdir(user_cache_folder / "spending_tracker")) == 1
+    assert load_config(config_file_path) == {"supported_accounts": {"amex": ["Date"]}}
+    with open(config_file_path, "a") as config_file:
+        config_file.write("storage_format: parquet\n")
+    assert load_config(config_file_path)["storage_format"] == "parquet"
+    with open(os.path.join(REPO_FOLDER_PATH, "spending_tracker/config.yaml")) as f:
+        assert load_config(
+            os.path.join(REPO_FOLDER_PATH, "spending_tracker/config.yaml")
+        ) == yaml.safe_load(f)
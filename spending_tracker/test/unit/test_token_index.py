@@ -0,0 +1,39 @@
+import pandas as pd
+
+from spending_tracker.indexes.token_index import TokenIndex
+from spending_tracker.utils.compact_dtypes import (
+    compact_transactions,
+    set_column_values,
+)
+
+
+def test_search_matches_token_prefixes_and_follows_updates():
+    transactions = compact_transactions(
+        pd.DataFrame(
+            {
+                "note": [
+                    "chase_debit_2022_1_UBER EATS",
+                    "citi_double_cash_2022_1_UBER TRIP",
+                    "chase_debit_2022_1_COSTCO WHSE",
+                ],
+                "account": ["chase_debit_2022_1", "citi_double_cash_2022_1", None],
+                "category": [None, "transport", None],
+            },
+            index=[2, 1, 0],
+        )
+    )
+    token_index = TokenIndex(transactions, ["note", "account", "category"])
+    assert token_index.search("uber").tolist() == [2, 1]
+    assert token_index.search("UBER ea").tolist() == [2]
+    assert token_index.search("citi transport").tolist() == [1]
+    assert token_index.search("costco chase").tolist() == [0]
+    assert token_index.search("amazon").tolist() == []
+    assert token_index.search("  ").tolist() == []
+
+    set_column_values(transactions, [2, 0], "category", "food/groceries")
+    token_index.update([2, 0])
+    assert token_index.search("groc").tolist() == [2, 0]
+    set_column_values(transactions, [2], "category", "transport")
+    token_index.update([2])
+    assert token_index.search("food").tolist() == [0]
+    assert token_index.search("transport").tolist() == [2, 1]
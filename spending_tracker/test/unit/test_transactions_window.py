@@ -0,0 +1,57 @@
+import pandas as pd
+
+from spending_tracker.tui.transactions_window import TransactionsWindow
+
+
+def create_transactions(num_rows: int) -> pd.DataFrame:
+    transactions = pd.DataFrame(
+        {
+            "note": [f"note {i}" for i in range(num_rows)],
+            "category": [None] * num_rows,
+            "pattern": [None] * num_rows,
+            "amount_cents": [i * 100 for i in range(num_rows)],
+            "datetime": pd.date_range("2022-01-01", periods=num_rows),
+            "account": ["amex_blue_cash_preferred_2022_1"] * num_rows,
+            "third_party_category": ["Restaurant-Restaurant"] * num_rows,
+            "seen": [i % 2 == 0 for i in range(num_rows)],
+        }
+    )
+    transactions.index = range(num_rows - 1, -1, -1)
+    return transactions
+
+
+def test_pages_only_format_visible_rows():
+    transactions_window = TransactionsWindow(create_transactions(25), page_size=10)
+    rendered = transactions_window.render()
+    assert "[all transactions: 1-10 of 25]" in rendered
+    assert set(transactions_window.formatted_rows) == set(range(10))
+    assert "amex_blue_ca..." in rendered
+    transactions_window.page_up()
+    transactions_window.page_up()
+    assert list(transactions_window.get_page_indices()) == list(range(15, 25))
+    transactions_window.page_down()
+    assert list(transactions_window.get_page_indices()) == list(range(5, 15))
+    transactions_window.jump_to(3)
+    assert list(transactions_window.get_page_indices()) == list(range(10))
+
+
+def test_only_unseen_and_invalidation():
+    transactions = create_transactions(25)
+    transactions_window = TransactionsWindow(transactions, page_size=10)
+    transactions_window.toggle_only_unseen()
+    assert list(transactions_window.get_page_indices()) == list(range(1, 20, 2))
+    assert transactions_window.get_next_index(-1) == 1
+    assert transactions_window.get_next_index(23) is None
+    transactions_window.render()
+    transactions.loc[1, "category"] = "food"
+    assert "food" not in transactions_window.render()  # cached
+    transactions_window.invalidate([1])
+    assert "food" in transactions_window.render()
+    # shown indices are kept between renders, until a row's seen flag changes
+    shown_indices = transactions_window.get_shown_indices()
+    assert transactions_window.get_shown_indices() is shown_indices
+    transactions.loc[[1, 3], "seen"] = True
+    transactions_window.invalidate(pd.Index([3, 1]))
+    assert list(transactions_window.get_shown_indices()) == list(range(5, 25, 2))
+    transactions_window.toggle_only_unseen()
+    assert len(transactions_window.get_shown_indices()) == 25
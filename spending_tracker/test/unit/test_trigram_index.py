@@ -0,0 +1,42 @@
+import pandas as pd
+
+from spending_tracker.indexes.trigram_index import TrigramIndex
+
+
+def test_matches_same_as_brute_force():
+    notes = pd.Series(
+        [
+            "chase_freedom_unlimited_2022_1_AMZN Mktp US*1234 BOOKS",
+            "chase_freedom_unlimited_2022_1_AMZN Mktp US",
+            "chase_debit_2022_1_NETFLIX.COM",
+            "citi_double_cash_2022_1_UBER EATS",
+            "citi_double_cash_2022_1_UBER EATS",
+            "citi_double_cash_2022_1_COSTCO WHSE 0001",
+            None,
+        ],
+        index=[6, 5, 4, 3, 2, 1, 0],
+    )
+    patterns = [
+        "amzn mktp.*books",
+        "netflix\\.com",
+        "uber( eats)?",
+        "^chase_debit",
+        "(?i)COSTCO",
+        "COSTCO",
+        "gas|fuel",
+        "\\d{4}",
+        "ab",
+    ]
+    trigram_index = TrigramIndex(notes)
+    assert len(trigram_index) == 5
+    for pattern in patterns:
+        assert trigram_index.find_matches(pattern).equals(
+            notes.str.lower().str.contains(pattern, na=False).astype(bool)
+        )
+
+
+def test_candidates_narrowed_to_notes_with_all_literal_trigrams():
+    trigram_index = TrigramIndex(pd.Series(["uber eats", "uber", "eats"]))
+    assert trigram_index.find_candidate_text_ids("uber.*eats").tolist() == [0]
+    assert trigram_index.find_candidate_text_ids("(?i)uber").tolist() == [0, 1, 2]
+    assert trigram_index.find_candidate_text_ids("amzn").tolist() == []
@@ -0,0 +1,144 @@
+import numpy as np
+import pandas as pd
+
+from spending_tracker.utils.amounts import format_cents
+
+# printed columns and the width they are truncated to (None: not truncated).
+# amount is printed in dollars from the amount_cents column
+PRINTED_COLUMN_WIDTHS = {
+    "note": None,
+    "category": 30,
+    "pattern": 15,
+    "amount": None,
+    "datetime": None,
+    "account": 15,
+    "third_party_category": 15,
+}
+
+
+class TransactionsWindow:
+
+    """Page of the transactions to categorize shown in the TUI.
+
+    Only the rows of the visible page are formatted for printing. Formatted rows
+    are cached by transaction index, as are the sorted indices and which of them
+    are unseen, so rows must be invalidated when their category, pattern or seen
+    flag changes. Rows are shown in the order of the transactions frame, so
+    higher indices (older transactions) are above; paging up shows older ones.
+    """
+
+    def __init__(self, transactions: pd.DataFrame, page_size: int = 50):
+        self.transactions = transactions
+        self.page_size = page_size
+        self.only_unseen = False
+        self.page_start = 0  # position of first (lowest index) row of the page
+        self.formatted_rows = {}
+        self.sorted_indices = np.sort(transactions.index.to_numpy())
+        # aligned with sorted_indices
+        self.is_unseen = (
+            (transactions["seen"] == False).reindex(self.sorted_indices).to_numpy()
+        )
+        self.unseen_indices = None  # built when first shown
+
+    @staticmethod
+    def truncate_string_for_print(str_, width: int) -> str:
+        if len(str_) > width:
+            str_ = str_[: width - 3] + "..."
+        return str_
+
+    def get_shown_indices(self) -> np.ndarray:
+        """Ascending transaction indices passing the filter"""
+        if not self.only_unseen:
+            return self.sorted_indices
+        if self.unseen_indices is None:
+            self.unseen_indices = self.sorted_indices[self.is_unseen]
+        return self.unseen_indices
+
+    def get_next_index(self, last_transaction_index: int):
+        """Next shown transaction index after the last one, None at the end"""
+        shown_indices = self.get_shown_indices()
+        position = np.searchsorted(shown_indices, last_transaction_index, "right")
+        if position >= len(shown_indices):
+            return None
+        return int(shown_indices[position])
+
+    def get_page_indices(self) -> np.ndarray:
+        shown_indices = self.get_shown_indices()
+        self.page_start = min(
+            self.page_start, max(len(shown_indices) - self.page_size, 0)
+        )
+        return shown_indices[self.page_start : self.page_start + self.page_size]
+
+    def page_up(self) -> None:
+        self.page_start += self.page_size
+        self.get_page_indices()  # clamp to last page
+
+    def page_down(self) -> None:
+        self.page_start = max(self.page_start - self.page_size, 0)
+
+    def jump_to(self, transaction_index: int) -> None:
+        """Show the page containing the transaction, if it passes the filter"""
+        shown_indices = self.get_shown_indices()
+        position = np.searchsorted(shown_indices, transaction_index)
+        if position < len(shown_indices):
+            self.page_start = (position // self.page_size) * self.page_size
+
+    def follow(self, transaction_index: int) -> None:
+        """Move to the transaction's page only if it isn't already visible"""
+        if transaction_index not in self.get_page_indices():
+            self.jump_to(transaction_index)
+
+    def toggle_only_unseen(self) -> None:
+        self.only_unseen = not self.only_unseen
+        self.page_start = 0
+        self.unseen_indices = None
+
+    def invalidate(self, transaction_indices) -> None:
+        """Drops the rows' formatting and refreshes their seen flags"""
+        for transaction_index in transaction_indices:
+            self.formatted_rows.pop(transaction_index, None)
+        positions = np.searchsorted(self.sorted_indices, transaction_indices)
+        is_unseen = (
+            self.transactions.loc[transaction_indices, "seen"] == False
+        ).to_numpy()
+        if (self.is_unseen[positions] != is_unseen).any():
+            self.is_unseen[positions] = is_unseen
+            self.unseen_indices = None
+
+    def format_row(self, transaction_index: int) -> list:
+        transaction = self.transactions.loc[transaction_index]
+        formatted_row = []
+        for column, width in PRINTED_COLUMN_WIDTHS.items():
+            if column == "amount":
+                value = format_cents(transaction["amount_cents"])
+            else:
+                value = "-" if pd.isna(transaction[column]) else transaction[column]
+            if width is not None:
+                value = self.truncate_string_for_print(str(value), width)
+            formatted_row.append(value)
+        return formatted_row
+
+    def render_rows(self, transaction_indices) -> str:
+        """The transactions in the printed format, in the given order"""
+        for transaction_index in transaction_indices:
+            if transaction_index not in self.formatted_rows:
+                self.formatted_rows[transaction_index] = self.format_row(
+                    transaction_index
+                )
+        return str(
+            pd.DataFrame(
+                [self.formatted_rows[i] for i in transaction_indices],
+                index=transaction_indices,
+                columns=list(PRINTED_COLUMN_WIDTHS),
+            )
+        )
+
+    def render(self) -> str:
+        page = self.render_rows(self.get_page_indices()[::-1])
+        num_shown = len(self.get_shown_indices())
+        return (
+            f"{page}\n"
+            f"[{'unseen' if self.only_unseen else 'all'} transactions: "
+            f"{min(self.page_start + 1, num_shown)}-"
+            f"{min(self.page_start + self.page_size, num_shown)} of {num_shown}]"
+        )
@@ -0,0 +1,44 @@
+import pandas as pd
+
+
+def to_cents(amounts: pd.Series) -> pd.Series:
+    """Dollar amounts to int64 cents, rounded to the nearest cent"""
+    amounts = amounts.astype(float)
+    if amounts.isna().any():
+        raise ValueError(
+            f"Found transaction(s) without amount at index "
+            f"{amounts.index[amounts.isna()].tolist()}"
+        )
+    return amounts.mul(100).round().astype("int64")
+
+
+def to_dollars(cents):
+    """Cents (int or Series) to float dollars, for display only"""
+    return cents / 100
+
+
+def format_cents(cents: int) -> str:
+    """e.g. -1234 -> '-12.34', without going through a float"""
+    sign = "-" if cents < 0 else ""
+    dollars, cents = divmod(abs(int(cents)), 100)
+    return f"{sign}{dollars}.{cents:02d}"
+
+
+def convert_amounts_to_cents(transactions: pd.DataFrame) -> pd.DataFrame:
+    """Replaces the float `amount` column (parser output, and files written
+    before amounts were stored as cents) with `amount_cents` at the same
+    position. Transactions already in cents are returned as is"""
+    if "amount" not in transactions or "amount_cents" in transactions:
+        return transactions
+    transactions = transactions.rename(columns={"amount": "amount_cents"})
+    transactions["amount_cents"] = to_cents(transactions["amount_cents"])
+    return transactions
+
+
+def convert_amounts_to_dollars(transactions: pd.DataFrame) -> pd.DataFrame:
+    """Inverse of convert_amounts_to_cents"""
+    if "amount_cents" not in transactions:
+        return transactions
+    transactions = transactions.rename(columns={"amount_cents": "amount"})
+    transactions["amount"] = to_dollars(transactions["amount"])
+    return transactions
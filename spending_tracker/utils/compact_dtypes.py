@@ -0,0 +1,84 @@
+import sys
+
+import pandas as pd
+
+# string columns with few distinct values, stored as categoricals
+CATEGORICAL_COLUMNS = ["account", "third_party_category", "pattern", "category"]
+
+
+def compact_transactions(transactions: pd.DataFrame) -> pd.DataFrame:
+    """Low cardinality string columns as categoricals and notes interned, i.e.
+    rows with the same note share one string object. Notes stay python strings
+    (rather than Arrow backed ones) as patterns are matched with python's re"""
+    transactions = transactions.copy(deep=False)
+    for column in CATEGORICAL_COLUMNS:
+        if column in transactions:
+            transactions[column] = transactions[column].astype("category")
+    if "note" in transactions:
+        interned_notes = {}
+        transactions["note"] = pd.Series(
+            [
+                interned_notes.setdefault(note, note)
+                for note in transactions["note"].to_numpy(dtype=object)
+            ],
+            index=transactions.index,
+            dtype=object,
+        )
+    return transactions
+
+
+def set_column_values(data: pd.DataFrame, indices, column: str, values) -> None:
+    """data.loc[indices, column] = values. Values missing from the categories of
+    a categorical column are added to them first, as setting them would raise"""
+    if column in data and isinstance(data[column].dtype, pd.CategoricalDtype):
+        new_categories = (
+            pd.Index(
+                pd.Series(
+                    values if pd.api.types.is_list_like(values) else [values],
+                    dtype=object,
+                ).dropna()
+            )
+            .unique()
+            .difference(data[column].cat.categories)
+        )
+        # set on the column (only its small codes array is copied) and swap it in
+        column_values = data[column].cat.add_categories(new_categories)
+        if isinstance(values, pd.Series):
+            values = values.astype(object)
+        column_values.loc[indices] = values
+        data[column] = column_values
+    else:
+        data.loc[indices, column] = values
+
+
+def get_memory_usage(transactions: pd.DataFrame) -> pd.Series:
+    """Bytes used by each column. Unlike DataFrame.memory_usage(deep=True),
+    objects referenced by several rows (e.g. interned notes) are counted once"""
+    memory_usage = {}
+    for column in transactions:
+        if transactions[column].dtype == object:
+            values = transactions[column].to_numpy()
+            unique_objects = {id(value): value for value in values}
+            memory_usage[column] = values.nbytes + sum(
+                map(sys.getsizeof, unique_objects.values())
+            )
+        else:
+            memory_usage[column] = transactions[column].memory_usage(
+                index=False, deep=True
+            )
+    return pd.Series(memory_usage, dtype="int64")
+
+
+def get_memory_report(transactions: pd.DataFrame) -> pd.DataFrame:
+    """MiB per column of the transactions in the previous schema, where every
+    string is its own python object as read_csv creates them, and compacted"""
+    before = transactions.astype(
+        {column: object for column in CATEGORICAL_COLUMNS if column in transactions}
+    ).memory_usage(index=False, deep=True)
+    after = get_memory_usage(compact_transactions(transactions))
+    memory_report = pd.DataFrame({"before": before, "after": after}) / 2**20
+    memory_report.loc["total"] = memory_report.sum()
+    memory_report["saved %"] = (
+        1 - memory_report["after"] / memory_report["before"]
+    ) * 100
+    return memory_report.round(2)
@@ -0,0 +1,52 @@
+import hashlib
+import json
+import os
+
+
+def get_config_cache_file_path(config_file_path: str) -> str:
+    """In the user cache folder rather than next to config.yaml, whose folder may
+    be a read-only or shared install. Named after the config file's absolute
+    path, so each config file has its own cache"""
+    cache_folder_path = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    config_file_path_hash = hashlib.sha256(
+        os.path.abspath(config_file_path).encode()
+    ).hexdigest()[:16]
+    return os.path.join(
+        cache_folder_path,
+        "spending_tracker",
+        f"{os.path.basename(config_file_path)}.{config_file_path_hash}.json",
+    )
+
+
+def load_config(config_file_path: str) -> dict:
+    """Parsed config.yaml. The parsed config is cached as JSON (which loads
+    much faster than importing and running the YAML parser) until config.yaml's
+    size or mtime change"""
+    config_file_stat = os.stat(config_file_path)
+    config_file_signature = [config_file_stat.st_size, config_file_stat.st_mtime_ns]
+    config_cache_file_path = get_config_cache_file_path(config_file_path)
+    try:
+        with open(config_cache_file_path) as config_cache_file:
+            config_cache = json.load(config_cache_file)
+        if config_cache["config_file_signature"] == config_file_signature:
+            return config_cache["config"]
+    except (OSError, ValueError, KeyError):
+        pass
+    import yaml
+
+    with open(config_file_path) as config_file:
+        config = yaml.safe_load(config_file) or {}
+    try:
+        os.makedirs(os.path.dirname(config_cache_file_path), exist_ok=True)
+        temporary_file_path = config_cache_file_path + ".tmp"
+        with open(temporary_file_path, "w") as config_cache_file:
+            json.dump(
+                {"config_file_signature": config_file_signature, "config": config},
+                config_cache_file,
+            )
+        os.replace(temporary_file_path, config_cache_file_path)
+    except OSError:
+        pass  # e.g. read-only install, just parse again next time
+    return config
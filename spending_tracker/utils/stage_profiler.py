@@ -0,0 +1,270 @@
+import contextlib
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import types
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# methods timed on each engine when profiling. On RawDataProcessingEngine every
+# supported account method is timed too, on DataValidationEngine every verify_*
+# and find_* method
+PROFILED_METHODS = {
+    "RawDataProcessingEngine": [
+        "process_raw_data_files",
+        "remove_outdated_processed_data",
+        "process_and_write_raw_data_files",
+        "process_raw_data_file",
+        "process_raw_data",
+        "write_processed_data",
+        "parse_datetime_column",
+        "add_note_and_id_columns",
+    ],
+    "DataValidationEngine": [],
+    "CategorizationEngine": [
+        "load_historical_categorized_transactions",
+        "get_all_patterns_categories_from_historical_categorized_transactions",
+        "load_processed_data",
+        "load_data_to_categorize",
+        "categorize_data_using_pattern_category_map",
+        "categorize_data_using_new_pattern",
+        "replay_categorization_journal",
+        "print_transactions_to_categorize",
+        "run_batch_categorization",
+        "save_transactions_to_categorize",
+        "save_categorized_transactions",
+    ],
+    "AnalyticsEngine": [
+        "load_categorized_transactions",
+        "load_spending_cubes",
+        "save_spending_cubes",
+        "analyze_categorized_transactions",
+    ],
+}
+
+
+def get_peak_rss_bytes() -> int:
+    """Peak resident set size of the process so far, None if unavailable"""
+    if resource is None:
+        return None
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on linux, bytes on macOS
+    return peak_rss if sys.platform == "darwin" else peak_rss * 1024
+
+
+def count_rows(*values) -> int:
+    """Length of the first dataframe/series among the values, None if none"""
+    for value in values:
+        if hasattr(value, "shape") and hasattr(value, "index"):
+            return len(value)
+    return None
+
+
+class StageProfiler:
+
+    """Records wall time, rows processed and peak RSS of profiled stages.
+
+    Stages nest: a stage started while another one runs (e.g. an account method
+    called from process_raw_data_file) is recorded as its sub-step. When
+    disabled, stages cost a single attribute check and nothing is recorded.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = bool(enabled)
+        self.records = []
+        # names of the stages currently running, outermost first
+        self.stage_stack = []
+        self.start_time = time.perf_counter()
+
+    def __getstate__(self) -> dict:
+        # copies sent to worker processes start with no records, the work done
+        # there returns its records to be added with add_records
+        return {**self.__dict__, "records": []}
+
+    def add_records(self, records: list) -> None:
+        """Records of a copy of the profiler, e.g. in a worker process"""
+        self.records += records
+
+    @contextlib.contextmanager
+    def stage(self, name: str, rows=None):
+        if not self.enabled:
+            yield
+            return
+        record = {
+            "name": name,
+            "path": (*self.stage_stack, name),
+            "start": time.perf_counter() - self.start_time,
+            "rows": rows,
+            "pid": os.getpid(),
+        }
+        self.stage_stack.append(name)
+        try:
+            yield record
+        finally:
+            self.stage_stack.pop()
+            record["seconds"] = time.perf_counter() - self.start_time - record["start"]
+            record["peak_rss_bytes"] = get_peak_rss_bytes()
+            self.records.append(record)
+
+    def instrument(self, engine):
+        """Replaces the profiled methods of the engine instance with timed ones,
+        and sets its stage_profiler. Returns the engine. Engines are left untouched
+        when profiling is disabled"""
+        if not self.enabled:
+            return engine
+        engine.stage_profiler = self
+        engine_class_name = type(engine).__name__
+        method_names = list(PROFILED_METHODS.get(engine_class_name, []))
+        for name in dir(type(engine)):
+            if name in (getattr(engine, "supported_accounts", None) or ()) or (
+                engine_class_name == "DataValidationEngine"
+                and name.startswith(("verify_", "find_"))
+            ):
+                method_names.append(name)
+        for method_name in method_names:
+            setattr(
+                engine,
+                method_name,
+                ProfiledMethod(
+                    self,
+                    f"{engine_class_name}.{method_name}",
+                    getattr(engine, method_name),
+                ),
+            )
+        return engine
+
+    def get_summary(self) -> list:
+        """One row per stage, i.e. per method and chain of calling stages, with
+        its calls, total seconds, rows and peak RSS at the end of the stage.
+        Sub-steps follow their stage, siblings are in order of first start"""
+        summary = {}
+        for record in sorted(self.records, key=lambda record: record["start"]):
+            row = summary.setdefault(
+                record["path"],
+                {
+                    "name": record["name"],
+                    "depth": len(record["path"]) - 1,
+                    "first_start": record["start"],
+                    "calls": 0,
+                    "seconds": 0.0,
+                    "rows": None,
+                    "peak_rss_bytes": None,
+                },
+            )
+            row["calls"] += 1
+            row["seconds"] += record["seconds"]
+            if record["rows"] is not None:
+                row["rows"] = (row["rows"] or 0) + record["rows"]
+            if record["peak_rss_bytes"] is not None:
+                row["peak_rss_bytes"] = max(
+                    row["peak_rss_bytes"] or 0, record["peak_rss_bytes"]
+                )
+        first_starts = {path: row["first_start"] for path, row in summary.items()}
+        return [
+            row
+            for path, row in sorted(
+                summary.items(),
+                key=lambda item: [
+                    first_starts[item[0][: depth + 1]] for depth in range(len(item[0]))
+                ],
+            )
+        ]
+
+    def format_summary(self) -> str:
+        summary = self.get_summary()
+        name_width = max(
+            [len("stage")] + [2 * row["depth"] + len(row["name"]) for row in summary]
+        )
+        lines = [
+            f"{'stage':<{name_width}} {'calls':>7} {'seconds':>9} {'rows':>10} "
+            f"{'rows/s':>10} {'peak RSS MiB':>12}"
+        ]
+        for row in summary:
+            rows = "" if row["rows"] is None else row["rows"]
+            rows_per_second = (
+                ""
+                if row["rows"] is None or row["seconds"] == 0
+                else f"{row['rows'] / row['seconds']:.0f}"
+            )
+            peak_rss = (
+                ""
+                if row["peak_rss_bytes"] is None
+                else f"{row['peak_rss_bytes'] / 2**20:.1f}"
+            )
+            name = "  " * row["depth"] + row["name"]
+            lines.append(
+                f"{name:<{name_width}} {row['calls']:>7} {row['seconds']:>9.3f} "
+                f"{rows:>10} {rows_per_second:>10} {peak_rss:>12}"
+            )
+        return "\n".join(lines)
+
+    def write_chrome_trace(self, trace_file_path: str) -> None:
+        """Writes the stages as complete events of the Chrome trace-event format,
+        viewable in chrome://tracing or https://ui.perfetto.dev"""
+        trace_events = [
+            {
+                "name": record["name"],
+                "cat": record["name"].partition(".")[0],
+                "ph": "X",
+                "ts": record["start"] * 1e6,
+                "dur": record["seconds"] * 1e6,
+                "pid": record["pid"],
+                "tid": threading.get_ident(),
+                "args": {
+                    "rows": record["rows"],
+                    "peak_rss_bytes": record["peak_rss_bytes"],
+                },
+            }
+            for record in self.records
+        ]
+        with open(trace_file_path, "w") as trace_file:
+            json.dump({"traceEvents": trace_events}, trace_file)
+
+
+class ProfiledMethod:
+
+    """Engine method timed as a stage of the profiler. A class rather than a
+    closure so that engines stay picklable for the raw data processing workers"""
+
+    def __init__(self, profiler: StageProfiler, name: str, method):
+        self.profiler = profiler
+        self.name = name
+        self.method = method
+        functools.update_wrapper(self, method)
+
+    @classmethod
+    def from_function(cls, profiler: StageProfiler, name: str, function, instance):
+        return cls(profiler, name, types.MethodType(function, instance))
+
+    def __reduce__(self):
+        # a bound method pickles as a lookup of its name on the instance, which
+        # would find this wrapper again, so its function and instance are pickled
+        if isinstance(self.method, types.MethodType):
+            return (
+                ProfiledMethod.from_function,
+                (
+                    self.profiler,
+                    self.name,
+                    self.method.__func__,
+                    self.method.__self__,
+                ),
+            )
+        return (ProfiledMethod, (self.profiler, self.name, self.method))
+
+    def __call__(self, *args, **kwargs):
+        if not self.profiler.enabled:
+            return self.method(*args, **kwargs)
+        with self.profiler.stage(
+            self.name, count_rows(*args, *kwargs.values())
+        ) as record:
+            result = self.method(*args, **kwargs)
+            rows = count_rows(result)
+            if rows is not None:
+                record["rows"] = rows
+            return result
@@ -0,0 +1,80 @@
+import hashlib
+
+import pandas as pd
+
+from spending_tracker.utils.amounts import convert_amounts_to_dollars
+
+# sha256 over numpy's repr of the row, as ids were generated historically
+LEGACY_TRANSACTION_ID_SCHEME = "legacy"
+# blake2b over a canonical encoding of the normalized columns
+CANONICAL_TRANSACTION_ID_SCHEME = "canonical"
+TRANSACTION_ID_SCHEMES = [LEGACY_TRANSACTION_ID_SCHEME, CANONICAL_TRANSACTION_ID_SCHEME]
+
+TRANSACTION_ID_LENGTH = 30
+CANONICAL_FIELD_SEPARATOR = "\x1f"
+
+
+def generate_transaction_ids(
+    processed_data: pd.DataFrame, transaction_id_scheme: str
+) -> pd.Series:
+    """Hashes each processed transaction into an id using the configured scheme"""
+    if transaction_id_scheme == LEGACY_TRANSACTION_ID_SCHEME:
+        return generate_legacy_transaction_ids(processed_data)
+    if transaction_id_scheme == CANONICAL_TRANSACTION_ID_SCHEME:
+        return generate_canonical_transaction_ids(processed_data)
+    raise ValueError(
+        f"Unknown transaction id scheme {transaction_id_scheme}. "
+        f"Must be one of {TRANSACTION_ID_SCHEMES}"
+    )
+
+
+def generate_legacy_transaction_ids(processed_data: pd.DataFrame) -> pd.Series:
+    """Reproduces historical ids: sha256 of str() of the row's values, so these
+    depend on the column order and on numpy's array print formatting. Rows are
+    taken from one object array instead of building a Series per row. Amounts
+    are hashed as float dollars, as they were stored historically"""
+    processed_data = convert_amounts_to_dollars(processed_data)
+    return pd.Series(
+        [
+            hashlib.sha256(str(row).encode("utf-8")).hexdigest()[
+                0:TRANSACTION_ID_LENGTH
+            ]
+            for row in processed_data.to_numpy(dtype=object)
+        ],
+        index=processed_data.index,
+        dtype=object,
+    )
+
+
+def encode_canonical_transactions(processed_data: pd.DataFrame) -> pd.Series:
+    """One string per transaction, independent of column order, dtypes and float
+    repr. Amounts are encoded as integer cents and missing values as empty fields"""
+    if "amount_cents" in processed_data:
+        amount_cents = processed_data["amount_cents"]
+    else:
+        amount_cents = processed_data["amount"].mul(100).round().astype("int64")
+    return (
+        processed_data["datetime"].dt.strftime("%Y-%m-%dT%H:%M:%S")
+        + CANONICAL_FIELD_SEPARATOR
+        + amount_cents.astype(str)
+        + CANONICAL_FIELD_SEPARATOR
+        + processed_data["account"].astype(str)
+        + CANONICAL_FIELD_SEPARATOR
+        + processed_data["third_party_category"].fillna("").astype(str)
+        + CANONICAL_FIELD_SEPARATOR
+        + processed_data["note"].fillna("").astype(str)
+    )
+
+
+def generate_canonical_transaction_ids(processed_data: pd.DataFrame) -> pd.Series:
+    return pd.Series(
+        [
+            hashlib.blake2b(
+                canonical_transaction.encode("utf-8"),
+                digest_size=TRANSACTION_ID_LENGTH // 2,
+            ).hexdigest()
+            for canonical_transaction in encode_canonical_transactions(processed_data)
+        ],
+        index=processed_data.index,
+        dtype=object,
+    )